@@ -0,0 +1,83 @@
+#===========================================================================
+#
+# Address keyed signal object.
+#
+#===========================================================================
+from .Signal import Signal
+
+
+class AddrSignal:
+    """Signal with a separate set of slots for each device address.
+
+    This is used for messages that are only of interest to the device they
+    came from.  Slots are connected for an address and emit() only calls the
+    slots for the input address so the cost doesn't grow with the number of
+    devices.  Otherwise, this works like Signal (slots are held in weak
+    references).
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self):
+        """Constructor
+        """
+        # Address.id -> Signal
+        self._signals = {}
+
+    #-----------------------------------------------------------------------
+    def emit(self, addr, *args, **kwargs):
+        """Emit the signal for an address.
+
+        All of the slots connected to the address will be called with the
+        input args and kwargs.
+
+        Args:
+           addr (Address):  The address to emit the signal for.
+           args:  List of positional arguments to pass.
+           kwargs:  Dictionary of the keyword arguments to pass.
+        """
+        signal = self._signals.get(addr.id)
+        if signal is not None:
+            signal.emit(*args, **kwargs)
+
+    #-----------------------------------------------------------------------
+    def connect(self, addr, slot):
+        """Connect a slot to the signal for an address.
+
+        If the input slot is already connected, nothing is done.
+
+        Args:
+           addr (Address):  The address to connect the slot to.
+           slot:  Instance method or function to connect.
+        """
+        signal = self._signals.get(addr.id)
+        if signal is None:
+            signal = self._signals[addr.id] = Signal()
+
+        signal.connect(slot)
+
+    #-----------------------------------------------------------------------
+    def disconnect(self, addr, slot):
+        """Disconnect a slot from the signal for an address.
+
+        If the input slot is not connected, nothing is done.
+
+        Args:
+           addr (Address):  The address to disconnect the slot from.
+           slot:  Instance method or function to disconnect.
+        """
+        signal = self._signals.get(addr.id)
+        if signal is None:
+            return
+
+        signal.disconnect(slot)
+        if not signal.slots:
+            del self._signals[addr.id]
+
+    #-----------------------------------------------------------------------
+    def clear(self):
+        """Clear all the attached slots from the signal.
+        """
+        self._signals = {}
+
+    #-----------------------------------------------------------------------
+
+#===========================================================================
@@ -15,11 +15,34 @@ class Address:
     Once constructed, the address has the following attributes:
     - id    (int) The integer ID of the address.
     - ids   ([int]) List of the three byte ID's of the address.
+    - bytes (bytes) The three byte address.
     - hex   (str) A nicely formatted hex string of the address.
 
+    Only the integer ID is stored.  The bytes and hex string are created
+    the first time they are used and ids is computed from the ID.
+
     The Address class supports hash and comparisons so it can be used as a
     dictionary key.
+
+    Addresses are immutable.  The constructor returns a shared (interned)
+    object for each address (up to cache_max addresses) so an address from
+    a message is the same object that the devices and databases store and
+    constructing an Address from an existing Address returns it unchanged.
     """
+    __slots__ = ["id", "_bytes", "_hex"]
+
+    # The slots are set with object.__setattr__ in __new__ so they're
+    # declared here for pylint.  The types are strings since the bytes and
+    # hex properties below shadow the builtin names.
+    id: "int"
+    _bytes: "bytes"
+    _hex: "str"
+
+    # Address.id -> Address cache of interned addresses.  This is limited
+    # so messages from many unknown devices can't grow it forever.
+    _cache = {}
+    cache_max = 4096
+
     #-----------------------------------------------------------------------
     @staticmethod
     def from_bytes(raw, offset=0):
@@ -53,7 +76,7 @@ class Address:
         return Address(data)
 
     #-----------------------------------------------------------------------
-    def __init__(self, addr, addr2=None, addr3=None):
+    def __new__(cls, addr, addr2=None, addr3=None):
         """Construct an Address object.
 
         An address has three bytes AA, BB, and CC that need to be input.  The
@@ -77,6 +100,10 @@ class Address:
           addr2:  Optional 2nd address input.
           addr3:  Optional 3rd address input.
         """
+        # Addresses are immutable so there is no need to copy them.
+        if addr2 is None and type(addr) is Address:  # pylint: disable=C0123
+            return addr
+
         # Error if: no address is input, or not both addr2 and addr3 are
         # input.
         if (addr is None or
@@ -89,23 +116,56 @@ class Address:
 
         # First input has all 3 byte values.
         if addr2 is None:
-            id1, id2, id3 = self._addr1_to_ids(addr)
+            id1, id2, id3 = cls._addr1_to_ids(addr)
 
         # Input is split into 3 parts
         else:
-            id1, id2, id3 = self._addr3_to_ids(addr, addr2, addr3)
-
-        # Store the 3 integer address ID's
-        self.ids = [id1, id2, id3]
+            id1, id2, id3 = cls._addr3_to_ids(addr, addr2, addr3)
 
         # Convert the 3 integer values to a single integer ID to use.
-        self.id = (id1 << 16) | (id2 << 8) | id3
+        id = (id1 << 16) | (id2 << 8) | id3
+
+        self = cls._cache.get(id)
+        if self is not None:
+            return self
+
+        # Attributes are set through object since __setattr__ raises.
+        self = super().__new__(cls)
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "_bytes", None)
+        object.__setattr__(self, "_hex", None)
+
+        if len(cls._cache) < cls.cache_max:
+            cls._cache[id] = self
+
+        return self
+
+    #-----------------------------------------------------------------------
+    @property
+    def ids(self):
+        """List of the three integer byte ID's of the address.
+        """
+        id = self.id
+        return [id >> 16, id >> 8 & 0xFF, id & 0xFF]
 
-        # Create the byte sequence for the address.
-        self.bytes = bytes(self.ids)
+    #-----------------------------------------------------------------------
+    @property
+    def bytes(self):
+        """The three byte address as bytes.
+        """
+        if self._bytes is None:
+            object.__setattr__(self, "_bytes", self.id.to_bytes(3, "big"))
+        return self._bytes
 
-        # And a nicely formatted hex string output.
-        self.hex = ("%02X.%02X.%02X" % tuple(self.ids)).lower()
+    #-----------------------------------------------------------------------
+    @property
+    def hex(self):
+        """The address as a lower case 'aa.bb.cc' hex string.
+        """
+        if self._hex is None:
+            object.__setattr__(self, "_hex", "%02x.%02x.%02x" %
+                               tuple(self.ids))
+        return self._hex
 
     #-----------------------------------------------------------------------
     def to_bytes(self):
@@ -129,6 +189,22 @@ class Address:
         """
         return self.hex
 
+    #-----------------------------------------------------------------------
+    def __setattr__(self, name, value):
+        raise AttributeError("Address objects are immutable")
+
+    #-----------------------------------------------------------------------
+    def __reduce__(self):
+        return (Address, (self.id,))
+
+    #-----------------------------------------------------------------------
+    def __copy__(self):
+        return self
+
+    #-----------------------------------------------------------------------
+    def __deepcopy__(self, memo):
+        return self
+
     #-----------------------------------------------------------------------
     def __hash__(self):
         return self.id.__hash__()
@@ -146,7 +222,8 @@ class Address:
         return self.hex
 
     #-----------------------------------------------------------------------
-    def _addr1_to_ids(self, addr):
+    @staticmethod
+    def _addr1_to_ids(addr):
         """Convert a single input to an Address
 
         Arg:
@@ -187,7 +264,8 @@ class Address:
         return (id1, id2, id3)
 
     #-----------------------------------------------------------------------
-    def _addr3_to_ids(self, a1, a2, a3):
+    @staticmethod
+    def _addr3_to_ids(a1, a2, a3):
         """Convert three inputs to an Address
 
         Arg:
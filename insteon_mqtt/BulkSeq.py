@@ -0,0 +1,309 @@
+#===========================================================================
+#
+# Bulk command class
+#
+#===========================================================================
+import collections
+import functools
+import time
+from .CommandSeq import Entry
+from .SeqBase import SeqBase
+from .WriteQueue import Priority
+from . import log
+
+LOG = log.get_logger()
+
+
+class BulkSeq(SeqBase):
+    """Commands for many devices run with a limited number at a time.
+
+    This is used for commands that run on every device (refresh all, sync
+    all, the startup refresh).  Running them one at a time is slow since
+    each device command waits for replies from the device while the modem
+    sits idle.  Starting all of them at once floods the protocol write
+    queue with hundreds of messages.  So this runs up to max_active jobs at
+    the same time.
+
+    Job starts are spaced by the average time the modem takes to reply to a
+    message (see Protocol.get_ack_latency()) so a burst of jobs doesn't
+    fill the write queue all at once.  New jobs aren't started while user
+    commands are waiting in the interactive write queue lane - those
+    commands are always sent before refresh and database messages (see
+    WriteQueue) so the jobs that are already running don't delay them
+    either.
+
+    Jobs are identified by a label (usually the device label).  When all
+    the jobs finish, the on_done callback is passed a dict of label to job
+    status as the data argument.  Like CommandSeq, the sequence can be
+    paused, resumed, or cancelled and can report its progress using
+    LOG.ui().
+    """
+    # Default maximum number of jobs to run at the same time.
+    max_active = 4
+
+    # Time in seconds to wait before checking again if new jobs can be
+    # started while user commands are waiting to be sent.
+    busy_dt = 0.5
+
+    # Name of the items in the sequence used in the log messages.
+    item_name = "jobs"
+
+    #-----------------------------------------------------------------------
+    def __init__(self, modem, msg=None, on_done=None, name="",
+                 max_active=None, progress=False):
+        """Constructor
+
+        Args:
+          modem (Modem): The modem.  This is used to check the protocol
+                write queue and to schedule delayed job starts.
+          msg (str): String message to pass to on_done if all the jobs
+              work.
+          on_done: The callback to run when all the jobs have finished or
+                   the sequence is cancelled.  The data argument is the job
+                   status dict.
+          name (str): A short name used in logging to identify this sequence
+          max_active (int): The maximum number of jobs to run at the same
+                     time.  None to use the class default.
+          progress (bool): True to report the progress and estimated time
+                   remaining using LOG.ui().
+        """
+        super().__init__(msg, on_done, name, progress)
+        self.modem = modem
+        if max_active is not None:
+            self.max_active = max(1, max_active)
+
+        # Queue of (label, exclusive, Entry) jobs that haven't started.
+        self._jobs = collections.deque()
+
+        # Job label -> status.  Status is one of "pending", "running",
+        # "done", "cancelled", or "failed: " + the error message.
+        self.status = {}
+
+        # Number of jobs that have been started and haven't finished.
+        self._active = 0
+        self._num_done = 0
+
+        # True while an exclusive job is running.
+        self._exclusive = False
+
+        # Earliest time the next job can start and the TimedCall handle used
+        # to start it.
+        self._next_start = 0
+        self._timer = None
+
+    #-----------------------------------------------------------------------
+    @property
+    def total(self):
+        """The total number of jobs.
+        """
+        return len(self.status)
+
+    #-----------------------------------------------------------------------
+    def add(self, label, func, *args, **kwargs):
+        """Add a job to the sequence.
+
+        Args:
+          label (str): The label used for the job in the status dict.  This
+                should be unique for each job.
+          func: The function or method to call.  Must take an on_done
+                callback argument.
+          args: Arguments to pass to the function.
+          kwargs: Keyword arguments to pass to the function.
+        """
+        self._add(label, False, func, args, kwargs)
+
+    #-----------------------------------------------------------------------
+    def add_exclusive(self, label, func, *args, **kwargs):
+        """Add a job to the sequence which runs by itself.
+
+        The job won't start until all the jobs before it have finished and
+        the jobs after it won't start until it has finished.  This is used
+        for the modem commands which have to finish before the device
+        commands start.
+
+        Args:
+          label (str): The label used for the job in the status dict.  This
+                should be unique for each job.
+          func: The function or method to call.  Must take an on_done
+                callback argument.
+          args: Arguments to pass to the function.
+          kwargs: Keyword arguments to pass to the function.
+        """
+        self._add(label, True, func, args, kwargs)
+
+    #-----------------------------------------------------------------------
+    def run(self):
+        """Run the sequence.
+
+        This starts the first jobs and returns.  The rest of the jobs are
+        started as the running jobs finish.
+        """
+        self._start_clock()
+        self._start_jobs()
+
+    #-----------------------------------------------------------------------
+    def _add(self, label, exclusive, func, args, kwargs):
+        """Add a job to the sequence.
+
+        Args:
+          label (str): The label used for the job in the status dict.
+          exclusive (bool): True if the job runs by itself.
+          func: The function or method to call.
+          args: Arguments to pass to the function.
+          kwargs: Keyword arguments to pass to the function.
+        """
+        # See CommandSeq.add() - the on_done argument is always ours.
+        kwargs.pop("on_done", None)
+        self._jobs.append((label, exclusive,
+                           Entry.from_func(func, args, kwargs)))
+        self.status[label] = "pending"
+
+    #-----------------------------------------------------------------------
+    def _start_jobs(self):
+        """Start as many jobs as the limits allow.
+
+        Jobs that finish before they return don't start the next jobs from
+        inside their callback.  They decrement the active count and this
+        loop starts the next jobs so the stack depth doesn't grow with the
+        number of jobs.
+        """
+        self._cancel_timer()
+        self._running = True
+        try:
+            while self._jobs and not self._paused:
+                if self._exclusive or self._active >= self.max_active:
+                    break
+
+                label, exclusive, entry = self._jobs[0]
+                if exclusive and self._active:
+                    break
+
+                # Wait for the next start time and for user commands to be
+                # sent.
+                t = time.time()
+                if t < self._next_start:
+                    self._start_timer(self._next_start)
+                    break
+
+                if self.modem.protocol.num_waiting(Priority.INTERACTIVE):
+                    self._start_timer(t + self.busy_dt)
+                    break
+
+                self._jobs.popleft()
+                self._active += 1
+                self._exclusive = exclusive
+                self.status[label] = "running"
+                LOG.debug("BulkSeq %s starting %s", self.name, label)
+
+                latency = self.modem.protocol.get_ack_latency()
+                self._next_start = t + (latency or 0)
+
+                entry.run(self.modem,
+                          functools.partial(self._job_done, label))
+        finally:
+            self._running = False
+
+        if not self._active and (self._cancelled or not self._jobs):
+            self._finish()
+
+    #-----------------------------------------------------------------------
+    def _job_done(self, label, success, msg, data):
+        """Job finished callback.
+
+        Args:
+          label (str):  The job label.
+          success (bool):  True for success, False for failure.
+          msg (str):  str) Message result.
+          data:  Arbitrary callback data.
+        """
+        if self.status.get(label) != "running":
+            return
+
+        self.status[label] = "done" if success else "failed: %s" % msg
+        self._active -= 1
+        self._num_done += 1
+        self._exclusive = False
+        LOG.debug("BulkSeq %s finished %s: %s", self.name, label,
+                  self.status[label])
+        self._report(self._num_done)
+
+        # If this was called by a job started in _start_jobs(), it will
+        # start the next jobs when the current one returns.
+        if not self._running:
+            self._start_jobs()
+
+    #-----------------------------------------------------------------------
+    def _finish(self):
+        """Finish the sequence and call the on_done callback.
+        """
+        if self._done:
+            return
+
+        self._done = True
+        self._cancel_timer()
+
+        failed = [label for label, status in self.status.items()
+                  if status.startswith("failed")]
+        for label in failed:
+            LOG.ui("%s: %s %s", self.name, label, self.status[label])
+
+        if self._cancelled:
+            self._on_done(False, "%s cancelled" % self.name, self.status)
+        elif failed:
+            self._on_done(False, "%s, %d of %d failed" %
+                          (self.msg, len(failed), self.total), self.status)
+        else:
+            self._on_done(True, self.msg, self.status)
+
+    #-----------------------------------------------------------------------
+    def _start_timer(self, t):
+        """Schedule a _start_jobs() call.
+
+        Args:
+          t (float):  The Unix clock time tag to start more jobs at.
+        """
+        if self._timer is None:
+            self._timer = self.modem.timed_call.add(t, self._start_jobs)
+
+    #-----------------------------------------------------------------------
+    def _cancel_timer(self):
+        """Cancel the scheduled _start_jobs() call if there is one.
+        """
+        if self._timer is not None:
+            self.modem.timed_call.remove(self._timer)
+            self._timer = None
+
+    #-----------------------------------------------------------------------
+    def _num_left(self):
+        """Return the number of jobs that haven't started.
+        """
+        return len(self._jobs)
+
+    #-----------------------------------------------------------------------
+    def _on_pause(self):
+        """Stop the scheduled job start after the sequence is paused.
+        """
+        self._cancel_timer()
+
+    #-----------------------------------------------------------------------
+    def _on_resume(self):
+        """Start the next jobs after the sequence is resumed.
+        """
+        if not self._running:
+            self._start_jobs()
+
+    #-----------------------------------------------------------------------
+    def _on_cancel(self):
+        """Remove the jobs that haven't started after the sequence is
+        cancelled.
+        """
+        for label, _exclusive, _entry in self._jobs:
+            self.status[label] = "cancelled"
+
+        self._jobs.clear()
+        self._cancel_timer()
+
+        if not self._active:
+            self._finish()
+
+    #-----------------------------------------------------------------------
@@ -3,13 +3,14 @@
 # Command sequence class
 #
 #===========================================================================
+import collections
+from .SeqBase import SeqBase
 from . import log
-from . import util
 
 LOG = log.get_logger()
 
 
-class CommandSeq:
+class CommandSeq(SeqBase):
     """Series of commands to run sequentially.
 
     This class stores a series of commands that run sequentially (using
@@ -21,14 +22,20 @@ class CommandSeq:
     network activity to actually run the command.  In the future, this is
     probably a good case for switching to asyncio type processing.
 
-    Ideally there is a better way to this but I couldn't come up with any.
-    Since each call is via callback, the stack grows longer and longer so
-    this shouldn't be used for 100+ calls but for the small number of calls
-    this library needs, it works ok.
+    Commands that finish right away (calling on_done before they return)
+    don't start the next command from inside their callback.  The result is
+    saved and run() or on_done() loops to start the next command so the
+    stack depth stays the same no matter how many commands are in the
+    sequence.  Commands that send messages finish later from the network
+    loop.
+
+    Long sequences can report their progress using LOG.ui() which is sent
+    to the command session reply topic.  Sequences can be paused, resumed,
+    or cancelled between commands.
     """
     #-----------------------------------------------------------------------
     def __init__(self, device, msg=None, on_done=None, error_stop=True,
-                 name=""):
+                 name="", progress=False):
         """Constructor
 
         Args:
@@ -39,18 +46,24 @@ class CommandSeq:
           error_stop (bool): True to stop the sequence if a command fails.
                      False to continue on with the sequence.
           name (str): A short name used in logging to identify this sequence
+          progress (bool): True to report the progress and estimated time
+                   remaining using LOG.ui().
         """
+        super().__init__(msg, on_done, name, progress)
         self.device = device
-
-        self._on_done = util.make_callback(on_done)
-        self.msg = msg
         self.error_stop = error_stop
         self.total = 0
-        self.name = name
 
-        # List of Entry objects (see class below) to call for each step in
+        # Queue of Entry objects (see class below) to call for each step in
         # the sequence.
-        self.calls = []
+        self.calls = collections.deque()
+
+        # Result (success, msg, data) of the last command which hasn't been
+        # processed yet.
+        self._result = None
+
+        # True if a command has been started and hasn't finished yet.
+        self._busy = False
 
     #-----------------------------------------------------------------------
     def add(self, func, *args, **kwargs):
@@ -99,6 +112,7 @@ class CommandSeq:
         right away.  When the current command finishes, the on_done callback
         to that command triggers the next call.
         """
+        self._start_clock()
         self.on_done(True, None, None)
 
     #-----------------------------------------------------------------------
@@ -118,21 +132,90 @@ class CommandSeq:
           msg (str):  str) Message result.
           data:  Arbitrary callback data.
         """
-        # Last function failed with an error.
-        if not success and self.error_stop:
-            self._on_done(success, msg, data)
+        self._busy = False
+        self._result = (success, msg, data)
 
-        # No more calls - success.
-        elif not self.calls:
-            self._on_done(success, self.msg, data)
+        # If this was called by a command started in _step(), it will run
+        # the next command when the current one returns.
+        if not self._running:
+            self._step()
 
-        # Otherwise run the next command.
-        else:
-            LOG.debug("CmdSeq %s Running %d of %d", self.name,
-                      self.total + 1 - len(self.calls), self.total)
+    #-----------------------------------------------------------------------
+    def _step(self):
+        """Process command results and start the next commands.
+
+        This loops as long as the commands finish before they return.
+        """
+        self._running = True
+        try:
+            while self._result is not None and not self._paused:
+                success, msg, data = self._result
+                self._result = None
+
+                # Sequence was cancelled while a command was running.
+                if self._cancelled:
+                    self._finish(False, "%s cancelled" % self.name, None)
+
+                # Last function failed with an error.
+                elif not success and self.error_stop:
+                    self._finish(success, msg, data)
+
+                # No more calls - success.
+                elif not self.calls:
+                    self._finish(success, self.msg, data)
+
+                # Otherwise run the next command.
+                else:
+                    num = self.total - len(self.calls)
+                    LOG.debug("CmdSeq %s Running %d of %d", self.name,
+                              num + 1, self.total)
+                    self._report(num)
+
+                    entry = self.calls.popleft()
+                    self._busy = True
+                    entry.run(self.device, self.on_done)
+        finally:
+            self._running = False
+
+    #-----------------------------------------------------------------------
+    def _finish(self, success, msg, data):
+        """Finish the sequence and call the on_done callback.
+
+        Args:
+          success (bool):  True for success, False for failure.
+          msg (str):  str) Message result.
+          data:  Arbitrary callback data.
+        """
+        if self._done:
+            return
+
+        self._done = True
+        self._on_done(success, msg, data)
+
+    #-----------------------------------------------------------------------
+    def _num_left(self):
+        """Return the number of commands that haven't started.
+        """
+        return len(self.calls)
+
+    #-----------------------------------------------------------------------
+    def _on_resume(self):
+        """Start the next command after the sequence is resumed.
+        """
+        if self._result is not None and not self._running:
+            self._step()
+
+    #-----------------------------------------------------------------------
+    def _on_cancel(self):
+        """Remove the remaining commands after the sequence is cancelled.
+        """
+        self.calls.clear()
 
-            entry = self.calls.pop(0)
-            entry.run(self.device, self.on_done)
+        # If nothing is running, finish now.  Otherwise finish when the
+        # current command calls on_done.
+        if not self._busy:
+            self._result = None
+            self._finish(False, "%s cancelled" % self.name, None)
 
     #-----------------------------------------------------------------------
 
@@ -7,8 +7,10 @@ import json
 import os
 import sys
 import functools
+import time
 from .const import __version__
 from .Address import Address
+from .BulkSeq import BulkSeq
 from .CommandSeq import CommandSeq
 from .device.BatterySensor import BatterySensor
 from . import config
@@ -67,6 +69,19 @@ class Modem:
         # Map of Virtual Modem Scene Names to groups
         self.scene_map = {}
 
+        # Maximum number of devices to run refresh and sync commands on at
+        # the same time (see BulkSeq).
+        self.bulk_max_active = BulkSeq.max_active
+
+        # Number of device databases to load per event loop pass when they
+        # are preloaded after startup (see _preload_dbs()).
+        self.db_preload_batch = 10
+
+        # List of running CommandSeq and BulkSeq objects for commands run on
+        # all the devices (see refresh_all(), sync_all(), etc).  Used to
+        # pause or cancel them.
+        self._all_seqs = []
+
         # Signal to emit when a new device is added.
         self.signal_new_device = Signal()  # emit(modem, device)
 
@@ -94,6 +109,9 @@ class Modem:
             'sync' : self.sync,
             'import_scenes': self.import_scenes,
             'import_scenes_all': self.import_scenes_all,
+            'cancel_all' : self.cancel_all,
+            'pause_all' : self.pause_all,
+            'resume_all' : self.resume_all,
             'version': self.version
             }
 
@@ -108,10 +126,6 @@ class Modem:
         # Handle user triggered factory reset of the modem.
         self.protocol.add_handler(handler.ModemReset(self))
 
-        # Log messages as they received so we can track the message hop count
-        # to each device.
-        self.protocol.signal_received.connect(self.handle_received)
-
         # For compatibility with devices, this is empty.  The Modem does not
         # use config_extra settings.
         self.config_extra = {}
@@ -145,6 +159,8 @@ class Modem:
         - storage   Path to store database records in.
         - startup_refresh    True if device databases should be checked for
                              new entries on start up.
+        - bulk_max_active    Maximum number of devices to refresh or sync at
+                             the same time.
         - devices   List of devices.  Each device is a type and insteon
                     address of the device.
 
@@ -166,6 +182,9 @@ class Modem:
             self.label = "%s (%s)" % (self.addr, self.name)
             LOG.info("Modem address set to %s", self.addr)
 
+        self.bulk_max_active = data.get('bulk_max_active',
+                                        self.bulk_max_active)
+
         # Query the modem for its address
         callback = functools.partial(self.load_config_step2, config_data=data)
         self.get_addr(on_done=callback)
@@ -217,6 +236,9 @@ class Modem:
                 exit(1)
 
             self.save_path = save_path
+            if config_data.get('storage_format', 'json') == 'sqlite':
+                self._install_store()
+
             self.load_db()
 
             LOG.info("Modem %s database loaded %s entries", self.label,
@@ -236,12 +258,28 @@ class Modem:
         self.scenes = Scenes.SceneManager(self,
                                           config_data.get('scenes', None))
 
+        # Devices load their databases the first time they're used.  Load
+        # the rest a few at a time from the event loop so MQTT and the
+        # modem are serviced right away.
+        self._preload_dbs(list(self.devices.values()))
+
         # Send refresh messages to each device to check if the database is up
-        # to date.
+        # to date.  Only a few devices are refreshed at a time so user
+        # commands aren't stuck behind the refresh messages.
         if config_data.get('startup_refresh', False) is True:
             LOG.info("Starting device refresh")
+            seq = BulkSeq(self, "Startup refresh complete",
+                          name="StartupRefresh",
+                          max_active=self.bulk_max_active, progress=True)
             for device in self.devices.values():
-                device.refresh()
+                # Battery devices queue the refresh until they wake up which
+                # could take days so they would hold up the other devices.
+                if isinstance(device, BatterySensor):
+                    device.refresh()
+                else:
+                    seq.add(device.label, device.refresh)
+
+            self._run_all(seq)
 
     #-----------------------------------------------------------------------
     def get_addr(self, on_done=None):
@@ -324,19 +362,19 @@ class Modem:
         """Load the all link database from a file.
 
         The file is stored in JSON format (by save_db()) and has the path
-        self.db_path().  If the file doesn't exist, nothing is done.
+        self.db_path().  If a db.SqliteStore is installed, the database is
+        read from it instead.  If the database doesn't exist, nothing is
+        done.
         """
-        # See if the database file exists.  Tell the modem it's future path
-        # so it can save itself.
+        # Tell the modem it's future path so it can save itself.
         path = self.db_path()
         self.db.set_path(path)
-        if not os.path.exists(path):
-            return
 
         # Read the file and convert it to a db.Modem object.
         try:
-            with open(path) as f:
-                data = json.load(f)
+            data = db.read_db(path)
+            if data is None:
+                return
 
             self.db = db.Modem.from_json(data, path, self)
         except:
@@ -346,6 +384,27 @@ class Modem:
         LOG.info("%s database loaded %s entries", self.addr, len(self.db))
         LOG.debug("%s", self.db)
 
+    #-----------------------------------------------------------------------
+    def _install_store(self):
+        """Store the device and modem databases in SQLite.
+
+        All of the databases are stored in one SQLite file in the storage
+        directory instead of one JSON file per database (see
+        db.SqliteStore).  The existing JSON files can be copied into it with
+        the migrate-db command.
+        """
+        path = os.path.join(self.save_path, db.SqliteStore.file_name)
+        store = db.active_store()
+        if store is None or store.path != path:
+            store = db.SqliteStore(path)
+            store.install()
+
+        LOG.info("Using database store %s", path)
+        if not store.names() and \
+           any(i.endswith(".json") for i in os.listdir(self.save_path)):
+            LOG.warning("Database store %s is empty.  Run the migrate-db "
+                        "command to copy the JSON databases into it.", path)
+
     #-----------------------------------------------------------------------
     def print_db(self, on_done):
         """Print the device database to the log UI.
@@ -368,7 +427,17 @@ class Modem:
         Args:
           device:  The device object to add.
         """
+        old = self.devices.get(device.addr.id, None)
+        if old is not None:
+            self.protocol.signal_addr_received.disconnect(
+                old.addr, old.handle_received)
+
         self.devices[device.addr.id] = device
+
+        # Pass messages from the device to it as they are received so it can
+        # track the message hop count.
+        self.protocol.signal_addr_received.connect(device.addr,
+                                                   device.handle_received)
         if device.name:
             self.device_names[device.name] = device
 
@@ -384,6 +453,8 @@ class Modem:
                   nothing is done.
         """
         self.devices.pop(device.addr.id, None)
+        self.protocol.signal_addr_received.disconnect(device.addr,
+                                                      device.handle_received)
         if device.name:
             self.device_names.pop(device.name, None)
 
@@ -403,6 +474,20 @@ class Modem:
         Returns:
           Returns the device object or None if it doesn't exist.
         """
+        # Fast path for address lookups (every received message) and
+        # integer ids.  Address() returns the interned address w/o parsing.
+        if isinstance(addr, (Address, int)):
+            try:
+                addr = Address(addr)
+            except:
+                LOG.exception("Invalid Insteon address '%s'", addr)
+                return None
+
+            device = self.devices.get(addr.id, None)
+            if device is None and addr == self.addr:
+                return self
+            return device
+
         # Handle string device name requests.
         if isinstance(addr, str):
             addr = addr.lower()
@@ -439,7 +524,8 @@ class Modem:
         This forces a refresh of the modem and device databases.  This can
         take a long time - up to 5 seconds per device some times depending on
         the database sizes.  So it usually should only be called if no other
-        activity is expected on the network.
+        activity is expected on the network.  Up to bulk_max_active devices
+        are refreshed at the same time.
 
         Battery devices are not included in this command and this command
         must be run individually on each battery device.
@@ -451,21 +537,22 @@ class Modem:
           on_done:  Finished callback.  This is called when the command has
                     completed.  Signature is: on_done(success, msg, data)
         """
-        # Set the error stop to false so a failed refresh doesn't stop the
-        # sequence from trying to refresh other devices.
-        seq = CommandSeq(self, "Refresh all complete", on_done,
-                         error_stop=False, name="RefreshAll")
+        # A failed refresh doesn't stop the other devices from being
+        # refreshed.  The on_done data is the status of each device.
+        seq = BulkSeq(self, "Refresh all complete", on_done,
+                      name="RefreshAll", max_active=self.bulk_max_active,
+                      progress=True)
 
-        # Reload the modem database.
-        seq.add(self.refresh, force)
+        # Reload the modem database before the devices.
+        seq.add_exclusive(self.label, self.refresh, force)
 
         # Reload all the device databases.
         for device in self.devices.values():
             if (not isinstance(device, BatterySensor)):
-                seq.add(device.refresh, force)
+                seq.add(device.label, device.refresh, force)
 
         # Start the command sequence.
-        seq.run()
+        self._run_all(seq)
 
     #-----------------------------------------------------------------------
     def get_engine_all(self, on_done=None):
@@ -486,7 +573,8 @@ class Modem:
         # Set the error stop to false so a failed refresh doesn't stop the
         # sequence from trying to refresh other devices.
         seq = CommandSeq(self, "Get Engine all complete", on_done,
-                         error_stop=False, name="EngineAll")
+                         error_stop=False, name="EngineAll",
+                         progress=True)
 
         # Run Get Engine on all the devices
         for device in self.devices.values():
@@ -494,7 +582,7 @@ class Modem:
                 seq.add(device.get_engine)
 
         # Start the command sequence.
-        seq.run()
+        self._run_all(seq)
 
     #-----------------------------------------------------------------------
     def join_all(self, on_done=None):
@@ -513,7 +601,8 @@ class Modem:
         # Set the error stop to false so a failed join doesn't stop the
         # sequence from trying to join other devices.
         seq = CommandSeq(self, "Join all complete", on_done,
-                         error_stop=False, name="JoinAll")
+                         error_stop=False, name="JoinAll",
+                         progress=True)
 
         # Join all the device databases.
         for device in self.devices.values():
@@ -521,7 +610,7 @@ class Modem:
                 seq.add(device.join)
 
         # Start the command sequence.
-        seq.run()
+        self._run_all(seq)
 
     #-----------------------------------------------------------------------
     def pair_all(self, on_done=None):
@@ -540,7 +629,8 @@ class Modem:
         # Set the error stop to false so a failed pair doesn't stop the
         # sequence from trying to pair other devices.
         seq = CommandSeq(self, "Pair all complete", on_done,
-                         error_stop=False, name="PairAll")
+                         error_stop=False, name="PairAll",
+                         progress=True)
 
         # Pair all the device databases.
         for device in self.devices.values():
@@ -548,8 +638,94 @@ class Modem:
                 seq.add(device.pair)
 
         # Start the command sequence.
+        self._run_all(seq)
+
+    #-----------------------------------------------------------------------
+    def cancel_all(self, on_done=None):
+        """Cancel the running commands on all devices.
+
+        This stops any refresh_all, get_engine_all, join_all, pair_all, or
+        sync_all commands after the current device finishes.
+
+        Args:
+          on_done:  Finished callback.  This is called when the command has
+                    completed.  Signature is: on_done(success, msg, data)
+        """
+        on_done = util.make_callback(on_done)
+        seqs = self._running_all_seqs()
+        if not seqs:
+            on_done(False, "No commands running on all devices", None)
+            return
+
+        for seq in seqs:
+            seq.cancel()
+
+        on_done(True, "Cancelled %s" % ", ".join(i.name for i in seqs),
+                None)
+
+    #-----------------------------------------------------------------------
+    def pause_all(self, on_done=None):
+        """Pause the running commands on all devices.
+
+        The commands are paused after the current device finishes.  Use
+        resume_all() to continue them.
+
+        Args:
+          on_done:  Finished callback.  This is called when the command has
+                    completed.  Signature is: on_done(success, msg, data)
+        """
+        on_done = util.make_callback(on_done)
+        seqs = [i for i in self._running_all_seqs() if not i.is_paused]
+        if not seqs:
+            on_done(False, "No commands running on all devices", None)
+            return
+
+        for seq in seqs:
+            seq.pause()
+
+        on_done(True, "Paused %s" % ", ".join(i.name for i in seqs), None)
+
+    #-----------------------------------------------------------------------
+    def resume_all(self, on_done=None):
+        """Resume the paused commands on all devices.
+
+        Args:
+          on_done:  Finished callback.  This is called when the command has
+                    completed.  Signature is: on_done(success, msg, data)
+        """
+        on_done = util.make_callback(on_done)
+        seqs = [i for i in self._running_all_seqs() if i.is_paused]
+        if not seqs:
+            on_done(False, "No paused commands on all devices", None)
+            return
+
+        # Reply first since resuming will run the next commands.
+        on_done(True, "Resumed %s" % ", ".join(i.name for i in seqs), None)
+        for seq in seqs:
+            seq.resume()
+
+    #-----------------------------------------------------------------------
+    def _run_all(self, seq):
+        """Run a command sequence for all devices.
+
+        The sequence is saved so it can be paused or cancelled.
+
+        Args:
+          seq (CommandSeq or BulkSeq):  The sequence to run.
+        """
+        self._all_seqs = self._running_all_seqs()
+        self._all_seqs.append(seq)
         seq.run()
 
+    #-----------------------------------------------------------------------
+    def _running_all_seqs(self):
+        """Return the command sequences for all devices that are running.
+
+        Returns:
+          list:  The CommandSeq and BulkSeq objects that haven't finished.
+        """
+        return [i for i in self._all_seqs if not i.is_done]
+
     #-----------------------------------------------------------------------
     def get_devices(self, on_done=None):
         """"Print all the devices the modem knows about to the log UI.
@@ -908,21 +1084,23 @@ class Modem:
           on_done:  Finished callback.  This is called when the command has
                     completed.  Signature is: on_done(success, msg, data)
         """
-        # Set the error stop to false so a failed refresh doesn't stop the
-        # sequence from trying to refresh other devices.
-        seq = CommandSeq(self, "Sync All complete", on_done,
-                         error_stop=False, name="SyncAll")
+        # A failed sync doesn't stop the other devices from being synced.
+        # The on_done data is the status of each device.
+        seq = BulkSeq(self, "Sync All complete", on_done, name="SyncAll",
+                      max_active=self.bulk_max_active, progress=True)
 
         # First the modem database.
-        seq.add(self.sync, dry_run=dry_run, refresh=refresh)
+        seq.add_exclusive(self.label, self.sync, dry_run=dry_run,
+                          refresh=refresh)
 
         # Then each other device.
         for device in self.devices.values():
             if (not isinstance(device, BatterySensor)):
-                seq.add(device.sync, dry_run=dry_run, refresh=refresh)
+                seq.add(device.label, device.sync, dry_run=dry_run,
+                        refresh=refresh)
 
         # Start the command sequence.
-        seq.run()
+        self._run_all(seq)
 
     #-----------------------------------------------------------------------
     def import_scenes(self, dry_run=True, save=True, on_done=None):
@@ -1011,12 +1189,8 @@ class Modem:
 
         # Save everything at the end
         if not dry_run:
-            group.add(LOG.ui, "Compressing Scenes 1/3")
-            group.add(self.scenes.compress_responders)
-            group.add(LOG.ui, "Compressing Scenes 2/3")
-            group.add(self.scenes.compress_controllers)
-            group.add(LOG.ui, "Compressing Scenes 3/3")
-            group.add(self.scenes.compress_n_way)
+            group.add(LOG.ui, "Compressing Scenes")
+            group.add(self.scenes.compress)
             group.add(self.scenes.save)
 
         # Output success message to log
@@ -1165,26 +1339,6 @@ class Modem:
         msg_handler = handler.ModemScene(self, msg, on_done)
         self.send(msg, msg_handler)
 
-    #-----------------------------------------------------------------------
-    def handle_received(self, msg):
-        """Receives incomming message notifications from protocol
-
-        This is called for every message that is read from the modem.  For
-        standard and extended messages, it will find the device the message
-        is from and notify them it was received.  This is only used to track
-        the hop distance from the modem to each device and isn't used for
-        general message handling.
-
-        Args:
-          msg (Msg.Base):  The message that arrived.
-        """
-        if not isinstance(msg, (Msg.InpStandard, Msg.InpExtended)):
-            return
-
-        device = self.find(msg.from_addr)
-        if device:
-            device.handle_received(msg)
-
     #-----------------------------------------------------------------------
     def handle_scene(self, msg):
         """Callback for scene simulation commanded messages.
@@ -1250,6 +1404,30 @@ class Modem:
             LOG.exception("Invalid command inputs to modem %s.  Input "
                           "cmd %s with args: %s", self.addr, cmd, str(kwargs))
 
+    #-----------------------------------------------------------------------
+    def _preload_dbs(self, devices):
+        """Load device databases in the background.
+
+        This loads up to db_preload_batch databases and then schedules
+        itself to run again on the next event loop pass until every device
+        has been loaded.  Devices which have already loaded their database
+        (by being used) are skipped.
+
+        Args:
+          devices (list):  The devices to load.
+        """
+        num = 0
+        while devices and num < self.db_preload_batch:
+            device = devices.pop()
+            if not device.db_loaded:
+                device.load_db()
+                num += 1
+
+        if devices:
+            self.timed_call.add(time.time(), self._preload_dbs, devices)
+        else:
+            LOG.debug("Device databases loaded")
+
     #-----------------------------------------------------------------------
     def handle_group_cmd(self, addr, msg):
         """Handle a group command addressed to the modem.
@@ -3,17 +3,33 @@
 # Insteon Protocol class.  Parses PLM data and writes messages.
 #
 #===========================================================================
-import collections
 import enum
+import heapq
+import itertools
 import time
 import datetime
 from . import log
 from . import message as Msg
+from .Address import Address
+from .AddrSignal import AddrSignal
+from .Scheduler import Scheduler
 from .Signal import Signal
+from .WriteQueue import OutputMsg, Priority, WriteQueue
 #from . import util
 
 LOG = log.get_logger()
 
+# Message code -> (message class, size).  The size is None for messages
+# that have to check the flags to find the size.  Used by the inbound
+# message parser to avoid the per message lookups.
+_FRAME_TYPES = {
+    code : (cls, cls.fixed_msg_size
+            if cls.msg_size.__func__ is Msg.Base.msg_size.__func__ else None)
+    for code, cls in Msg.types.items()}
+
+# Largest message size - enough bytes to find the size of any message.
+_MAX_MSG_SIZE = max(i.fixed_msg_size for i in Msg.types.values())
+
 
 class WriteStatus(enum.Enum):
     """Current status of the output write queue."""
@@ -27,10 +43,6 @@ class WriteStatus(enum.Enum):
     WAIT_FOR_REPLY = 2
 
 
-# Output message and handler stored together.
-OutputMsg = collections.namedtuple('OutputMsg', ['msg', 'handler'])
-
-
 class Protocol:
     """Insteon PLM protocol processing class.
 
@@ -67,7 +79,28 @@ class Protocol:
     3) Device database reading.  Reading remote db's from a device involves
        sending one command, getting an ACK, then reading a series of messages
        (1 per db entry) until we get a final message which ends the sequence.
+
+    Pipelining: normally the next message isn't sent until the write
+    handler is finished.  If max_pipeline is set (it's off by default),
+    handlers which only expect more replies from one device after the PLM
+    ACK (see handler.Base.reply_addr()) are parked while they wait for
+    those replies and the next message is sent.  Replies from a parked
+    address are passed to that handler.  Up to max_pipeline handlers can be
+    parked and a message to a parked address isn't sent until the parked
+    handler finishes.  The next write is delayed until the parked message
+    and the device reply have had time to travel all of their hops so they
+    don't collide with it.  Modem messages (scenes, database commands) are
+    never parked since their replies can't be matched by address.
     """
+    # Maximum number of handlers that can be parked waiting for device
+    # replies.  Zero turns pipelining off.
+    max_pipeline = 0
+
+    # Time in seconds for a standard and extended message to travel one
+    # hop.  See Msg.InpStandard.expire_time.
+    hop_dt = 0.087
+    hop_dt_ext = 0.183
+
     def __init__(self, link):
         """Constructor
 
@@ -82,6 +115,11 @@ class Protocol:
         self._linkPoll = self.link.poll
         self.link.poll = self._poll
 
+        # Same for the poll deadline so the network manager wakes up in time
+        # for timed messages and handler time outs.
+        self._linkNextPollTime = self.link.next_poll_time
+        self.link.next_poll_time = self._next_poll_time
+
         # Connect the link read/write signals to our callback methods.
         link.signal_read.connect(self._data_read)
         link.signal_wrote.connect(self._msg_written)
@@ -94,24 +132,32 @@ class Protocol:
         # been removed from the _write_queue
         self.signal_msg_finished = Signal()  # (Message)
 
+        # Same as the signals above but only for standard and extended
+        # messages and keyed by the address the message is from.  Devices
+        # connect to these with their own address so only the device the
+        # message is from is called.
+        self.signal_addr_received = AddrSignal()  # (Message)
+        self.signal_addr_finished = AddrSignal()  # (Message)
+
         # Inbound message buffer.
         self._buf = bytearray()
 
-        # List of messages to send.  These contain an OutputMsg object which
-        # has the message and handler from oldest to newest.  The handlers
-        # are used to process responses.  We have to wait until the handler
-        # says that it's done receiving replies until we can send the next
-        # message.  If we write to the modem before that, it basically
-        # cancels the previous action.  The _write_status flag indicates what
-        # state the [0] message is in during the write process.  Status of
-        # READY_TO_WRITE indicates we can write to the serial link.  When we
-        # send a message to the serial link, status will change to
-        # PENDING_WRITE.  When the serial link actually sends out the
-        # message, status is changed to WAIT_FOR_REPLY.  When the message
-        # handler says that it's done processing replies, status is changed
-        # back to READY_TO_WRITE and we can write, the [0] object is removed,
-        # can we'll write any other messages in the queue.
-        self._write_queue = []
+        # Queue of messages to send.  These contain an OutputMsg object
+        # which has the message and handler stored in priority lanes (see
+        # WriteQueue).  The handlers are used to process responses.  We have
+        # to wait until the handler says that it's done receiving replies
+        # until we can send the next message.  If we write to the modem
+        # before that, it basically cancels the previous action.  The
+        # _write_status flag indicates what state the current message is in
+        # during the write process.  Status of READY_TO_WRITE indicates we
+        # can write to the serial link.  When we send a message to the serial
+        # link, status will change to PENDING_WRITE.  When the serial link
+        # actually sends out the message, status is changed to
+        # WAIT_FOR_REPLY.  When the message handler says that it's done
+        # processing replies, status is changed back to READY_TO_WRITE and we
+        # can write, the current object is removed, can we'll write any other
+        # messages in the queue.
+        self._write_queue = WriteQueue()
         self._write_status = WriteStatus.READY_TO_WRITE
 
         # Set of possible message handlers to use.  These are handlers that
@@ -119,19 +165,24 @@ class Protocol:
         # # write handler.
         self._read_handlers = []
 
-        # This is a list of prior read messages that are checked against to
+        # This is a set of prior read messages that are checked against to
         # determine if a subsequent message is a duplicate and can be
-        # ignored.  Message are removed when their expired time is exceeded.
+        # ignored.  The message hash ignores the hop counts so a lookup
+        # finds repeated messages.  Message are removed when their expired
+        # time is exceeded using the _read_expire heap of (expire_time,
+        # sequence number, msg) so only the expired messages are touched.
         # Only InpStandard and InpExtended messsages are de-duplicated at
         # this time.
-        self._read_history = []
+        self._read_history = set()
+        self._read_expire = []
+        self._read_seq = itertools.count()
 
-        # List of Msg.Timed objects which store a message and a time at which
-        # to send the message.  It will be sorted by send time.  These are
-        # messages that should be sent after a certain time has passed.  The
-        # _poll() call will this and push them onto the message queue when
-        # the current time is after the message time.
-        self._timed_messages = []
+        # Scheduler of Msg.Timed objects which store a message and a time at
+        # which to send the message.  These are messages that should be sent
+        # after a certain time has passed.  The _poll() call will push them
+        # onto the message queue when the current time is after the message
+        # time.
+        self._timed_messages = Scheduler()
 
         # Next time that a message can be written.  When a message is read,
         # we wait until it's expiration time (which is set by the hop count)
@@ -140,6 +191,13 @@ class Protocol:
         # we try and avoid that.
         self._next_write_time = 0
 
+        # Time the current message was written to the modem and the
+        # exponential moving average of the time between writing a message
+        # and the first reply (usually the PLM ACK) to it.  The average is
+        # None until the first reply is seen.
+        self._write_time = None
+        self._ack_latency = None
+
     #-----------------------------------------------------------------------
     def add_handler(self, handler):
         """Add a universal message handler.
@@ -172,9 +230,14 @@ class Protocol:
         This gets passed to the network link (usually network.Serial object)
         to load any configuration for the modem connection.
 
+        The input configuration dictionary may contain:
+        - max_pipeline (int):  The maximum number of handlers that can be
+          parked waiting for device replies (optional).
+
         Args:
           config (dict): Configuration data to load.
         """
+        self.max_pipeline = config.get('max_pipeline', self.max_pipeline)
         self.link.load_config(config)
 
     #-----------------------------------------------------------------------
@@ -183,7 +246,10 @@ class Protocol:
 
         If there are no other messages in the queue, the message gets written
         immediately.  Otherwise the message is added to the write queue and
-        will be written after other messages are finished.
+        will be written after other messages are finished.  The queue lane
+        is set by the handler priority attribute (see WriteQueue.Priority) so
+        interactive commands are written before queued state refreshes and
+        database messages.
 
         The handler is responsible for reading replies.  Each handler returns
         message.UNKNOWN if it can't process the message, message.CONTINUE if
@@ -199,28 +265,27 @@ class Protocol:
                         write out the msg are passed to this handler until
                         the handler returns the message.FINISHED flags.
           high_priority (bool):  False to add the message at the end of the
-                        queue.  True to insert this message at the start of
-                        the queue.  This is ignored in timed messages.
+                        handler priority lane.  True to insert this message
+                        at the start of the interactive lane.
           after (float):  Unix clock time tag to send the message after. If
                 None, the message is sent as soon as possible.  Exact time is
                 not guaranteed - the message will be send no earlier than this.
         """
-        # If the time is input, append the inputs to the timer list and sort
-        # the list by the times field.
+        # If the time is input, schedule the message to be sent later.
         if after is not None:
             timed = Msg.Timed(msg, msg_handler, high_priority, after)
-            self._timed_messages.append(timed)
-            self._timed_messages.sort(key=lambda i: i.time)
+            self._timed_messages.add(after, self._send_timed, timed)
             return
 
         # Normal message queue.
         output = OutputMsg(msg, msg_handler)
         if not high_priority:
-            self._write_queue.append(output)
+            priority = getattr(msg_handler, "priority", Priority.INTERACTIVE)
+            self._write_queue.push(output, priority)
 
         # High priority messages insert at the front of the queue.
         else:
-            self._write_queue.insert(0, output)
+            self._write_queue.push(output, Priority.INTERACTIVE, front=True)
 
         # If there are no existing messages that we're waiting to send or
         # processing replies for, send the message immediately.
@@ -265,11 +330,33 @@ class Protocol:
         Args:
           addr (Address): The address to search for.
         """
-        for out in self._write_queue:
-            if isinstance(out.msg, (Msg.OutExtended, Msg.OutStandard)):
-                if out.msg.to_addr == addr:
-                    return True
-        return False
+        return self._write_queue.has_addr(addr)
+
+    #-----------------------------------------------------------------------
+    def num_waiting(self, priority):
+        """Return the number of messages waiting to be sent.
+
+        Args:
+          priority (Priority):  The write queue lane to check.
+
+        Returns:
+          int:  The number of messages in the lane.  The message that is
+          currently being processed isn't included.
+        """
+        return self._write_queue.num_waiting(priority)
+
+    #-----------------------------------------------------------------------
+    def get_ack_latency(self):
+        """Return the average time for the modem to reply to a message.
+
+        This is measured from when the message is written to the link to
+        when the write handler sees the first reply to it.
+
+        Returns:
+          float:  The average reply time in seconds or None if no replies
+          have been seen yet.
+        """
+        return self._ack_latency
 
     #-----------------------------------------------------------------------
     def _poll(self, t):
@@ -285,19 +372,56 @@ class Protocol:
         # Call the link poll function in case it needs to do something.
         self._linkPoll(t)
 
-        # See if any timed messages should sent.
-        while self._timed_messages and self._timed_messages[0].is_active(t):
-            timed = self._timed_messages.pop(0)
-            LOG.info("Moving timer based message to queue: %s", timed.msg)
-            timed.send(self)
+        # Send any timed messages that are due.
+        self._timed_messages.run_due()
 
         # If we're waiting for a reply, ask the write handler if it's past
         # the time out in which case we'll mark this message as finished and
         # move on.
         if (self._write_status == WriteStatus.WAIT_FOR_REPLY and
-                self._write_queue[0].handler.is_expired(self, t)):
+                self._write_queue.current.handler.is_expired(self, t)):
             self._write_finished()
 
+        # Same for the parked handlers.
+        if self._write_queue.parked:
+            for addr_id, out in list(self._write_queue.parked.items()):
+                if out.handler.is_expired(self, t):
+                    self._parked_finished(Address(addr_id))
+
+    #-----------------------------------------------------------------------
+    def _send_timed(self, timed):
+        """Send a timed message once its time has been reached.
+
+        Args:
+          timed (Msg.Timed):  The timed message to send.
+        """
+        LOG.info("Moving timer based message to queue: %s", timed.msg)
+        timed.send(self)
+
+    #-----------------------------------------------------------------------
+    def _next_poll_time(self):
+        """Return the next time that _poll() needs to be called.
+
+        This replaces the link next_poll_time() method so the network manager
+        knows about the timed messages and the write handler time out.
+
+        Returns:
+           float:  The earliest Unix clock time tag that processing is needed
+           or None if nothing is scheduled.
+        """
+        times = [self._linkNextPollTime()]
+
+        times.append(self._timed_messages.next_time())
+
+        if self._write_status == WriteStatus.WAIT_FOR_REPLY:
+            times.append(self._write_queue.current.handler.get_expire_time())
+
+        for out in self._write_queue.parked.values():
+            times.append(out.handler.get_expire_time())
+
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+
     #-----------------------------------------------------------------------
     def _data_read(self, link, data):
         """PLM modem data read callback.
@@ -313,76 +437,89 @@ class Protocol:
         # Append the read data to the inbound message buffer.
         self._buf.extend(data)
 
-        # Keep processing until there are no more messages to handle.  There
-        # must be at least 2 bytes so we can read the message type code.
-        while len(self._buf) > 1:
-            #LOG.debug("Searching message (len %d): %s... ",
-            #               len(self._buf), util.to_hex(self._buf,20))
-
-            # Look for PLM slow down messages
-            start = self._buf.find(0x15)
-            if start == 0:
-                LOG.info("PLM is busy, pausing briefly")
-                self.set_wait_time(time.time() + .3)
-                self._buf = self._buf[1:]
-                continue
-
-            # Find a message start token.  Note that this token could also
-            # appear in the middle of a message so we can't be totally sure
-            # it's a message until we try to parse it.  If there is no
-            # starting token - we're probably reading at the start in the
-            # middle of a message so just clear it and wait until we get a
-            # start token.
-            start = self._buf.find(0x02)
-            if start == -1:
-                LOG.debug("No 0x02 starting byte found - clearing")
-                self._buf = bytearray()
-                break
-
-            # Move the buffer to the start token.  Make sure we still have at
-            # least 2 bytes or wait for more to arrive.
-            if start != 0:
-                LOG.debug("0x02 found at byte %d - shifting", start)
-                self._buf = self._buf[start:]
-                if len(self._buf) < 2:
+        # Parse the buffer using a read position so the buffer isn't copied
+        # for every message or skipped byte.  The parsed bytes are removed
+        # once at the end.
+        buf = self._buf
+        pos = 0
+        try:
+            # Keep processing until there are no more messages to handle.
+            # There must be at least 2 bytes so we can read the message type
+            # code.
+            while len(buf) - pos > 1:
+                # Look for PLM slow down messages
+                if buf[pos] == 0x15:
+                    LOG.info("PLM is busy, pausing briefly")
+                    self.set_wait_time(time.time() + .3)
+                    pos += 1
+                    continue
+
+                # Find a message start token.  Note that this token could
+                # also appear in the middle of a message so we can't be
+                # totally sure it's a message until we try to parse it.  If
+                # there is no starting token - we're probably reading at the
+                # start in the middle of a message so just clear it and wait
+                # until we get a start token.
+                start = buf.find(0x02, pos)
+                if start == -1:
+                    LOG.debug("No 0x02 starting byte found - clearing")
+                    pos = len(buf)
                     break
 
-            # Messages are [0x02,TYPE] so find map the type code to the
-            # message class we need to use to read it.
-            msg_type = self._buf[1]
-            msg_class = Msg.types.get(msg_type, None)
-            if not msg_class:
-                LOG.info("Skipping unknown message type %#04x", msg_type)
-                # Only dropping the first byte (0x02), as the second byte could
-                # be 0x02. Let the find function to locate the next 0x02
-                self._buf = self._buf[1:]
-                continue
-
-            # See if we have enough bytes to read the message.  If not, wait
-            # until more data is read.
-            msg_size = msg_class.msg_size(self._buf)
-            if len(self._buf) < msg_size:
-                break
-
-            # Read the message and move the buffer forward.
-            try:
-                msg = msg_class.from_bytes(self._buf)
-            except:
-                LOG.exception("Unknown message bytes sequence")
-                # Skip the initial 0x02 - this way if we got a weird message
-                # with a 0x02 in the message, we won't miss an actual message
-                # by moving msg_size bytes forward which could be wrong.
-                self._buf = self._buf[1:]
-                continue
-
-            self._buf = self._buf[msg_size:]
-            LOG.info("Read %#04x: %s", msg_type, msg)
-
-            if self._is_duplicate(msg):
-                LOG.info("Ignored duplicate %s", msg)
-            else:
-                # And try to process the message using the handlers.
-                self._process_msg(msg)
+                # Move the read position to the start token.  Make sure we
+                # still have at least 2 bytes or wait for more to arrive.
+                if start != pos:
+                    LOG.debug("0x02 found at byte %d - shifting", start - pos)
+                    pos = start
+                    if len(buf) - pos < 2:
+                        break
+
+                # Messages are [0x02,TYPE] so find map the type code to the
+                # message class we need to use to read it.
+                msg_type = buf[pos + 1]
+                frame = _FRAME_TYPES.get(msg_type, None)
+                if not frame:
+                    LOG.info("Skipping unknown message type %#04x", msg_type)
+                    # Only dropping the first byte (0x02), as the second byte
+                    # could be 0x02. Let the find function to locate the next
+                    # 0x02
+                    pos += 1
+                    continue
+
+                # See if we have enough bytes to read the message.  If not,
+                # wait until more data is read.
+                msg_class, msg_size = frame
+                if msg_size is None:
+                    msg_size = msg_class.msg_size(
+                        buf[pos:pos + _MAX_MSG_SIZE])
+                if len(buf) - pos < msg_size:
+                    break
+
+                # Read the message and move the read position forward.
+                try:
+                    msg = msg_class.from_bytes(bytes(buf[pos:pos + msg_size]))
+                except:
+                    LOG.exception("Unknown message bytes sequence")
+                    # Skip the initial 0x02 - this way if we got a weird
+                    # message with a 0x02 in the message, we won't miss an
+                    # actual message by moving msg_size bytes forward which
+                    # could be wrong.
+                    pos += 1
+                    continue
+
+                pos += msg_size
+                LOG.info("Read %#04x: %s", msg_type, msg)
+
+                if self._is_duplicate(msg):
+                    LOG.info("Ignored duplicate %s", msg)
+                else:
+                    # And try to process the message using the handlers.
+                    self._process_msg(msg)
+
+        # Remove the bytes that were used, even if a handler failed, so they
+        # aren't processed again.
+        finally:
+            del buf[:pos]
 
     #-----------------------------------------------------------------------
     def _is_duplicate(self, msg):
@@ -416,9 +553,20 @@ class Protocol:
         if msg in self._read_history:
             return True
         else:
-            self._read_history.append(msg)
+            self._add_read(msg)
             return False
 
+    #-----------------------------------------------------------------------
+    def _add_read(self, msg):
+        """Adds a message to the input message history.
+
+        Args:
+          msg:   InpStandard or InpExtended message to add.
+        """
+        self._read_history.add(msg)
+        heapq.heappush(self._read_expire,
+                       (msg.expire_time, next(self._read_seq), msg))
+
     #-----------------------------------------------------------------------
     def _remove_expired_read(self, t):
         """Removes old messages from the input message history.
@@ -428,17 +576,12 @@ class Protocol:
         Args:
           t (float): The current time.
         """
-        expired_idx = []
-
-        # Find all the messages where the current time is after the message
-        # expiration time.
-        for i, msg in enumerate(self._read_history):
-            if t > msg.expire_time:
-                expired_idx.append(i)
-
-        # Remove them in reverse order so that the list indices remain valid.
-        for i in reversed(expired_idx):
-            del self._read_history[i]
+        # Pop all the messages where the current time is after the message
+        # expiration time.  Duplicates are never added to the history so
+        # the message in the set is the one being removed.
+        while self._read_expire and t > self._read_expire[0][0]:
+            msg = heapq.heappop(self._read_expire)[2]
+            self._read_history.discard(msg)
 
     #-----------------------------------------------------------------------
     def _process_msg(self, msg):
@@ -454,15 +597,21 @@ class Protocol:
         # Send the general message received notification.
         self.signal_received.emit(msg)
 
+        is_device_msg = isinstance(msg, (Msg.InpStandard, Msg.InpExtended))
+        if is_device_msg:
+            self.signal_addr_received.emit(msg.from_addr, msg)
+
         # If we have a write handler, then most likely the inbound message is
         # a reply to the write so see if it can handle the message.  If the
         # status is FINISHED, then the handler has seen all the messages it
         # expects. If it's CONTINUE, it processed the message but expects
         # more.  If it's UNKNOWN, the handler ignored that message.
-        if self._write_queue:
-            handler = self._write_queue[0].handler
+        if self._write_queue.current is not None:
+            handler = self._write_queue.current.handler
             LOG.debug("Passing msg to write handler: %s", handler)
             status = handler.msg_received(self, msg)
+            if status != Msg.UNKNOWN:
+                self._update_ack_latency()
 
             # Handler is finished.  Send the next outgoing message if one is
             # waiting.
@@ -471,6 +620,8 @@ class Protocol:
                 self._write_finished()
                 # Notify any listeners that msg FINISHED
                 self.signal_msg_finished.emit(msg)
+                if is_device_msg:
+                    self.signal_addr_finished.emit(msg.from_addr, msg)
                 return
 
             # If this message was understood by the write handler, don't look
@@ -478,10 +629,27 @@ class Protocol:
             # into the future.
             elif status == Msg.CONTINUE:
                 handler.update_expire_time()
+                self._park_current()
                 return
 
             assert status == Msg.UNKNOWN
 
+        # Replies from a device w/ a parked handler go to that handler.
+        if is_device_msg and self._write_queue.parked:
+            out = self._write_queue.parked.get(msg.from_addr.id)
+            if out is not None:
+                status = out.handler.msg_received(self, msg)
+                if status == Msg.FINISHED:
+                    LOG.debug("Parked write handler finished")
+                    self._parked_finished(msg.from_addr)
+                    self.signal_msg_finished.emit(msg)
+                    self.signal_addr_finished.emit(msg.from_addr, msg)
+                    return
+
+                elif status == Msg.CONTINUE:
+                    out.handler.update_expire_time()
+                    return
+
         # No write handler or the message didn't match what the handler
         # expects to see.  Try the regular read handler to see if they
         # understand the message.
@@ -509,12 +677,59 @@ class Protocol:
         The write handler is cleared and the next message in the queue is
         written.  It can also be called if the handler times out.
         """
-        assert self._write_queue
+        assert self._write_queue.current
 
-        self._write_queue.pop(0)
+        self._write_queue.finish()
         self._write_status = WriteStatus.READY_TO_WRITE
 
-        if self._write_queue:
+        if self._write_queue.has_next():
+            self._send_next_msg()
+
+    #-----------------------------------------------------------------------
+    def _park_current(self):
+        """Park the current write handler if it can be pipelined.
+
+        The handler is parked if pipelining is on, the only replies it
+        still expects come from one device, and there are more messages to
+        send.  The next message is then sent once the current message and
+        the device reply have had time to travel.
+        """
+        queue = self._write_queue
+        if len(queue.parked) >= self.max_pipeline or not queue.has_next():
+            return
+
+        out = queue.current
+        addr = out.handler.reply_addr()
+        if addr is None or addr.id in queue.parked:
+            return
+
+        LOG.debug("Parking write handler for %s", addr)
+        queue.park(addr)
+        self._write_status = WriteStatus.READY_TO_WRITE
+        self._write_time = None
+
+        # Don't write until the message and the reply have had time to
+        # travel all of the hops.
+        hop_dt = self.hop_dt_ext if isinstance(out.msg, Msg.OutExtended) \
+                 else self.hop_dt
+        self.set_wait_time(time.time() +
+                           2 * (out.msg.flags.max_hops + 1) * hop_dt)
+
+        self._send_next_msg()
+
+    #-----------------------------------------------------------------------
+    def _parked_finished(self, addr):
+        """Parked message finished.
+
+        This is called when a parked handler is finished or times out.  If
+        the next message was waiting for the address, it's sent now.
+
+        Args:
+          addr (Address):  The address the handler was parked with.
+        """
+        self._write_queue.finish_parked(addr)
+        if (self._write_status == WriteStatus.READY_TO_WRITE and
+                self._write_queue.has_next()):
             self._send_next_msg()
 
     #-----------------------------------------------------------------------
@@ -529,17 +744,35 @@ class Protocol:
                communicate with the PLM modem.
           data (bytes): The data that was written to the link.
         """
-        assert self._write_queue
+        assert self._write_queue.current
         assert self._write_status == WriteStatus.PENDING_WRITE
 
-        # Set the status to show that the [0] message in the queue was
+        # Set the status to show that the current message in the queue was
         # written out.
         self._write_status = WriteStatus.WAIT_FOR_REPLY
 
-        # Tell the handler that we've sent the message to update the current
-        # time out time.
-        out = self._write_queue[0]
+        # Tell the handler that we've sent the message (and how slow the
+        # link is) to update the current time out time.
+        out = self._write_queue.current
+        out.handler.set_transport_latency(self.link.transport_latency())
         out.handler.sending_message(out.msg)
+        self._write_time = time.time()
+
+    #-----------------------------------------------------------------------
+    def _update_ack_latency(self):
+        """Update the average reply time with the current message.
+
+        Only the first reply to each written message is used.
+        """
+        if self._write_time is None:
+            return
+
+        dt = time.time() - self._write_time
+        self._write_time = None
+        if self._ack_latency is None:
+            self._ack_latency = dt
+        else:
+            self._ack_latency += 0.2 * (dt - self._ack_latency)
 
     #-----------------------------------------------------------------------
     def _send_next_msg(self):
@@ -548,8 +781,13 @@ class Protocol:
         This grabs the first message in the queue and sets it into the
         write_data field for later processing of replies.
         """
-        # Get the next output message and handler from the write queue.
-        out = self._write_queue[0]
+        # Get the next output message and handler from the write queue.  If
+        # the message is to an address with a parked handler, it's sent
+        # when that handler finishes.
+        out = self._write_queue.pop_next()
+        if out is None:
+            return
+
         msg_bytes = out.msg.to_bytes()
 
         LOG.info("Write message to modem: %s", out.msg)
@@ -560,5 +798,6 @@ class Protocol:
         # the link.
         self.link.write(msg_bytes, self.get_next_write_time)
         self._write_status = WriteStatus.PENDING_WRITE
+        self._write_time = None
 
     #-----------------------------------------------------------------------
@@ -115,86 +115,72 @@ class SceneManager:
                 # 3 Append only new responder
                 scene.append_responder(new_responder)
 
+    #-----------------------------------------------------------------------
+    def compress(self):
+        """Compress Scenes Down into a Human Readable Form
+
+        Runs compress_responders, compress_controllers, and compress_n_way
+        until none of them can merge any more scenes.  Merging scenes in one
+        of them can make new merges possible in the others so a single pass
+        of each may not fully compress the scenes.
+
+        Returns:
+          (int): The number of scenes that were merged into other scenes.
+        """
+        total = 0
+        while True:
+            num = (self.compress_responders() + self.compress_controllers() +
+                   self.compress_n_way())
+            if num == 0:
+                return total
+            total += num
+
     #-----------------------------------------------------------------------
     def compress_controllers(self):
         """Compress Scenes Down into a Human Readable Form by Controllers
 
         Attempts to make things more readable to humans, by compressing
         scene defintions.  Any two definitions that have identical
-        controllers are merged.
+        responders are merged.
 
         This is a companion to compress_responders and compress_n_way.  These
         are seperate functions so that they can be called seperately using
-        Stacks.
-
-        This function only processes the scenes in a single pass.  If it runs
-        multiple passes, it may further compress things.  However, this
-        function is a bit time consuming, so can't keep looping through it.
-
-        """
-        i = 0
-        while i < len(self.entries):
-            found = False
-            test_scene = self.entries[i]
-            # Anything less than or equal to ourselves has already been tested
-            j = i + 1
-            while j < len(self.entries):
-                scene = self.entries[j]
-                j += 1
-                # Merge controllers that have identical responders
-                if Counter(test_scene.responders) == Counter(scene.responders):
-                    for new_controller in test_scene.controllers:
-                        scene.append_controller(new_controller)
-                    if test_scene.name is not None:
-                        scene.name = test_scene.name
-                    self.del_scene(test_scene)
-                    found = True
-                    break
-            if found is not True:
-                # if we found something we deleted the current entry so check
-                # this position again.
-                i += 1
+        Stacks.  Use compress to run all of them until nothing changes.
+
+        Scenes are grouped by their responders using a dict so this is
+        linear in the number of scenes.  Merging only changes the
+        controllers so after one pass no more scenes can be merged.
+
+        Returns:
+          (int): The number of scenes that were merged into other scenes.
+        """
+        return self._merge_scenes(
+            lambda scene: self._multiset_key(scene.responders),
+            controllers=True, responders=False)
 
     #-----------------------------------------------------------------------
     def compress_responders(self):
         """Compress Scenes Down into a Human Readable Form by Responders
 
         Attempts to make things more readable to humans, by compressing scene
-        defintions.  Any two definitions that have identical responders are
+        defintions.  Any two definitions that have identical controllers are
         merged.
 
         This is a companion to compress_controllers and compress_n_way.
         These are seperate functions so that they can be called seperately
-        using Stacks.
-
-        This function only processes the scenes in a single pass.  If it runs
-        multiple passes, it may further compress things.  However, this
-        function is a bit time consuming, so can't keep looping through it.
-
-        """
-        i = 0
-        while i < len(self.entries):
-            found = False
-            test_scene = self.entries[i]
-            # Anything less than or equal to ourselves has already been tested
-            j = i + 1
-            while j < len(self.entries):
-                scene = self.entries[j]
-                j += 1
-                # Merge responders that have identical controllers
-                test_ctrls = test_scene.controllers
-                if Counter(test_ctrls) == Counter(scene.controllers):
-                    for new_responder in test_scene.responders:
-                        scene.append_responder(new_responder)
-                    if test_scene.name is not None:
-                        scene.name = test_scene.name
-                    self.del_scene(test_scene)
-                    found = True
-                    break
-            if found is not True:
-                # if we found something we deleted the current entry so check
-                # this position again.
-                i += 1
+        using Stacks.  Use compress to run all of them until nothing
+        changes.
+
+        Scenes are grouped by their controllers using a dict so this is
+        linear in the number of scenes.  Merging only changes the
+        responders so after one pass no more scenes can be merged.
+
+        Returns:
+          (int): The number of scenes that were merged into other scenes.
+        """
+        return self._merge_scenes(
+            lambda scene: self._multiset_key(scene.controllers),
+            controllers=False, responders=True)
 
     #-----------------------------------------------------------------------
     def compress_n_way(self):
@@ -202,69 +188,90 @@ class SceneManager:
 
         Attempts to make things more readable to humans, by compressing scene
         defintions.  3-way or N-way links are compressed into a single
-        definition..
+        definition.  Two scenes are N-way compatible if all of the devices
+        (ctrl & resp) appear on both sides.
 
         This is a companion to compress_responders and compress_controllers.
         These are seperate functions so that they can be called seperately
-        using Stacks.
-
-        This function only processes the scenes in a single pass.  If it runs
-        multiple passes, it may further compress things.  However, this
-        function is a bit time consuming, so can't keep looping through it.
-
-        """
-        i = 0
-        while i < len(self.entries):
-            found = False
-            test_scene = self.entries[i]
-            # Anything less than or equal to ourselves has already been tested
-            j = i + 1
-            while j < len(self.entries):
-                scene = self.entries[j]
-                j += 1
-                # Merge n-way switches
-                if self._can_merge_n_way(test_scene, scene):
-                    for new_controller in test_scene.controllers:
-                        scene.append_controller(new_controller)
-                    for new_responder in test_scene.responders:
-                        scene.append_responder(new_responder)
-                    if test_scene.name is not None:
-                        scene.name = test_scene.name
-                    self.del_scene(test_scene)
-                    found = True
-                    break
-            if found is not True:
-                # if we found something we deleted the current entry so check
-                # this position again.
-                i += 1
+        using Stacks.  Use compress to run all of them until nothing
+        changes.
+
+        Scenes are grouped by the set of their device addresses and groups
+        using a dict so this is linear in the number of scenes.  Merging
+        doesn't change that set so after one pass no more scenes can be
+        merged.
+
+        Returns:
+          (int): The number of scenes that were merged into other scenes.
+        """
+        def key(scene):
+            return frozenset((device.addr, device.group) for device in
+                             scene.controllers + scene.responders)
+
+        return self._merge_scenes(key, controllers=True, responders=True)
 
     #-----------------------------------------------------------------------
-    def _can_merge_n_way(self, lhs, rhs):
-        """Determines Whether two Scenes Can be Merged as N-Way Scenes
+    def _merge_scenes(self, key, controllers, responders):
+        """Merges Scenes that Have the Same Key
+
+        All of the scenes with the same key are merged into the last one of
+        them.  This gives the same result as merging each scene into the next
+        one with the same key in order: the devices of later scenes are
+        first and the name is taken from the first scene that has one.
 
-        The test is whether all of the devices (ctrl & resp) appear on both
-        the left and right side
+        Args:
+          key (function):  Returns the hashable key for a SceneEntry.
+          controllers (bool):  If True, the controllers are merged.
+          responders (bool):  If True, the responders are merged.
 
         Returns:
-          True if they are N-way compatible, False otherwise
-        """
-        for controller in lhs.controllers:
-            if (rhs.find_controller(controller) is None and
-                    rhs.find_responder(controller) is None):
-                return False
-        for responder in lhs.responders:
-            if (rhs.find_controller(responder) is None and
-                    rhs.find_responder(responder) is None):
-                return False
-        for controller in rhs.controllers:
-            if (lhs.find_controller(controller) is None and
-                    lhs.find_responder(controller) is None):
-                return False
-        for responder in rhs.responders:
-            if (lhs.find_controller(responder) is None and
-                    lhs.find_responder(responder) is None):
-                return False
-        return True
+          (int): The number of scenes that were merged into other scenes.
+        """
+        groups = {}
+        for scene in self.entries:
+            groups.setdefault(key(scene), []).append(scene)
+
+        merged = set()
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+
+            target = group[-1]
+            for scene in reversed(group[:-1]):
+                if controllers:
+                    for new_controller in scene.controllers:
+                        target.append_controller(new_controller)
+                if responders:
+                    for new_responder in scene.responders:
+                        target.append_responder(new_responder)
+
+            names = [i.name for i in group[:-1] if i.name is not None]
+            if names:
+                target.name = names[0]
+
+            merged.update(group[:-1])
+
+        self.del_scenes(merged)
+        return len(merged)
+
+    #-----------------------------------------------------------------------
+    @staticmethod
+    def _multiset_key(devices):
+        """Returns a Hashable Key for a List of SceneDevices
+
+        Two lists have the same key if they have the same devices in any
+        order using the SceneDevice strong comparison (address, group, and
+        data1-3).  Duplicate devices are counted.
+
+        Args:
+          devices (list[SceneDevice]): The devices.
+
+        Returns:
+          (frozenset): The key.
+        """
+        keys = Counter((device.addr, device.group, tuple(device.link_data))
+                       for device in devices)
+        return frozenset(keys.items())
 
     #-----------------------------------------------------------------------
     def _load(self):
@@ -442,6 +449,27 @@ class SceneManager:
             del self.data[scene.index]
             del self.entries[scene.index]
 
+    #-----------------------------------------------------------------------
+    def del_scenes(self, scenes):
+        """Deletes Multiple SceneEntries from the SceneManager
+
+        This is the same as calling del_scene for each scene but it only
+        searches the scene list once.  Changes will only be saved to disk on
+        a call to self.save()
+
+        Args:
+          scenes:    (set[SceneEntry]) The scenes to be deleted
+        """
+        if not scenes:
+            return
+
+        # Delete from the end so the indexes of the remaining scenes don't
+        # change.
+        for i in reversed(range(len(self.entries))):
+            if self.entries[i] in scenes:
+                del self.data[i]
+                del self.entries[i]
+
 #===========================================================================
 
 
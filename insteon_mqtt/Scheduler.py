@@ -0,0 +1,194 @@
+#===========================================================================
+#
+# Heap based scheduler for timed function calls.
+#
+#===========================================================================
+import heapq
+import itertools
+import time
+from . import log
+
+LOG = log.get_logger()
+
+
+class Scheduler:
+    """Heap based scheduler for function calls at specific times.
+
+    This is used by network.TimedCall and the Protocol timed messages to
+    run functions at or after a requested time.  Calls are stored in a heap
+    so adding a call is O(log n) and finding the next call is O(1).
+    Cancelling a call just marks the returned ScheduledCall handle so it's
+    O(1) as well - cancelled calls are discarded when they reach the top of
+    the heap.
+
+    Times are input as Unix clock time tags (time.time()) to match the rest
+    of the code but they are stored internally using time.monotonic() so
+    wall clock changes (NTP updates, DST, etc) don't change when a call
+    runs.
+    """
+    def __init__(self):
+        """Constructor
+        """
+        # Heap of (monotonic time, sequence number, ScheduledCall).  The
+        # sequence number keeps calls w/ the same time in the order they
+        # were added and means the calls themselves are never compared.
+        self._heap = []
+        self._seq = itertools.count()
+
+        # Number of calls in the heap that have been cancelled.
+        self._num_cancelled = 0
+
+        # Offset from the monotonic clock to the Unix clock.  This is only
+        # updated when the wall clock has moved so calls added for the same
+        # Unix time get the same monotonic time.
+        self._offset = time.time() - time.monotonic()
+
+    #-----------------------------------------------------------------------
+    def __len__(self):
+        """Return the number of active calls waiting to run.
+        """
+        return len(self._heap) - self._num_cancelled
+
+    #-----------------------------------------------------------------------
+    def add(self, when, func, *args, **kwargs):
+        """Schedule a function call.
+
+        Args:
+          when (float):  The Unix clock time tag at which the call should
+               run.
+          func (function): The function to run
+          args & kwargs: Passed to the function when run.
+
+        Returns:
+          ScheduledCall:  The handle for the call which can be passed to
+          cancel().
+        """
+        offset = time.time() - time.monotonic()
+        if abs(offset - self._offset) > 1e-3:
+            self._offset = offset
+
+        mono = when - self._offset
+        call = ScheduledCall(mono, func, args, kwargs)
+        heapq.heappush(self._heap, (mono, next(self._seq), call))
+        return call
+
+    #-----------------------------------------------------------------------
+    def cancel(self, call):
+        """Cancel a scheduled call.
+
+        Args:
+          call (ScheduledCall):  The call handle returned by add().
+
+        Returns:
+          bool:  True if the call was waiting and is now cancelled, False if
+          it already ran or was already cancelled.
+        """
+        if call.done:
+            return False
+
+        call.done = True
+        self._num_cancelled += 1
+
+        # Rebuild the heap if it's mostly cancelled calls so they don't
+        # accumulate forever.
+        if self._num_cancelled > 32 and \
+           self._num_cancelled > len(self._heap) // 2:
+            self._heap = [i for i in self._heap if not i[2].done]
+            heapq.heapify(self._heap)
+            self._num_cancelled = 0
+
+        return True
+
+    #-----------------------------------------------------------------------
+    def next_time(self):
+        """Return the time of the next call.
+
+        Returns:
+          float:  The Unix clock time tag of the earliest call or None if
+          there are no calls waiting.
+        """
+        self._drop_cancelled()
+        if not self._heap:
+            return None
+
+        return self._heap[0][2].time
+
+    #-----------------------------------------------------------------------
+    def pop_due(self):
+        """Remove and return all of the calls that are due to run.
+
+        Returns:
+          [ScheduledCall]:  The calls which are due in time order.  These
+          are marked as done so they can't be cancelled.
+        """
+        now = time.monotonic()
+        due = []
+        while True:
+            self._drop_cancelled()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+
+            call = heapq.heappop(self._heap)[2]
+            call.done = True
+            due.append(call)
+
+    #-----------------------------------------------------------------------
+    def run_due(self):
+        """Run all of the calls that are due.
+
+        Exceptions from the calls are logged and don't stop the other calls
+        from running.
+
+        Returns:
+          int:  The number of calls that were run.
+        """
+        due = self.pop_due()
+        for call in due:
+            try:
+                call.func(*call.args, **call.kwargs)
+            except:
+                LOG.exception("Error running scheduled function %s",
+                              call.func)
+
+        return len(due)
+
+    #-----------------------------------------------------------------------
+    def _drop_cancelled(self):
+        """Remove cancelled calls from the top of the heap.
+        """
+        while self._heap and self._heap[0][2].done:
+            heapq.heappop(self._heap)
+            self._num_cancelled -= 1
+
+
+#===========================================================================
+class ScheduledCall:
+    """Handle for a function call stored in the Scheduler.
+    """
+    __slots__ = ["mono", "func", "args", "kwargs", "done"]
+
+    def __init__(self, mono, func, args, kwargs):
+        """Constructor
+
+        Args:
+          mono (float):  The time.monotonic() time to run the call.
+          func (function): The function to run
+          args (tuple): The positional arguments to pass.
+          kwargs (dict): The keyword arguments to pass.
+        """
+        self.mono = mono
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+        # True once the call has run or been cancelled.
+        self.done = False
+
+    #-----------------------------------------------------------------------
+    @property
+    def time(self):
+        """The Unix clock time tag that the call will run at.
+        """
+        return time.time() + (self.mono - time.monotonic())
+
+#===========================================================================
@@ -0,0 +1,171 @@
+#===========================================================================
+#
+# Command sequence base class
+#
+#===========================================================================
+import datetime
+import time
+from . import log
+from . import util
+
+LOG = log.get_logger()
+
+
+class SeqBase:
+    """Base class for sequences of commands.
+
+    This has the pause, resume, cancel, and progress report handling which
+    is shared by CommandSeq and BulkSeq.  Derived classes implement the
+    hooks that start the next commands and clear the remaining commands.
+    """
+    # Minimum time in seconds between progress reports.
+    progress_dt = 10
+
+    # Name of the items in the sequence used in the log messages.
+    item_name = "commands"
+
+    # Total number of commands in the sequence.
+    total = 0
+
+    #-----------------------------------------------------------------------
+    def __init__(self, msg=None, on_done=None, name="", progress=False):
+        """Constructor
+
+        Args:
+          msg (str): String message to pass to on_done if the sequence works.
+          on_done: The callback to run when the sequence is complete.
+          name (str): A short name used in logging to identify this sequence
+          progress (bool): True to report the progress and estimated time
+                   remaining using LOG.ui().
+        """
+        self._on_done = util.make_callback(on_done)
+        self.msg = msg
+        self.name = name
+        self.progress = progress
+
+        # True while the derived class loop which starts commands is
+        # running.
+        self._running = False
+
+        self._paused = False
+        self._cancelled = False
+        self._done = False
+
+        # Start time and last progress report time.
+        self._t0 = None
+        self._last_report = None
+
+    #-----------------------------------------------------------------------
+    @property
+    def is_done(self):
+        """True if the sequence has finished or been cancelled.
+        """
+        return self._done
+
+    #-----------------------------------------------------------------------
+    @property
+    def is_paused(self):
+        """True if the sequence is paused.
+        """
+        return self._paused
+
+    #-----------------------------------------------------------------------
+    def pause(self):
+        """Pause the sequence.
+
+        The running commands will finish but no new commands are started
+        until resume() is called.
+        """
+        if not self._done and not self._paused:
+            LOG.ui("%s paused with %d of %d %s left", self.name,
+                   self._num_left(), self.total, self.item_name)
+            self._paused = True
+            self._on_pause()
+
+    #-----------------------------------------------------------------------
+    def resume(self):
+        """Resume a paused sequence.
+        """
+        if not self._paused:
+            return
+
+        LOG.ui("%s resumed", self.name)
+        self._paused = False
+        self._on_resume()
+
+    #-----------------------------------------------------------------------
+    def cancel(self):
+        """Cancel the sequence.
+
+        The commands that haven't started are removed.  The on_done callback
+        is called with a failure once the running commands (if any) finish.
+        """
+        if self._done:
+            return
+
+        LOG.ui("%s cancelled with %d of %d %s left", self.name,
+               self._num_left(), self.total, self.item_name)
+        self._cancelled = True
+        self._paused = False
+        self._on_cancel()
+
+    #-----------------------------------------------------------------------
+    def _start_clock(self):
+        """Set the start time used for the progress reports.
+        """
+        self._t0 = self._last_report = time.time()
+
+    #-----------------------------------------------------------------------
+    def _report(self, num):
+        """Report the sequence progress.
+
+        Args:
+          num (int):  The number of commands that have finished.
+        """
+        if not self.progress or self._t0 is None:
+            return
+        if not num or num >= self.total:
+            return
+
+        t = time.time()
+        if t - self._last_report < self.progress_dt:
+            return
+
+        self._last_report = t
+        remaining = (t - self._t0) / num * (self.total - num)
+        LOG.ui("%s: %d of %d done (%d%%), about %s remaining", self.name,
+               num, self.total, 100 * num // self.total,
+               datetime.timedelta(seconds=int(remaining)))
+
+    #-----------------------------------------------------------------------
+    def _num_left(self):
+        """Return the number of commands that haven't started.
+        """
+        raise NotImplementedError("%s._num_left() not implemented" %
+                                  self.__class__)  # pragma: no cover
+
+    #-----------------------------------------------------------------------
+    def _on_pause(self):
+        """Called after the sequence has been paused.
+        """
+        pass
+
+    #-----------------------------------------------------------------------
+    def _on_resume(self):
+        """Called after the sequence has been resumed to start the next
+        commands.
+        """
+        raise NotImplementedError("%s._on_resume() not implemented" %
+                                  self.__class__)  # pragma: no cover
+
+    #-----------------------------------------------------------------------
+    def _on_cancel(self):
+        """Called after the sequence has been cancelled.
+
+        This must remove the commands that haven't started and finish the
+        sequence if no commands are running.
+        """
+        raise NotImplementedError("%s._on_cancel() not implemented" %
+                                  self.__class__)  # pragma: no cover
+
+    #-----------------------------------------------------------------------
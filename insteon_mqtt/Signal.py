@@ -24,8 +24,12 @@ class Signal:
     def __init__(self):
         """Constructor
         """
-        # Weak references to functions or methods
-        self.slots = []
+        # Weak references to functions or methods in the order they were
+        # connected.  This tuple is replaced (never changed in place) when a
+        # slot is connected or disconnected so emit() can loop over it
+        # directly even if a slot disconnects itself in the middle of the
+        # loop.
+        self.slots = ()
 
     #-----------------------------------------------------------------------
     def emit(self, *args, **kwargs):
@@ -38,15 +42,12 @@ class Signal:
            args:  List of positional arguments to pass.
            kwargs:  Dictionary of the keyword arguments to pass.
         """
-        # Loop in reverse order over the slots.  That way we can delete any
-        # weak references that no longer exist and support a slot that calls
-        # disconnect on itself in the middle of the loop.
-        for i in reversed(range(len(self.slots))):
-            slot = self.slots[i]()
+        for ref in self.slots:
+            slot = ref()
             if slot is not None:
                 slot(*args, **kwargs)
             else:
-                del self.slots[i]
+                self._remove(ref)
 
     #-----------------------------------------------------------------------
     def connect(self, slot):
@@ -63,12 +64,9 @@ class Signal:
         else:
             wr_slot = weakref.ref(slot)
 
-        # Only insert the slot if it doesn't already exist.  If the index
-        # method throws, the slot doesn't exist yet. Insert it at the
-        # beginning so that when we call the slots in reverse order, they
-        # will be called in the order inserted.
+        # Only add the slot if it doesn't already exist.
         if wr_slot not in self.slots:
-            self.slots.insert(0, wr_slot)
+            self.slots = self.slots + (wr_slot,)
 
     #-----------------------------------------------------------------------
     def disconnect(self, slot):
@@ -86,16 +84,23 @@ class Signal:
         else:
             wr_slot = weakref.ref(slot)
 
-        try:
-            self.slots.remove(wr_slot)
-        except ValueError:
-            pass
+        self._remove(wr_slot)
 
     #-----------------------------------------------------------------------
     def clear(self):
         """Clear all the attached slots from the signal.
         """
-        self.slots = []
+        self.slots = ()
+
+    #-----------------------------------------------------------------------
+    def _remove(self, wr_slot):
+        """Remove a weak reference from the slots.
+
+        Args:
+           wr_slot:  The weak reference to remove.
+        """
+        if wr_slot in self.slots:
+            self.slots = tuple(i for i in self.slots if i != wr_slot)
 
     #-----------------------------------------------------------------------
 
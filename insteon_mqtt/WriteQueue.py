@@ -0,0 +1,214 @@
+#===========================================================================
+#
+# Protocol output message queue.
+#
+#===========================================================================
+import collections
+import enum
+from . import message as Msg
+
+
+class Priority(enum.IntEnum):
+    """Write queue priority lanes.
+
+    Lower values are written first.  The lane a message uses comes from the
+    priority attribute of the message handler.
+    """
+    # User commands (MQTT, command line) which should be sent right away.
+    INTERACTIVE = 0
+    # Device state refreshes.
+    REFRESH = 1
+    # All link database downloads, modifications, and syncs.
+    BULK = 2
+
+
+# Output message and handler stored together.
+OutputMsg = collections.namedtuple('OutputMsg', ['msg', 'handler'])
+
+
+class WriteQueue:
+    """Protocol output message queue.
+
+    Messages are stored in one deque per Priority lane so adding and
+    removing messages is O(1).  The next message is always taken from the
+    highest priority (lowest value) lane that has messages which means an
+    interactive command never waits behind a long series of database
+    messages - it waits at most for the message that is currently being
+    processed.
+
+    The message that has been written and is waiting for replies is removed
+    from the lanes and stored in the current attribute.  A count of the
+    messages to each device address (including the current message) is kept
+    so has_addr() is a dict lookup instead of a scan of the queue.
+
+    When the Protocol pipelines messages, the current message can be parked
+    while it waits for the device reply so the next message can be sent.
+    Parked messages are stored by the address the reply will come from and
+    the next message isn't sent while it's to a parked address.
+    """
+    def __init__(self):
+        """Constructor
+        """
+        self._lanes = [collections.deque() for i in Priority]
+
+        # OutputMsg that has been sent and is being processed or None.
+        self.current = None
+
+        # Address.id -> number of messages in the queue to that address.
+        self._addr = {}
+
+        # Address.id -> parked OutputMsg waiting for a reply from that
+        # address.
+        self.parked = {}
+
+    #-----------------------------------------------------------------------
+    def __len__(self):
+        """Return the number of messages in the queue.
+
+        This includes the current message.
+        """
+        num = sum(len(i) for i in self._lanes) + len(self.parked)
+        return num if self.current is None else num + 1
+
+    #-----------------------------------------------------------------------
+    def __bool__(self):
+        """Return True if there are any messages in the queue.
+        """
+        return (self.current is not None or bool(self.parked) or
+                any(self._lanes))
+
+    #-----------------------------------------------------------------------
+    def has_next(self):
+        """Return True if there are any messages waiting to be sent.
+        """
+        return any(self._lanes)
+
+    #-----------------------------------------------------------------------
+    def push(self, output, priority=Priority.INTERACTIVE, front=False):
+        """Add a message to the queue.
+
+        Args:
+          output (OutputMsg):  The message and handler to add.
+          priority (Priority):  The lane to add the message to.
+          front (bool):  True to add the message to the front of the lane
+                so it's the next one sent from that lane.  False to add it
+                at the end of the lane.
+        """
+        lane = self._lanes[priority]
+        if front:
+            lane.appendleft(output)
+        else:
+            lane.append(output)
+
+        addr_id = self._addr_id(output.msg)
+        if addr_id is not None:
+            self._addr[addr_id] = self._addr.get(addr_id, 0) + 1
+
+    #-----------------------------------------------------------------------
+    def pop_next(self):
+        """Move the next message to send into the current slot.
+
+        Returns:
+          OutputMsg:  The new current message or None if the lanes are
+          empty or the next message is to a parked address.
+        """
+        assert self.current is None
+        for lane in self._lanes:
+            if lane:
+                if self.parked and self._addr_id(lane[0].msg) in self.parked:
+                    return None
+
+                self.current = lane.popleft()
+                return self.current
+
+        return None
+
+    #-----------------------------------------------------------------------
+    def finish(self):
+        """Remove the current message from the queue.
+
+        Returns:
+          OutputMsg:  The message that was removed.
+        """
+        out, self.current = self.current, None
+        self._remove_addr(out)
+        return out
+
+    #-----------------------------------------------------------------------
+    def park(self, addr):
+        """Park the current message while it waits for a reply.
+
+        The current slot is cleared so the next message can be sent.
+
+        Args:
+          addr (Address):  The address the reply will come from.
+        """
+        assert addr.id not in self.parked
+        self.parked[addr.id] = self.current
+        self.current = None
+
+    #-----------------------------------------------------------------------
+    def finish_parked(self, addr):
+        """Remove a parked message from the queue.
+
+        Args:
+          addr (Address):  The address the message was parked with.
+
+        Returns:
+          OutputMsg:  The message that was removed.
+        """
+        out = self.parked.pop(addr.id)
+        self._remove_addr(out)
+        return out
+
+    #-----------------------------------------------------------------------
+    def has_addr(self, addr):
+        """Return True if there is a message in the queue to an address.
+
+        Args:
+          addr (Address):  The device address to search for.
+        """
+        return addr.id in self._addr
+
+    #-----------------------------------------------------------------------
+    def num_waiting(self, priority):
+        """Return the number of messages waiting in a lane.
+
+        This doesn't include the current message.
+
+        Args:
+          priority (Priority):  The lane to check.
+        """
+        return len(self._lanes[priority])
+
+    #-----------------------------------------------------------------------
+    def _remove_addr(self, out):
+        """Update the address counts for a message leaving the queue.
+
+        Args:
+          out (OutputMsg):  The message that was removed.
+        """
+        addr_id = self._addr_id(out.msg)
+        if addr_id is not None:
+            num = self._addr[addr_id] - 1
+            if num:
+                self._addr[addr_id] = num
+            else:
+                del self._addr[addr_id]
+
+    #-----------------------------------------------------------------------
+    def _addr_id(self, msg):
+        """Return the destination address id of a message.
+
+        Args:
+          msg:  The output message.
+
+        Returns:
+          int:  The Address.id for standard and extended messages or None
+          for all other messages.
+        """
+        if isinstance(msg, (Msg.OutExtended, Msg.OutStandard)):
+            return msg.to_addr.id
+        return None
+
+#===========================================================================
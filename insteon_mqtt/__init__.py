@@ -14,21 +14,69 @@ For docs, see: https://www.github.com/TD22057/insteon-mqtt
 
 #===========================================================================
 
+import importlib
+
 from . import catalog
-from . import cmd_line
-from . import db
-from . import device
 from . import log
 from . import message
-from . import mqtt
-from . import network
 from . import on_off
 from . import util
 
 from .const import __version__
 
+from .AddrSignal import AddrSignal
 from .Address import Address
+from .BulkSeq import BulkSeq
 from .CommandSeq import CommandSeq
-from .Modem import Modem
 from .Protocol import Protocol
+from .Reply import Reply
+from .Scheduler import Scheduler
 from .Signal import Signal
+from .WriteQueue import Priority, WriteQueue
+
+# Modules that import the device, MQTT, and network code and their third
+# party dependencies (jinja2, paho, pyserial, requests, ruamel, etc).  These
+# are imported the first time they're used (see __getattr__) so that the
+# command line tool which only sends a message to the server doesn't load
+# them.  Maps the attribute name to the (module, attribute) to import.
+#
+# The Modem class is in the ModemImpl module so that importing the module
+# doesn't replace the package Modem attribute with the module.
+_lazy = {
+    "cmd_line" : (".cmd_line", None),
+    "config" : (".config", None),
+    "db" : (".db", None),
+    "device" : (".device", None),
+    "handler" : (".handler", None),
+    "mqtt" : (".mqtt", None),
+    "network" : (".network", None),
+    "Modem" : (".ModemImpl", "Modem"),
+    }
+
+
+#===========================================================================
+def __getattr__(name):
+    """Import a lazy module attribute the first time it's used.
+
+    Args:
+      name (str):  The attribute name.
+
+    Returns:
+      The imported module or class.
+    """
+    if name not in _lazy:
+        raise AttributeError("module %r has no attribute %r" %
+                             (__name__, name))
+
+    module, attr = _lazy[name]
+    value = importlib.import_module(module, __name__)
+    if attr:
+        value = getattr(value, attr)
+
+    globals()[name] = value
+    return value
+
+
+#===========================================================================
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
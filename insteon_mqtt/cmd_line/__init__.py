@@ -14,6 +14,7 @@ or send a variety of commands to a running server process.
 #===========================================================================
 from . import device
 from . import modem
+from . import storage
 from . import util
 
 from .main import main
@@ -8,7 +8,7 @@ from . import argparse_ext
 from .. import config
 from . import device
 from . import modem
-from . import start
+from . import storage
 from ..const import __version__
 
 
@@ -61,7 +61,7 @@ def parse_args(args):
     sp.add_argument("--level", metavar="log_level", type=int,
                     help="Logging level to use.  10=debug, 20=info,"
                     "30=warn, 40=error, 50=critical")
-    sp.set_defaults(func=start.start)
+    sp.set_defaults(func=start)
 
     #---------------------------------------
     # modem.join_all command
@@ -120,6 +120,36 @@ def parse_args(args):
                     help="Don't print any command results to the screen.")
     sp.set_defaults(func=modem.sync_all)
 
+    #---------------------------------------
+    # modem.cancel_all command
+    sp = systemgrp.add_parser("cancel-all", help="Cancel the running "
+                              "'*-all' commands.",
+                              description="Cancel the running refresh-all, "
+                              "get-engine-all, join-all, pair-all, or "
+                              "sync-all commands after the current device "
+                              "finishes.")
+    sp.add_argument("-q", "--quiet", action="store_true",
+                    help="Don't print any command results to the screen.")
+    sp.set_defaults(func=modem.cancel_all)
+
+    # modem.pause_all command
+    sp = systemgrp.add_parser("pause-all", help="Pause the running '*-all' "
+                              "commands.",
+                              description="Pause the running '*-all' "
+                              "commands after the current device finishes.")
+    sp.add_argument("-q", "--quiet", action="store_true",
+                    help="Don't print any command results to the screen.")
+    sp.set_defaults(func=modem.pause_all)
+
+    # modem.resume_all command
+    sp = systemgrp.add_parser("resume-all", help="Resume the paused '*-all' "
+                              "commands.",
+                              description="Resume the paused '*-all' "
+                              "commands.")
+    sp.add_argument("-q", "--quiet", action="store_true",
+                    help="Don't print any command results to the screen.")
+    sp.set_defaults(func=modem.resume_all)
+
     #---------------------------------------
     # modem.import_scenes_all command
     sp = systemgrp.add_parser("import-scenes-all", help="Run 'import-scenes' "
@@ -565,21 +595,48 @@ def parse_args(args):
                     help="Don't print any command results to the screen.")
     sp.set_defaults(func=modem.factory_reset)
 
+    #---------------------------------------
+    # storage.migrate_db command
+    sp = advancedgrp.add_parser("migrate-db", help="Copy the JSON device "
+                                "databases into the SQLite database.",
+                                description="Copy the JSON device and modem "
+                                "databases in the storage directory into the "
+                                "SQLite database used by storage_format: "
+                                "sqlite.  The server should not be running.  "
+                                "The JSON files are not changed.")
+    sp.set_defaults(func=storage.migrate_db)
+
     return p.parse_args(args)
 
 
+#===========================================================================
+def start(args, cfg):
+    """Start the Insteon<->MQTT server.
+
+    The server imports the device, MQTT, and network modules and their
+    dependencies.  They're imported here instead of at the top of the file
+    so the other commands which only send a message to the server don't
+    have to load them.
+
+    Args:
+      args:  The command line arguments.
+      cfg:   The configuration dictionary.
+    """
+    # pylint: disable=import-outside-toplevel
+    from . import start as server
+    return server.start(args, cfg)
+
+
 #===========================================================================
 def main(mqtt_converter=None):
     args = parse_args(sys.argv[1:])
 
-    # Validate the configuration file
-    val_errors = config.validate(args.config)
+    # Load and validate the configuration file.  The validated config is
+    # cached so repeat runs don't have to parse and validate it again.
+    cfg, val_errors = config.read(args.config, config.CACHE_DIR)
     if val_errors != "":
         return val_errors
 
-    # Load the configuration file.
-    cfg = config.load(args.config)
-
     topic = cfg.get("mqtt", {}).get("cmd_topic", None)
     if topic:
         args.topic = topic
@@ -54,6 +54,39 @@ def get_engine_all(args, config):
     return reply["status"]
 
 
+#===========================================================================
+def cancel_all(args, config):
+    topic = "%s/modem" % (args.topic)
+    payload = {
+        "cmd" : "cancel_all",
+        }
+
+    reply = util.send(config, topic, payload, args.quiet)
+    return reply["status"]
+
+
+#===========================================================================
+def pause_all(args, config):
+    topic = "%s/modem" % (args.topic)
+    payload = {
+        "cmd" : "pause_all",
+        }
+
+    reply = util.send(config, topic, payload, args.quiet)
+    return reply["status"]
+
+
+#===========================================================================
+def resume_all(args, config):
+    topic = "%s/modem" % (args.topic)
+    payload = {
+        "cmd" : "resume_all",
+        }
+
+    reply = util.send(config, topic, payload, args.quiet)
+    return reply["status"]
+
+
 #===========================================================================
 def join_all(args, config):
     topic = "%s/modem" % (args.topic)
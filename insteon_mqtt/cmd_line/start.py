@@ -3,11 +3,14 @@
 # Start the main server
 #
 #===========================================================================
+import signal
+import sys
 from .. import config
+from .. import db
 from .. import log
 from .. import mqtt
 from .. import network
-from ..Modem import Modem
+from ..ModemImpl import Modem
 from ..Protocol import Protocol
 
 
@@ -36,13 +39,9 @@ def start(args, cfg):
 
     # Setup the PLM or Hub
     use_hub = cfg['insteon'].get('use_hub', False)
-    time_out = None
     if use_hub:
-        # This reduces the time that the select/poll call will block. The
-        # default of None is 3 seconds.  A half a second is the same speed at
-        # which we query the hub for incoming messages. If that rate is
-        # changed, consider changing this as well.
-        time_out = .5
+        # The Hub reports when it next needs to be polled (see
+        # Hub.next_poll_time) so the loop wakes up to check for new data.
         plm_link = network.Hub()
         loop.add_poll(plm_link)
     else:
@@ -53,10 +52,16 @@ def start(args, cfg):
     stack_link = network.Stack()
     timed_link = network.TimedCall()
 
+    # Database changes are written behind from the event loop so that
+    # database downloads don't rewrite the file for every record.
+    db_writer = db.Writer()
+    db_writer.install()
+
     # Add the clients to the event loop.
     loop.add(mqtt_link, connected=False)
     loop.add_poll(stack_link)
     loop.add_poll(timed_link)
+    loop.add_poll(db_writer)
 
     # Create the insteon message protocol, modem, and MQTT handler and
     # link them together.
@@ -67,6 +72,18 @@ def start(args, cfg):
     # Load the configuration data into the objects.
     config.apply(cfg, mqtt_handler, modem)
 
-    # Start the network event loop.
-    while loop.active():
-        loop.select(time_out=time_out)
+    # Docker and systemd stop the server w/ SIGTERM.  Turn that into a
+    # normal exit so the pending database writes below still happen.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Start the network event loop.  Make sure any pending database changes
+    # are written when the loop exits for any reason.
+    try:
+        while loop.active():
+            loop.select()
+    finally:
+        db_writer.uninstall()
+
+        store = db.active_store()
+        if store is not None:
+            store.close()
@@ -0,0 +1,42 @@
+#===========================================================================
+#
+# Database storage commands
+#
+#===========================================================================
+import os
+
+
+#===========================================================================
+def migrate_db(args, config):
+    """Copy the JSON databases into the SQLite database.
+
+    This runs locally instead of sending a command to the server.  The
+    database modules are imported here so the other commands don't have to
+    load them.
+
+    Args:
+      args:  The command line arguments.
+      config:  The configuration dictionary.
+
+    Returns:
+      int:  Returns the exit status.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ..db.SqliteStore import SqliteStore
+
+    save_path = config["insteon"]["storage"]
+    if not os.path.isdir(save_path):
+        print("Storage directory %s doesn't exist" % save_path)
+        return 1
+
+    path = os.path.join(save_path, SqliteStore.file_name)
+    store = SqliteStore(path)
+    try:
+        num = store.migrate(save_path)
+    finally:
+        store.close()
+
+    print("Copied %d databases from %s to %s" % (num, save_path, path))
+    return 0
+
+#===========================================================================
@@ -8,7 +8,7 @@ import json
 import random
 import time
 import paho.mqtt.client as mqtt
-from ..mqtt import Reply
+from ..Reply import Reply
 
 # Time between messages before we decide that the something went wrong and
 # stop.  Currently the server should send enough messages to avoid this but
@@ -8,34 +8,48 @@ __doc__ = """Configuration file utilties
 """
 
 #===========================================================================
+import hashlib
+import os
 import os.path
+import pickle
 import re
 import yaml
 from cerberus import Validator
 from cerberus.errors import BasicErrorHandler
-from . import device
+from .const import __version__
+
+# Directory to cache the validated configuration in.  See read().
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or
+                         os.path.join(os.path.expanduser("~"), ".cache"),
+                         "insteon-mqtt")
+
+# Use the libyaml C parser if it's available - it's much faster than the
+# pure Python parser for large config and scenes files.
+YamlLoader = getattr(yaml, "CLoader", yaml.Loader)
 
 # Configuration file input description to class map.
 devices = {
-    # Key is config file input.  Value is tuple of (class, **kwargs) of the
-    # class to use and any extra keyword args to pass to the constructor.
-    'dimmer' : (device.Dimmer, {}),
-    'battery_sensor' : (device.BatterySensor, {}),
-    "ezio4o": (device.EZIO4O, {}),
-    'fan_linc' : (device.FanLinc, {}),
-    'hidden_door' : (device.HiddenDoor, {}),
-    'io_linc' : (device.IOLinc, {}),
-    'keypad_linc' : (device.KeypadLincDimmer, {}),
-    'keypad_linc_sw' : (device.KeypadLinc, {}),
-    'leak' : (device.Leak, {}),
-    'mini_remote1' : (device.Remote, {'num_button' : 1}),
-    'mini_remote4' : (device.Remote, {'num_button' : 4}),
-    'mini_remote8' : (device.Remote, {'num_button' : 8}),
-    'motion' : (device.Motion, {}),
-    'outlet' : (device.Outlet, {}),
-    'smoke_bridge' : (device.SmokeBridge, {}),
-    'switch' : (device.Switch, {}),
-    'thermostat' : (device.Thermostat, {}),
+    # Key is config file input.  Value is tuple of (class name, **kwargs) of
+    # the device package class to use and any extra keyword args to pass to
+    # the constructor.  The class is looked up in find() so the command line
+    # tool doesn't have to import the device package to read the config.
+    'dimmer' : ('Dimmer', {}),
+    'battery_sensor' : ('BatterySensor', {}),
+    "ezio4o": ('EZIO4O', {}),
+    'fan_linc' : ('FanLinc', {}),
+    'hidden_door' : ('HiddenDoor', {}),
+    'io_linc' : ('IOLinc', {}),
+    'keypad_linc' : ('KeypadLincDimmer', {}),
+    'keypad_linc_sw' : ('KeypadLinc', {}),
+    'leak' : ('Leak', {}),
+    'mini_remote1' : ('Remote', {'num_button' : 1}),
+    'mini_remote4' : ('Remote', {'num_button' : 4}),
+    'mini_remote8' : ('Remote', {'num_button' : 8}),
+    'motion' : ('Motion', {}),
+    'outlet' : ('Outlet', {}),
+    'smoke_bridge' : ('SmokeBridge', {}),
+    'switch' : ('Switch', {}),
+    'thermostat' : ('Thermostat', {}),
     }
 
 
@@ -49,14 +63,44 @@ def validate(path):
     Returns:
       string: the failure message text or an empty string if no errors
     """
-    error = ""
+    return read(path)[1]
+
+
+#===========================================================================
+def read(path, cache_dir=None):
+    """Load and validate the configuration file.
+
+    The config files are parsed and validated once.  If cache_dir is set,
+    a valid config is saved there along with the modification time and
+    size of every file that was read (the config, !include files, the
+    scenes file, and the base config and schemas).  The next read returns
+    the saved config without parsing or validating anything if none of
+    those files have changed.
+
+    Args:
+      path:  The file to load
+      cache_dir (str):  The directory to cache the config in.  None to not
+                use the cache.
+
+    Returns:
+      (dict, str):  Returns the configuration dictionary and the validation
+      failure message text or an empty string if there are no errors.
+    """
+    cache_path = None
+    if cache_dir:
+        key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        cache_path = os.path.join(cache_dir, key + ".pickle")
+        config = read_cache(cache_path)
+        if config is not None:
+            return config, ""
+
+    config = load(path)
 
     # Check the main config file first
-    document = load(path)
-    error += validate_file(document, 'config-schema.yaml', 'configuration')
+    error = validate_file(config, 'config-schema.yaml', 'configuration')
 
     # Check the Scenes file
-    insteon = document.get('insteon', {})
+    insteon = config.get('insteon', {})
     scenes_path = insteon.get('scenes', None)
     if scenes_path is not None:
         with open(scenes_path, "r") as f:
@@ -66,7 +110,87 @@ def validate(path):
         scenes = {"scenes": document}
         error += validate_file(scenes, 'scenes-schema.yaml', 'scenes')
 
-    return error
+    if cache_path and not error:
+        write_cache(cache_path, config, Loader.files)
+
+    return config, error
+
+
+#===========================================================================
+def read_cache(cache_path):
+    """Read a cached config saved by write_cache().
+
+    Args:
+      cache_path (str):  The cache file to read.
+
+    Returns:
+      dict:  Returns the configuration dictionary or None if there is no
+      cached config or any of the files it was read from have changed.
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != __version__:
+        return None
+
+    for file_path, stamp in data["files"].items():
+        if _file_stamp(file_path) != stamp:
+            return None
+
+    return data["config"]
+
+
+#===========================================================================
+def write_cache(cache_path, config, files):
+    """Save a validated config to the cache.
+
+    Errors are ignored - the config is just read from the files again next
+    time.
+
+    Args:
+      cache_path (str):  The cache file to write.
+      config (dict):  The configuration dictionary.
+      files (list):  The paths of the files the config was read from.
+    """
+    data = {
+        "version" : __version__,
+        "files" : {i: _file_stamp(i) for i in files},
+        "config" : config,
+        }
+
+    temp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+
+        # Replace the old file in one step so a reader never sees a
+        # partially written file.
+        os.replace(temp_path, cache_path)
+    except (OSError, pickle.PickleError, TypeError, AttributeError):
+        pass
+
+
+#===========================================================================
+def _file_stamp(path):
+    """Return the modification time and size of a file.
+
+    Args:
+      path (str):  The file path.
+
+    Returns:
+      (int, int):  The modification time in ns and the size in bytes or
+      None if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size)
 
 
 #===========================================================================
@@ -82,7 +206,7 @@ def validate_file(document, schema_file, name):
     schema = None
     schema_file_path = os.path.join(basepath, 'data', schema_file)
     with open(schema_file_path, "r") as f:
-        schema = yaml.load(f, Loader=yaml.Loader)
+        schema = yaml.load(f, Loader)
 
     v = IMValidator(schema, error_handler=MetaErrorHandler(schema=schema))
     valid = v.validate(document)
@@ -136,6 +260,7 @@ def load(path):
     base_config_path = os.path.join(basepath, 'data', 'config-base.yaml')
     base_config = {}
     user_config = {}
+    Loader.files = []
 
     with open(base_config_path, "r") as f:
         base_config = yaml.load(f, Loader)
@@ -218,25 +343,31 @@ def find(name):
         raise Exception("Unknown device name '%s'.  Valid names are "
                         "%s." % (name, devices.keys()))
 
-    return dev
+    # pylint: disable=import-outside-toplevel
+    from . import device
+    cls_name, kwargs = dev
+    return getattr(device, cls_name), kwargs
 
 
 #===========================================================================
 # YAML multi-file loading helper.  Original code is from here:
 # https://davidchall.github.io/yaml-includes.html (with no license so I'm
 # assuming it's in the public domain).
-class Loader(yaml.Loader):
+class Loader(YamlLoader):
+    # Absolute paths of the files that have been loaded since the last
+    # load() call.  read() uses this to find the files the config came
+    # from.
+    files = []
+
     def __init__(self, file):
         """Constructor
 
         Args:
           file (file):  File like object to read from.
         """
-        yaml.Loader.add_constructor('!include', Loader.include)
-        yaml.Loader.add_constructor('!rel_path', Loader.rel_path)
-
         super().__init__(file)
         self._base_dir = os.path.split(file.name)[0]
+        Loader.files.append(os.path.abspath(file.name))
 
     #-----------------------------------------------------------------------
     def include(self, node):
@@ -298,6 +429,10 @@ class Loader(yaml.Loader):
             raise yaml.constructor.ConstructorError(msg)
 
 
+Loader.add_constructor('!include', Loader.include)
+Loader.add_constructor('!rel_path', Loader.rel_path)
+
+
 #===========================================================================
 class MetaErrorHandler(BasicErrorHandler):
     """ Used for adding custom fail message for a better UX
@@ -5,13 +5,14 @@
 #===========================================================================
 import io
 import itertools
-import json
 from ..Address import Address
 from .. import catalog
 from ..CommandSeq import CommandSeq
 from .. import handler
 from .DeviceEntry import DeviceEntry
 from .DbDiff import DbDiff
+from .SqliteStore import write_db
+from .Writer import active_writer
 from .. import log
 from .. import message as Msg
 from .. import util
@@ -154,6 +155,14 @@ class Device:
         # that group command.
         self.groups = {}
 
+        # Indexes of the active entries used by the find methods.  Maps of
+        # _index_key() and Address.id to a list of DeviceEntry objects.  Int
+        # keys are used since most entries have their own _key_index key.
+        # These are updated by add_entry() and clear() so entries must be
+        # added using those.
+        self._key_index = {}
+        self._addr_index = {}
+
         # Link to the Modem device
         self.device = device
 
@@ -298,6 +307,8 @@ class Device:
         self.entries.clear()
         self.unused.clear()
         self.groups.clear()
+        self._key_index.clear()
+        self._addr_index.clear()
         self.last.mem_loc = START_MEM_LOC
         self.save()
 
@@ -312,16 +323,41 @@ class Device:
         self.save_path = path
 
     #-----------------------------------------------------------------------
-    def save(self):
+    def save(self, force=False):
         """Save the database.
 
-        If a save path wasn't set, nothing is done.
+        If a save path wasn't set, nothing is done.  If a db.Writer is
+        active, the database is marked dirty and the writer will write it
+        later from the network loop.  Otherwise it's written immediately.
+
+        Args:
+          force (bool):  If True, the database is written immediately even
+                if a writer is active.
         """
         if not self.save_path:
             return
 
-        with open(self.save_path, "w") as f:
-            json.dump(self.to_json(), f, indent=2)
+        writer = active_writer()
+        if writer is None:
+            self.write()
+        elif force:
+            writer.mark(self)
+            writer.flush(self)
+        else:
+            writer.mark(self)
+
+    #-----------------------------------------------------------------------
+    def write(self):
+        """Write the database to the save path.
+
+        If a db.SqliteStore is installed, the database is written to it
+        instead of the save path file.  This always writes the database -
+        use save() to allow the write to be deferred.
+        """
+        if not self.save_path:
+            return
+
+        write_db(self.save_path, self.to_json())
 
     #-----------------------------------------------------------------------
     def __len__(self):
@@ -482,12 +518,11 @@ class Device:
         addr = Address(addr)
         group = int(group)
 
-        for e in self.entries.values():
-            # Address, group, and is_controller must match.  group has to
-            # match data[2] if it was input.
-            if (e.addr == addr and e.group == group and
-                    e.is_controller == is_controller and
-                    (local_group is None or local_group == e.data[2])):
+        # Address, group, and is_controller must match.  group has to match
+        # data[2] if it was input.
+        key = self._index_key(addr.id, group, is_controller)
+        for e in self._key_index.get(key, []):
+            if local_group is None or local_group == e.data[2]:
                 return e
 
         return None
@@ -523,10 +558,14 @@ class Device:
         addr = None if addr is None else Address(addr)
         group = None if group is None else int(group)
 
+        # Only search the entries for the address if it was input.
+        if addr is not None:
+            entries = self._addr_index.get(addr.id, [])
+        else:
+            entries = self.entries.values()
+
         results = []
-        for e in self.entries.values():
-            if addr is not None and e.addr != addr:
-                continue
+        for e in entries:
             if group is not None and e.group != group:
                 continue
             if is_controller is not None and e.is_controller != is_controller:
@@ -685,6 +724,11 @@ class Device:
         if entry.db_flags.is_last_rec:
             self.last = entry
 
+        # Remove any entry being replaced from the find indexes.
+        old_entry = self.entries.get(entry.mem_loc, None)
+        if old_entry is not None:
+            self._remove_index(old_entry)
+
         # Entry is an active entry.
         if entry.db_flags.in_use:
             # NOTE: this relies on no-one keeping a handle to this entry
@@ -693,6 +737,7 @@ class Device:
             # address off unused to insure both dicts stay in sync.
             self.entries[entry.mem_loc] = entry
             self.unused.pop(entry.mem_loc, None)
+            self._add_index(entry)
 
             # If we're the controller for this entry, add it to the list of
             # entries for that group.
@@ -723,6 +768,53 @@ class Device:
         if save:
             self.save()
 
+    #-----------------------------------------------------------------------
+    def _add_index(self, entry):
+        """Add an active entry to the find indexes.
+
+        Args:
+          entry:  (DeviceEntry) The entry to add.
+        """
+        key = self._index_key(entry.addr.id, entry.group, entry.is_controller)
+        self._key_index.setdefault(key, []).append(entry)
+        self._addr_index.setdefault(entry.addr.id, []).append(entry)
+
+    #-----------------------------------------------------------------------
+    def _remove_index(self, entry):
+        """Remove an entry from the find indexes.
+
+        Args:
+          entry:  (DeviceEntry) The entry to remove.
+        """
+        key = self._index_key(entry.addr.id, entry.group, entry.is_controller)
+        for index, key in ((self._key_index, key),
+                           (self._addr_index, entry.addr.id)):
+            entries = index.get(key, [])
+            # DeviceEntry.__eq__ doesn't check the memory location so
+            # remove the exact object.
+            for i in range(len(entries)):
+                if entries[i] is entry:
+                    del entries[i]
+                    break
+
+            if not entries:
+                index.pop(key, None)
+
+    #-----------------------------------------------------------------------
+    @staticmethod
+    def _index_key(addr_id, group, is_controller):
+        """Return the _key_index key for an entry.
+
+        Args:
+          addr_id:  (int) The Address.id of the entry.
+          group:    (int) The entry group (0-255).
+          is_controller:  (bool) True for controller records.
+
+        Returns:
+          (int) Returns the key with all the fields packed into an integer.
+        """
+        return addr_id << 9 | group << 1 | bool(is_controller)
+
     #-----------------------------------------------------------------------
     def add_from_config(self, remote, local):
         """Add an entry to the config database from the config file.
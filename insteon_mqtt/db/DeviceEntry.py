@@ -38,6 +38,10 @@ class DeviceEntry:
         Data 3    Listed as 00 for switchlinc type devices and 01-08 for KPL
                   type devices
     """
+    # There is one of these for every record in every device database so
+    # keep them small.
+    __slots__ = ["addr", "group", "mem_loc", "db_flags", "is_controller",
+                 "data", "db"]
 
     @staticmethod
     def from_json(data, db=None):
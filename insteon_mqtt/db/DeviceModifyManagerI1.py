@@ -7,6 +7,7 @@ from .. import log
 from .. import message as Msg
 from .. import util
 from .. import handler
+from ..WriteQueue import Priority
 
 LOG = log.get_logger()
 
@@ -101,6 +102,7 @@ class DeviceModifyManagerI1:
         msg_handler = handler.StandardCmd(db_msg, self.handle_set_msb,
                                           on_done=self.on_done,
                                           num_retry=self._num_retry)
+        msg_handler.priority = Priority.BULK
         self.device.send(db_msg, msg_handler)
 
     #-------------------------------------------------------------------
@@ -184,6 +186,7 @@ class DeviceModifyManagerI1:
                                           self.handle_lsb_write_response,
                                           on_done=on_done,
                                           num_retry=self._num_retry)
+        msg_handler.priority = Priority.BULK
         self.device.send(db_msg, msg_handler)
 
     #-------------------------------------------------------------------
@@ -235,4 +238,5 @@ class DeviceModifyManagerI1:
                                           self.handle_lsb_response,
                                           on_done=on_done,
                                           num_retry=self._num_retry)
+        msg_handler.priority = Priority.BULK
         self.device.send(db_msg, msg_handler)
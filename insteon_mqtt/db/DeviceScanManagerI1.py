@@ -7,6 +7,7 @@ from .. import log
 from .. import message as Msg
 from .. import util
 from .. import handler
+from ..WriteQueue import Priority
 from .DeviceEntry import DeviceEntry
 
 LOG = log.get_logger()
@@ -80,6 +81,7 @@ class DeviceScanManagerI1:
         msg_handler = handler.StandardCmd(db_msg, self.handle_set_msb,
                                           on_done=on_done,
                                           num_retry=self._num_retry)
+        msg_handler.priority = Priority.BULK
         self.device.send(db_msg, msg_handler)
 
     #-------------------------------------------------------------------
@@ -105,6 +107,7 @@ class DeviceScanManagerI1:
                                               self.handle_get_lsb,
                                               on_done=on_done,
                                               num_retry=self._num_retry)
+            msg_handler.priority = Priority.BULK
             self.device.send(db_msg, msg_handler)
         else:
             LOG.warning("%s device ACK Set MSB had wrong value: %02x",
@@ -150,6 +153,7 @@ class DeviceScanManagerI1:
             # in other designs I have skipped reading the rest of
             # a record if these are found
             if entry.db_flags.is_last_rec:
+                self.db.save(force=True)
                 on_done(True, "Database received", entry)
                 return
 
@@ -171,4 +175,5 @@ class DeviceScanManagerI1:
                                               self.handle_get_lsb,
                                               on_done=on_done,
                                               num_retry=self._num_retry)
+            msg_handler.priority = Priority.BULK
             self.device.send(db_msg, msg_handler)
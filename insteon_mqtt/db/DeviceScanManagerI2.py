@@ -7,6 +7,7 @@ from .. import log
 from .. import message as Msg
 from .. import util
 from .. import handler
+from ..WriteQueue import Priority
 from .DeviceEntry import DeviceEntry
 from .Device import START_MEM_LOC
 
@@ -57,6 +58,10 @@ class DeviceScanManagerI2:
 
         done, last_entry = self._calculate_next_addr()
         if done:
+            # Write the downloaded database now instead of waiting for the
+            # write-behind delay.
+            self.db.save(force=True)
+
             if self.db.is_complete():
                 on_done(True, "Database received", last_entry)
             else:
@@ -74,6 +79,7 @@ class DeviceScanManagerI2:
         msg_handler = handler.ExtendedCmdResponse(msg, self.handle_record,
                                                   on_done=on_done,
                                                   num_retry=self._num_retry)
+        msg_handler.priority = Priority.BULK
         self.device.send(msg, msg_handler)
 
     #-------------------------------------------------------------------
@@ -4,7 +4,6 @@
 #
 #===========================================================================
 import io
-import json
 from ..Address import Address
 from .. import catalog
 from .. import handler
@@ -13,6 +12,8 @@ from .. import message as Msg
 from .. import util
 from .ModemEntry import ModemEntry
 from .DbDiff import DbDiff
+from .SqliteStore import write_db
+from .Writer import active_writer
 
 
 LOG = log.get_logger()
@@ -88,13 +89,19 @@ class Modem:
         # storage for access across reboots
         self._meta = {}
 
-        # List of ModemEntry objects in the all link database.
-        self.entries = []
+        # Map of (Address.id, group, is_controller) to ModemEntry objects
+        # in the all link database.  Entries are unique by those fields so
+        # this is used for the entries list and for finding entries.
+        self._entries = {}
 
         # Map of all link group number to ModemEntry objects that respond to
         # that group command.
         self.groups = {}
 
+        # Bit mask of the groups in self.groups.  Used to find the empty
+        # groups.
+        self._used_groups = 0
+
         # Map of string scene names to integer controller groups
         self.aliases = {}
 
@@ -181,22 +188,57 @@ class Modem:
         return self._meta.get(key, None)
 
     #-----------------------------------------------------------------------
-    def save(self):
+    def save(self, force=False):
         """Save the database.
 
-        If a save path wasn't set, nothing is done.
+        If a save path wasn't set, nothing is done.  If a db.Writer is
+        active, the database is marked dirty and the writer will write it
+        later from the network loop.  Otherwise it's written immediately.
+
+        Args:
+          force (bool):  If True, the database is written immediately even
+                if a writer is active.
+        """
+        if not self.save_path:
+            return
+
+        writer = active_writer()
+        if writer is None:
+            self.write()
+        elif force:
+            writer.mark(self)
+            writer.flush(self)
+        else:
+            writer.mark(self)
+
+    #-----------------------------------------------------------------------
+    def write(self):
+        """Write the database to the save path.
+
+        If a db.SqliteStore is installed, the database is written to it
+        instead of the save path file.  This always writes the database -
+        use save() to allow the write to be deferred.
         """
         if not self.save_path:
             return
 
-        with open(self.save_path, "w") as f:
-            json.dump(self.to_json(), f, indent=2)
+        write_db(self.save_path, self.to_json())
+
+    #-----------------------------------------------------------------------
+    @property
+    def entries(self):
+        """List of ModemEntry objects in the all link database.
+
+        This is a copy so use add_entry() and delete_entry() to change the
+        database.
+        """
+        return list(self._entries.values())
 
     #-----------------------------------------------------------------------
     def __len__(self):
         """Return the number of entries in the database.
         """
-        return len(self.entries)
+        return len(self._entries)
 
     #-----------------------------------------------------------------------
     def empty_groups(self):
@@ -210,12 +252,8 @@ class Modem:
         Returns:
           (array) Returns a list of the empty groups
         """
-        ret = []
-        for i in range(GROUP_START, 255):
-            if i not in self.groups:
-                ret.append(i)
-
-        return ret
+        used = self._used_groups
+        return [i for i in range(GROUP_START, 255) if not (used >> i) & 1]
 
     #-----------------------------------------------------------------------
     def delete_entry(self, entry):
@@ -227,16 +265,19 @@ class Modem:
           entry:  (DeviceEntry) The entry to remove.  This entry must exist
                   or an exception is raised.
         """
-        self.entries.remove(entry)
+        del self._entries[self._key(entry.addr, entry.group,
+                                    entry.is_controller)]
 
         if entry.is_controller:
             responders = self.groups.get(entry.group)
-            if responders:
+            if responders is not None:
                 if entry in responders:
                     responders.remove(entry)
 
-            elif entry.group in self.groups:
-                del self.groups[entry.group]
+                # Free the group once there are no more entries in it.
+                if not responders:
+                    del self.groups[entry.group]
+                    self._used_groups &= ~(1 << entry.group)
 
         self.save()
 
@@ -247,8 +288,9 @@ class Modem:
         This also removes the saved file if it exists.  It does NOT modify
         the database on the device.
         """
-        self.entries = []
+        self._entries = {}
         self.groups = {}
+        self._used_groups = 0
         self.aliases = {}
         self.save()
 
@@ -280,12 +322,11 @@ class Modem:
           (ModemEntry): Returns the entry that matches or None if it
           doesn't exist.
         """
-        for e in self.entries:
-            if (e.addr == addr and e.group == group and
-                    e.is_controller == is_controller):
-                return e
+        # Only Address objects can match an entry.
+        if not isinstance(addr, Address):
+            return None
 
-        return None
+        return self._entries.get(self._key(addr, group, is_controller), None)
 
     #-----------------------------------------------------------------------
     def find_all(self, addr=None, group=None, is_controller=None):
@@ -306,8 +347,14 @@ class Modem:
         addr = None if addr is None else Address(addr)
         group = None if group is None else int(group)
 
+        # All the fields are set so this is a single entry lookup.
+        if addr is not None and group is not None and \
+           is_controller is not None:
+            entry = self.find(addr, group, is_controller)
+            return [] if entry is None else [entry]
+
         results = []
-        for e in self.entries:
+        for e in self._entries.values():
             if addr is not None and e.addr != addr:
                 continue
             if group is not None and e.group != group:
@@ -416,15 +463,16 @@ class Modem:
                       type(self).__name__, type(rhs).__name__)
             return None
 
-        # Copy the rhs entry list of ModemEntry.  For each match
-        # that we find, we'll remove that address from the dict.  The result
+        # Copy the rhs entry dict of ModemEntry.  For each match
+        # that we find, we'll remove that entry from the dict.  The result
         # will be the entries that need to be removed from rhs to make it
         # match.
-        rhsRemove = rhs.entries.copy()
+        # pylint: disable=protected-access
+        rhsRemove = rhs._entries.copy()
 
         delta = DbDiff(None)  # Modem db doesn't have addr
-        for entry in self.entries:
-            rhsEntry = rhs.find(entry.addr, entry.group, entry.is_controller)
+        for key, entry in self._entries.items():
+            rhsEntry = rhs._entries.get(key, None)
 
             # RHS is missing this entry
             # The Modem Data bytes never matter, we ignore them entirely
@@ -444,8 +492,8 @@ class Modem:
             # Otherwise this is match so we can note that from the list
             # if it is there.  If there are duplicates on the left hand side,
             # may already have been removed
-            elif rhsEntry and rhsEntry in rhsRemove:
-                rhsRemove.remove(rhsEntry)
+            else:
+                rhsRemove.pop(key, None)
 
         # Ignore certain links created by 'join' or 'pair'
         # #1 any responder link from a valid device.  These are normally
@@ -455,17 +503,17 @@ class Modem:
         # erroneous entries.
         # #2 any controller links from group 0x01 or 0x02 to a valid device,
         # these are results from the 'join' command
-        for entry in list(rhsRemove):
+        for key, entry in list(rhsRemove.items()):
             if (not entry.is_controller and
                     rhs.device.find(entry.addr) is not None):
-                rhsRemove.remove(entry)
-            if (entry.is_controller and entry.group in (0x00, 0x01) and
-                    rhs.device.find(entry.addr) is not None):
-                rhsRemove.remove(entry)
+                del rhsRemove[key]
+            elif (entry.is_controller and entry.group in (0x00, 0x01) and
+                  rhs.device.find(entry.addr) is not None):
+                del rhsRemove[key]
 
         # Add in remaining rhs entries that where not matches as entries that
         # need to be removed.
-        for entry in rhsRemove:
+        for entry in rhsRemove.values():
             delta.remove(entry)
 
         return delta
@@ -477,7 +525,7 @@ class Modem:
         Returns:
           (dict) Returns the database as a JSON dictionary.
         """
-        entries = [i.to_json() for i in self.entries]
+        entries = [i.to_json() for i in self._entries.values()]
         data = {
             'entries' : entries,
             'meta' : self._meta
@@ -491,7 +539,7 @@ class Modem:
     def __str__(self):
         o = io.StringIO()
         o.write("ModemDb:\n")
-        for entry in sorted(self.entries):
+        for entry in sorted(self._entries.values()):
             o.write("  %s\n" % entry)
 
         o.write("GroupMap\n")
@@ -513,22 +561,35 @@ class Modem:
         """
         assert isinstance(entry, ModemEntry)
 
-        try:
-            idx = self.entries.index(entry)
-            self.entries[idx] = entry
-        except ValueError:
-            self.entries.append(entry)
+        # Existing entries are replaced in place so the order is unchanged.
+        self._entries[self._key(entry.addr, entry.group,
+                                entry.is_controller)] = entry
 
         # If we're the controller for this entry, add it to the list of
         # entries for that group.
         if entry.is_controller:
             responders = self.groups.setdefault(entry.group, [])
+            self._used_groups |= 1 << entry.group
             if entry not in responders:
                 responders.append(entry)
 
         if save:
             self.save()
 
+    #-----------------------------------------------------------------------
+    def _key(self, addr, group, is_controller):
+        """Return the entry map key.
+
+        Args:
+          addr:           (Address) The entry address.
+          group:          (int) The entry group.
+          is_controller:  (bool) True for controller records.
+
+        Returns:
+          (tuple) Returns the key for the _entries map.
+        """
+        return (addr.id, group, bool(is_controller))
+
     #-----------------------------------------------------------------------
     def add_from_config(self, remote, local):
         """Add an entry to the config database from the config file.
@@ -18,6 +18,7 @@ class ModemEntry:
 
     The entry can be converted to/from JSON with to_json() and from_json().
     """
+    __slots__ = ["addr", "group", "is_controller", "data", "db"]
 
     @staticmethod
     def from_json(data, db=None):
@@ -0,0 +1,347 @@
+#===========================================================================
+#
+# SQLite database storage.
+#
+#===========================================================================
+import contextlib
+import json
+import os
+import sqlite3
+from ..Address import Address
+from .. import log
+
+LOG = log.get_logger()
+
+# The active store.  When this is None, databases are stored in one JSON
+# file per database.  Use SqliteStore.install() to set this.
+_ACTIVE = None
+
+# Database JSON keys that hold lists of entries.  db.Modem uses entries and
+# db.Device uses used and unused.
+ENTRY_KEYS = ('entries', 'used', 'unused')
+
+
+def active_store():
+    """Return the active SQLite store.
+
+    Returns:
+      SqliteStore:  Returns the installed store or None if databases are
+      stored in JSON files.
+    """
+    return _ACTIVE
+
+
+#===========================================================================
+def read_db(path):
+    """Read a database saved by write_db().
+
+    Args:
+      path (str):  The database save path.
+
+    Returns:
+      dict:  Returns the database JSON data (see db.Device.to_json()) or
+      None if the database doesn't exist.
+    """
+    store = active_store()
+    if store is not None:
+        return store.read(path)
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        return json.load(f)
+
+
+#===========================================================================
+def write_db(path, data):
+    """Save a database.
+
+    Args:
+      path (str):  The database save path.
+      data (dict):  The database JSON data (see db.Device.to_json()).
+    """
+    store = active_store()
+    if store is not None:
+        store.write(path, data)
+        return
+
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+#===========================================================================
+class SqliteStore:
+    """SQLite storage for the device and modem databases.
+
+    By default each database is stored in its own JSON file in the storage
+    directory which means one file read per device at startup and a
+    rewrite of the whole file for every save.  When this store is
+    installed, all of the databases are stored in one SQLite file instead.
+
+    Databases are identified by the name of the JSON file they would be
+    saved to (the device address) so the db.Device and db.Modem save paths
+    work with either storage.  The database fields (delta, engine, meta,
+    etc) are stored as JSON in the dbs table.  Each all link entry is a row
+    in the entries table which is indexed by address, group, and controller
+    flag so entries can be found across every database with find_entries().
+
+    Each write() is a transaction.  Use batch() to write many databases in
+    one transaction.
+    """
+    # Default file name in the storage directory.
+    file_name = "insteon_mqtt.sqlite"
+
+    #-----------------------------------------------------------------------
+    def __init__(self, path):
+        """Constructor
+
+        Args:
+          path (str):  The SQLite file to use.  It's created if it doesn't
+               exist.
+        """
+        self.path = path
+
+        # Autocommit mode - transactions are started explicitly so a batch
+        # can cover any number of writes.
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS dbs (
+                name TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+                );
+            CREATE TABLE IF NOT EXISTS entries (
+                name TEXT NOT NULL,
+                list TEXT NOT NULL,
+                pos INTEGER NOT NULL,
+                addr INTEGER NOT NULL,
+                grp INTEGER NOT NULL,
+                is_controller INTEGER NOT NULL,
+                data TEXT NOT NULL
+                );
+            CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+            CREATE INDEX IF NOT EXISTS entries_addr ON entries
+                (addr, grp, is_controller);
+            CREATE INDEX IF NOT EXISTS entries_grp ON entries
+                (grp, is_controller);
+            """)
+
+        # Nesting depth of batch() calls.
+        self._depth = 0
+
+    #-----------------------------------------------------------------------
+    def install(self):
+        """Make this the active store used by the databases.
+        """
+        global _ACTIVE  # pylint: disable=global-statement
+        _ACTIVE = self
+
+    #-----------------------------------------------------------------------
+    def uninstall(self):
+        """Remove this store as the active store.
+        """
+        global _ACTIVE  # pylint: disable=global-statement
+        if _ACTIVE is self:
+            _ACTIVE = None
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Uninstall the store and close the SQLite file.
+        """
+        self.uninstall()
+        self._conn.close()
+
+    #-----------------------------------------------------------------------
+    @contextlib.contextmanager
+    def batch(self):
+        """Context manager to run a group of writes in one transaction.
+
+        The transaction is committed when the outermost batch exits and
+        rolled back if it raises an exception.
+        """
+        if self._depth == 0:
+            self._conn.execute("BEGIN")
+
+        self._depth += 1
+        try:
+            yield self
+        except:
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("ROLLBACK")
+            raise
+
+        self._depth -= 1
+        if self._depth == 0:
+            self._conn.execute("COMMIT")
+
+    #-----------------------------------------------------------------------
+    def names(self):
+        """Return the names of the stored databases.
+
+        Returns:
+          list[str]:  The database names in sorted order.
+        """
+        rows = self._conn.execute("SELECT name FROM dbs ORDER BY name")
+        return [i[0] for i in rows]
+
+    #-----------------------------------------------------------------------
+    def read(self, path):
+        """Read a database.
+
+        Args:
+          path (str):  The database save path.
+
+        Returns:
+          dict:  Returns the database JSON data (see db.Device.to_json())
+          or None if the database doesn't exist.
+        """
+        name = self.name(path)
+        row = self._conn.execute("SELECT data FROM dbs WHERE name = ?",
+                                 (name,)).fetchone()
+        if row is None:
+            return None
+
+        data = json.loads(row[0])
+        rows = self._conn.execute("SELECT list, data FROM entries WHERE "
+                                  "name = ? ORDER BY pos", (name,))
+        for key, entry in rows:
+            data[key].append(json.loads(entry))
+
+        return data
+
+    #-----------------------------------------------------------------------
+    def write(self, path, data):
+        """Write a database.
+
+        This replaces the stored database in one transaction.
+
+        Args:
+          path (str):  The database save path.
+          data (dict):  The database JSON data (see db.Device.to_json()).
+        """
+        name = self.name(path)
+
+        # The entry lists are stored in the entries table.  Leave empty
+        # lists in the fields so read() can add the entries back.
+        fields = dict(data)
+        rows = []
+        for key in ENTRY_KEYS:
+            if key not in fields:
+                continue
+
+            for entry in fields[key]:
+                flags = entry.get('db_flags', entry)
+                addr = Address(entry['addr'])
+                rows.append((name, key, len(rows), addr.id, entry['group'],
+                             int(flags['is_controller']), json.dumps(entry)))
+            fields[key] = []
+
+        with self.batch():
+            self._conn.execute("INSERT OR REPLACE INTO dbs (name, data) "
+                               "VALUES (?, ?)", (name, json.dumps(fields)))
+            self._conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+            self._conn.executemany("INSERT INTO entries VALUES "
+                                   "(?, ?, ?, ?, ?, ?, ?)", rows)
+
+    #-----------------------------------------------------------------------
+    def delete(self, path):
+        """Delete a database.
+
+        Args:
+          path (str):  The database save path.
+        """
+        name = self.name(path)
+        with self.batch():
+            self._conn.execute("DELETE FROM dbs WHERE name = ?", (name,))
+            self._conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+
+    #-----------------------------------------------------------------------
+    def find_entries(self, addr=None, group=None, is_controller=None):
+        """Find entries in all of the stored databases.
+
+        Any input that is None is ignored.  The unused entries of device
+        databases are included.
+
+        Args:
+          addr (Address):  The address of the entries to find.
+          group (int):  The group of the entries to find.
+          is_controller (bool):  True to find controller entries, False to
+                        find responder entries.
+
+        Returns:
+          list[(str, dict)]:  Returns a list of the database name and the
+          entry JSON data for each matching entry.
+        """
+        where = []
+        args = []
+        if addr is not None:
+            where.append("addr = ?")
+            args.append(addr.id)
+        if group is not None:
+            where.append("grp = ?")
+            args.append(group)
+        if is_controller is not None:
+            where.append("is_controller = ?")
+            args.append(int(is_controller))
+
+        sql = "SELECT name, data FROM entries"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY name, pos"
+
+        rows = self._conn.execute(sql, args)
+        return [(name, json.loads(data)) for name, data in rows]
+
+    #-----------------------------------------------------------------------
+    def migrate(self, json_dir):
+        """Copy the JSON database files in a directory into the store.
+
+        Files that aren't databases are skipped.  The JSON files are not
+        changed.
+
+        Args:
+          json_dir (str):  The storage directory to read.
+
+        Returns:
+          int:  Returns the number of databases that were copied.
+        """
+        num = 0
+        with self.batch():
+            for file_name in sorted(os.listdir(json_dir)):
+                if not file_name.endswith(".json"):
+                    continue
+
+                path = os.path.join(json_dir, file_name)
+                try:
+                    with open(path) as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    LOG.exception("Error reading file %s", path)
+                    continue
+
+                if not isinstance(data, dict) or \
+                   not any(i in data for i in ENTRY_KEYS):
+                    LOG.warning("Skipping %s - not a database file", path)
+                    continue
+
+                self.write(path, data)
+                num += 1
+
+        return num
+
+    #-----------------------------------------------------------------------
+    @staticmethod
+    def name(path):
+        """Return the database name for a save path.
+
+        Args:
+          path (str):  The database save path.
+
+        Returns:
+          str:  The database name.  This is the file name without the .json
+          extension.
+        """
+        return os.path.splitext(os.path.basename(path))[0]
+
+    #-----------------------------------------------------------------------
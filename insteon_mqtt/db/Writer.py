@@ -0,0 +1,207 @@
+#===========================================================================
+#
+# Write-behind database persistence.
+#
+#===========================================================================
+import contextlib
+import time
+from ..Signal import Signal
+from .. import log
+from .SqliteStore import active_store
+
+LOG = log.get_logger()
+
+# The active writer.  When this is None, databases are written to disk as
+# soon as they're saved.  Use Writer.install() to set this.
+_ACTIVE = None
+
+
+def active_writer():
+    """Return the active write-behind Writer.
+
+    Returns:
+      Writer:  Returns the installed Writer object or None if databases
+      should be written immediately.
+    """
+    return _ACTIVE
+
+
+#===========================================================================
+class Writer:
+    """Write-behind persistence for the device and modem databases.
+
+    This is a polling only network "link" (see network.Stack).  Instead of
+    rewriting the database JSON file every time an entry changes, the
+    db.Device and db.Modem save() methods mark the database dirty here and
+    the writer flushes all of the dirty databases from the network loop.
+
+    A database is written once no changes have been made to it for `delay`
+    seconds so that a streaming database download becomes a single write.
+    The `max_delay` time is an upper bound on how long a changed database
+    can stay dirty if changes keep arriving.
+
+    Calling close() (or flush_all()) writes everything that is pending so no
+    changes are lost on shutdown.
+    """
+    def __init__(self, delay=2.0, max_delay=30.0):
+        """Constructor
+
+        Args:
+          delay (float):  Time in seconds to wait after the last change to
+                a database before writing it.
+          max_delay (float):  Maximum time in seconds a database can be
+                    dirty before it's written.
+        """
+        # Sent when the link is going down.  signature: (Link link)
+        self.signal_closing = Signal()
+
+        # The manager will emit this after the connection has been
+        # established and everything is ready.  Links should usually not emit
+        # this directly.  signature: (Link link, bool connected)
+        self.signal_connected = Signal()
+
+        self.delay = delay
+        self.max_delay = max_delay
+
+        # Map of database object -> [first dirty time, last dirty time].
+        self._dirty = {}
+
+    #-----------------------------------------------------------------------
+    def install(self):
+        """Make this the active writer used by the databases.
+        """
+        global _ACTIVE  # pylint: disable=global-statement
+        _ACTIVE = self
+
+    #-----------------------------------------------------------------------
+    def uninstall(self):
+        """Remove this writer as the active writer.
+
+        Any pending databases are written first.
+        """
+        global _ACTIVE  # pylint: disable=global-statement
+        self.flush_all()
+        if _ACTIVE is self:
+            _ACTIVE = None
+
+    #-----------------------------------------------------------------------
+    def __len__(self):
+        """Return the number of databases waiting to be written.
+        """
+        return len(self._dirty)
+
+    #-----------------------------------------------------------------------
+    def mark(self, db):
+        """Mark a database as dirty so it will be written later.
+
+        Args:
+          db:  The database (db.Device or db.Modem) to write.  It must have
+               a write() method.
+        """
+        t = time.time()
+        times = self._dirty.get(db, None)
+        if times is None:
+            self._dirty[db] = [t, t]
+        else:
+            times[1] = t
+
+    #-----------------------------------------------------------------------
+    def is_dirty(self, db):
+        """Return True if the database has changes that haven't been written.
+
+        Args:
+          db:  The database to check.
+        """
+        return db in self._dirty
+
+    #-----------------------------------------------------------------------
+    def flush(self, db):
+        """Write a database immediately if it has pending changes.
+
+        Args:
+          db:  The database to write.
+        """
+        if self._dirty.pop(db, None) is not None:
+            self._write(db)
+
+    #-----------------------------------------------------------------------
+    def flush_all(self):
+        """Write all of the databases with pending changes.
+        """
+        dirty = list(self._dirty.keys())
+        self._dirty.clear()
+        self._write_all(dirty)
+
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Periodic poll callback.
+
+        The manager will call this at recurring intervals.  Any database
+        that has been quiet for self.delay seconds or dirty for longer than
+        self.max_delay seconds is written.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        if not self._dirty:
+            return
+
+        ready = [db for db, (first, last) in self._dirty.items()
+                 if t - last >= self.delay or t - first >= self.max_delay]
+        for db in ready:
+            del self._dirty[db]
+        self._write_all(ready)
+
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the next time the link needs poll() to be called.
+
+        Returns:
+           float:  The earliest time a database needs to be written or None
+           if nothing is waiting.
+        """
+        if not self._dirty:
+            return None
+
+        return min(min(last + self.delay, first + self.max_delay)
+                   for first, last in self._dirty.values())
+
+    #-----------------------------------------------------------------------
+    def close(self):
+        """Close the link.
+
+        This writes all of the pending databases and then emits
+        signal_closing.
+        """
+        self.uninstall()
+        self.signal_closing.emit(self)
+
+    #-----------------------------------------------------------------------
+    def _write_all(self, dbs):
+        """Write a list of databases.
+
+        If a db.SqliteStore is installed, the databases are written in one
+        transaction.
+
+        Args:
+          dbs (list):  The databases to write.
+        """
+        store = active_store()
+        batch = store.batch() if store else contextlib.nullcontext()
+        with batch:
+            for db in dbs:
+                self._write(db)
+
+    #-----------------------------------------------------------------------
+    def _write(self, db):
+        """Write a database and log any errors.
+
+        Args:
+          db:  The database to write.
+        """
+        try:
+            db.write()
+        except:
+            LOG.exception("Error writing database %s", db.save_path)
+
+    #-----------------------------------------------------------------------
@@ -21,3 +21,5 @@ from .DeviceScanManagerI1 import DeviceScanManagerI1
 from .DeviceScanManagerI2 import DeviceScanManagerI2
 from .Modem import Modem
 from .ModemEntry import ModemEntry
+from .SqliteStore import SqliteStore, active_store, read_db, write_db
+from .Writer import Writer
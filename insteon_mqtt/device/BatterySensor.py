@@ -64,9 +64,10 @@ class BatterySensor(Base):
         # Sensor heartbeat signal.  API: func( Device, True )
         self.signal_heartbeat = Signal()
 
-        # Capture write messages as they FINISHED so we can pop the next
-        # message off the _send_queue
-        self.protocol.signal_msg_finished.connect(self.handle_finished)
+        # Capture write messages from this device as they FINISHED so we
+        # can pop the next message off the _send_queue
+        self.protocol.signal_addr_finished.connect(self.addr,
+                                                   self.handle_finished)
 
         # Derived classes can override these or add to them.  Maps Insteon
         # groups to message type for this sensor.
@@ -133,8 +134,8 @@ class BatterySensor(Base):
     def handle_finished(self, msg):
         """Handle write messages that are marked FINISHED
 
-        All FINISHED msgs are emitted here are, NOT just those from this
-        device.
+        Only FINISHED standard and extended msgs from this device are
+        emitted here (see Protocol.signal_addr_finished).
 
         This is used to pop a message off the _send_queue when the prior
         message FINISHES.  Notably messages that expire do not appear here
@@ -144,13 +145,8 @@ class BatterySensor(Base):
         Args:
           msg (msg):  A write message that was marked msg.FINISHED
         """
-        # Ignore modem messages, broadcast messages, only look for
-        # communications from the device
-        if isinstance(msg, (Msg.InpStandard, Msg.InpExtended)):
-            # Is this a message from this device?
-            if msg.from_addr == self.addr:
-                # Pop messages from _send_queue if necessary
-                self._pop_send_queue()
+        # Pop messages from _send_queue if necessary
+        self._pop_send_queue()
 
     #-----------------------------------------------------------------------
     def handle_broadcast(self, msg):
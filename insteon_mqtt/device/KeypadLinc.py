@@ -76,10 +76,10 @@ class KeypadLinc(Scene, Backlight, ManualCtrl, ResponderBase):
         # button (1 on 8 btn and 1,2,7,8 on 6 btn), cannot be controlled by
         # changing the led state - only toggling the load changes the state.
         # Since the non-load buttons have nothing to switch, the led state is
-        # the state of the switch.
-        self._led_bits = self.db.get_meta('led_bits')
-        if self._led_bits is None:
-            self._led_bits = 0x00
+        # the state of the switch.  This is read from the database meta
+        # data the first time it's used (see _led_bits) so the database
+        # isn't loaded here.
+        self._led_bits_value = None
 
         # 1 if the load is attached to the normal first button.  If the load
         # is detached, this will be group 9.
@@ -112,6 +112,28 @@ class KeypadLinc(Scene, Backlight, ManualCtrl, ResponderBase):
                                    'signal_bits': self.set_signal_bits,
                                    'nontoggle_bits': self.set_nontoggle_bits})
 
+    #-----------------------------------------------------------------------
+    @property
+    def _led_bits(self):
+        """The LED bits for buttons 1-8.
+
+        This is read from the database meta data on first use.
+        """
+        if self._led_bits_value is None:
+            bits = self.db.get_meta('led_bits')
+            self._led_bits_value = 0x00 if bits is None else bits
+        return self._led_bits_value
+
+    #-----------------------------------------------------------------------
+    @_led_bits.setter
+    def _led_bits(self, value):
+        """Set the LED bits for buttons 1-8.
+
+        Args:
+          value (int):  The LED bits.
+        """
+        self._led_bits_value = value
+
     #-----------------------------------------------------------------------
     @property
     def on_off_ramp_supported(self):
@@ -3,7 +3,6 @@
 # Base device class
 #
 #===========================================================================
-import json
 import functools
 import os.path
 from ..MsgHistory import MsgHistory
@@ -146,9 +145,11 @@ class Base:
         if self.name:
             self.label += " (%s)" % self.name
 
+        # The all link database is loaded from the save path the first time
+        # it's used (see the db property) so startup doesn't have to read
+        # every database before the devices are usable.
         self.save_path = modem.save_path
-        self.db = db.Device(self.addr, None, self)
-        self.load_db()
+        self._db = None
 
         # Config db is initiated by Scenes
         self.db_config = None
@@ -284,33 +285,63 @@ class Base:
         """
         return os.path.join(self.save_path, self.addr.hex) + ".json"
 
+    #-----------------------------------------------------------------------
+    @property
+    def db(self):
+        """The device all link database (db.Device).
+
+        The database is loaded with load_db() the first time this is used.
+        """
+        if self._db is None:
+            self.load_db()
+        return self._db
+
+    #-----------------------------------------------------------------------
+    @db.setter
+    def db(self, value):
+        """Set the device all link database.
+
+        Args:
+          value (db.Device):  The database to use.
+        """
+        self._db = value
+
+    #-----------------------------------------------------------------------
+    @property
+    def db_loaded(self):
+        """True if the all link database has been loaded.
+        """
+        return self._db is not None
+
     #-----------------------------------------------------------------------
     def load_db(self):
         """Load the all link database from a file.
 
         The file is stored in JSON format (by save_db()) and has the path
-        self.db_path().  If the file doesn't exist, nothing is done.
+        self.db_path().  If a db.SqliteStore is installed, the database is
+        read from it instead.  If the database doesn't exist, an empty
+        database is used.
+
+        This is called the first time the db attribute is used so it
+        normally doesn't need to be called directly.
         """
-        # See if the database file exists.
         path = self.db_path()
-        self.db.set_path(path)
-        if not os.path.exists(path):
-            LOG.debug("Device %s db doesn't exist", self.label)
-            return
-
+        self._db = db.Device(self.addr, path, self)
         try:
             LOG.debug("Device %s reading db file", self.label)
-            with open(path) as f:
-                data = json.load(f)
+            data = db.read_db(path)
+            if data is None:
+                LOG.debug("Device %s db doesn't exist", self.label)
+                return
 
-            self.db = db.Device.from_json(data, path, self)
+            self._db = db.Device.from_json(data, path, self)
         except:
             LOG.exception("Error reading file %s", path)
             return
 
         LOG.info("Device %s database loaded %s entries", self.label,
-                 len(self.db))
-        LOG.debug("%s", self.db)
+                 len(self._db))
+        LOG.debug("%s", self._db)
 
     #-----------------------------------------------------------------------
     def print_db(self, on_done):
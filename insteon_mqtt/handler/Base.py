@@ -7,6 +7,7 @@ import time
 from .. import log
 from .. import message as Msg
 from .. import util
+from ..WriteQueue import Priority
 
 LOG = log.get_logger()
 
@@ -23,14 +24,23 @@ class Base:
     time out behavior they want.  The Protocol will update_expire_time()
     whenever message traffic is received by this handler so that a series of
     messages won't cause the time out to trigger.  If num_retry is set, then
-    a message will be retried that many times after a time out.
+    a message will be retried that many times after a time out.  The
+    Protocol also sets the transport latency of the link (see
+    set_transport_latency()) which is added to the time out.
 
     Callbacks: most handlers have a "when finished" callback which is run
     when the message sequence is finished.  For convenience, this on_done
     callback is stored in the base class.  The API for the callback is
     always:
        on_done( bool success, str message, data )
+
+    Priority: the priority attribute sets which Protocol write queue lane
+    the handler messages are sent in.  Handlers for refreshes and database
+    traffic override this so user commands are sent before them.
     """
+    # Protocol write queue lane for the handler messages.
+    priority = Priority.INTERACTIVE
+
     #-----------------------------------------------------------------------
     def __init__(self, on_done=None, num_retry=0, time_out=5):
         """Constructor
@@ -50,6 +60,9 @@ class Base:
         self._time_out = time_out
         self._expire_time = None
 
+        # Extra time in seconds the link adds to replies.
+        self._latency = 0
+
         # Retry variables.  The message to retry will get set in the
         # sending_message callback.
         self._num_sent = 0
@@ -73,6 +86,19 @@ class Base:
         """
         self._num_retry = retry_num
 
+    #-----------------------------------------------------------------------
+    def set_transport_latency(self, latency):
+        """Set the extra time the link adds to replies.
+
+        Protocol calls this before sending the message.  Links like the Hub
+        which are polled for replies add this much time to each reply so it
+        is added to the time out.
+
+        Args:
+           latency (float):  The time in seconds.
+        """
+        self._latency = latency
+
     #-----------------------------------------------------------------------
     def sending_message(self, msg):
         """Messaging being sent callback.
@@ -92,6 +118,22 @@ class Base:
         # Update the expiration time.
         self.update_expire_time()
 
+    #-----------------------------------------------------------------------
+    def reply_addr(self):
+        """Return the address the rest of the replies will come from.
+
+        Protocol calls this when the handler returns Msg.CONTINUE to see if
+        it can park the handler and send the next message while this one
+        waits for replies (see Protocol.max_pipeline).  This should only
+        return an address if every reply still expected is a standard or
+        extended message from that device.
+
+        Returns:
+          Address:  The device address or None if the handler can't be
+          parked.
+        """
+        return None
+
     #-----------------------------------------------------------------------
     def stop_retry(self):
         """Stop any more retries of sending the message.
@@ -104,7 +146,17 @@ class Base:
 
         This resets the time out time to record that we saw a valid message.
         """
-        self._expire_time = time.time() + self._time_out
+        self._expire_time = time.time() + self._time_out + self._latency
+
+    #-----------------------------------------------------------------------
+    def get_expire_time(self):
+        """Return the time at which the handler will time out.
+
+        Returns:
+          float:  The Unix clock time tag of the time out or None if the
+          message hasn't been sent yet.
+        """
+        return self._expire_time
 
     #-----------------------------------------------------------------------
     def is_expired(self, protocol, t):
@@ -111,7 +111,7 @@ class Broadcast(Base):
             else:
                 # This is the initial broadcast or an echo of it.
                 if self._should_process(msg, wait_time):
-                    return self._process(msg, protocol, wait_time)
+                    return self._process(msg, protocol, device, wait_time)
                 else:
                     return Msg.CONTINUE
 
@@ -121,7 +121,7 @@ class Broadcast(Base):
         # trigger the scene.
         elif msg.flags.type == Msg.Flags.Type.ALL_LINK_CLEANUP:
             if self._should_process(msg, wait_time):
-                return self._process(msg, protocol, wait_time)
+                return self._process(msg, protocol, device, wait_time)
             else:
                 return Msg.CONTINUE
 
@@ -129,19 +129,21 @@ class Broadcast(Base):
         return Msg.UNKNOWN
 
     #-----------------------------------------------------------------------
-    def _process(self, msg, protocol, wait_time):
+    def _process(self, msg, protocol, device, wait_time):
         """Process the all link broadcast message.
 
         Args:
           msg (Msg.InpStandard):  Message to handle.
+          protocol (Protocol):  The Insteon Protocol object
+          device:  The device that sent the message or None if it's unknown.
+          wait_time (float):  Time in seconds to wait for the cleanup
+                    messages.
 
         Returns:
           Msg.UNKNOWN if we can't handle this message.
           Msg.CONTINUE if we handled the message and expect more.
           Msg.FINISHED if we handled the message and are done.
         """
-        # Find the device that sent the message.
-        device = self.modem.find(msg.from_addr)
         if not device:
             LOG.error("Unknown broadcast device %s", msg.from_addr)
             return Msg.UNKNOWN
@@ -5,6 +5,7 @@
 #===========================================================================
 from .. import log
 from .. import message as Msg
+from ..WriteQueue import Priority
 from .Base import Base
 
 LOG = log.get_logger()
@@ -18,6 +19,8 @@ class DeviceDbModify(Base):
     modifications to the device's all link database class to reflect what
     happened on the physical device.
     """
+    priority = Priority.BULK
+
     def __init__(self, device_db, entry, on_done=None, num_retry=3):
         """Constructor
 
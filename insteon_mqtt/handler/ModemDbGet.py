@@ -5,6 +5,7 @@
 #===========================================================================
 from .. import log
 from .. import message as Msg
+from ..WriteQueue import Priority
 from .. import util
 from .Base import Base
 
@@ -22,6 +23,8 @@ class ModemDbGet(Base):
 
     Each reply is used to update the modem class's database records.
     """
+    priority = Priority.BULK
+
     def __init__(self, modem_db, on_done=None):
         """Constructor
 
@@ -66,7 +69,7 @@ class ModemDbGet(Base):
                 LOG.ui("Modem database download complete:\n%s", str(self.db))
 
                 # Save the database to a local file.
-                self.db.save()
+                self.db.save(force=True)
 
                 self.on_done(True, "Database download complete", None)
                 return Msg.FINISHED
@@ -5,6 +5,7 @@
 #===========================================================================
 from .. import log
 from .. import message as Msg
+from ..WriteQueue import Priority
 from .. import util
 from .Base import Base
 
@@ -24,6 +25,8 @@ class ModemDbModify(Base):
     add_update().  When a command is finished, the next command in the queue
     will be sent.  If any command fails, the sequence stops.
     """
+    priority = Priority.BULK
+
     def __init__(self, modem_db, entry, existing_entry=None, on_done=None):
         """Constructor
 
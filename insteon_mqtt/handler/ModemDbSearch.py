@@ -5,6 +5,7 @@
 #===========================================================================
 from .. import log
 from .. import message as Msg
+from ..WriteQueue import Priority
 from .. import util
 from .Base import Base
 
@@ -26,6 +27,8 @@ class ModemDbSearch(Base):
     After an ack, the entry will be returned in a seperate message. Each entry
     is added to the end of the modem class's database records.
     """
+    priority = Priority.BULK
+
     def __init__(self, modem_db, on_done=None):
         """Constructor
 
@@ -74,7 +77,7 @@ class ModemDbSearch(Base):
                 LOG.info("Modem database search complete.")
 
                 # Save the database to a local file.
-                self.db.save()
+                self.db.save(force=True)
 
                 self.on_done(True, "Database search complete", None)
                 return Msg.FINISHED
@@ -119,3 +119,16 @@ class StandardCmd(Base):
         return Msg.UNKNOWN
 
     #-----------------------------------------------------------------------
+    def reply_addr(self):
+        """Return the address the rest of the replies will come from.
+
+        Once the PLM has ACK'ed the message, the only reply left is the
+        device ACK so the handler can be parked.
+
+        Returns:
+          Address:  The device address or None if the PLM ACK hasn't been
+          seen yet.
+        """
+        return self.addr if self._PLM_ACK else None
+
+    #-----------------------------------------------------------------------
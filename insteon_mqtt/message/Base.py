@@ -13,6 +13,10 @@ class Base:
     """
     msg_code = None  # set to the message ID byte.
 
+    # Derived classes which are created for every received message use
+    # __slots__ to keep them small.  This makes that possible.
+    __slots__ = ()
+
     # Read message size (including ack/nak byte).  Derived types should set
     # this if the message has fixed size otherwise implement msg_size().
     fixed_msg_size = None
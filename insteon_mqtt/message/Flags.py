@@ -24,6 +24,9 @@ class Flags:
         CLEANUP_ACK = 0b011
         CLEANUP_NAK = 0b111
 
+    __slots__ = ["type", "is_ext", "hops_left", "max_hops", "is_nak",
+                 "is_broadcast"]
+
     #-----------------------------------------------------------------------
     @classmethod
     def from_bytes(cls, raw, offset=0):
@@ -113,6 +116,14 @@ class Flags:
                 self.type == rhs.type and
                 self.is_ext == rhs.is_ext)
 
+    #-----------------------------------------------------------------------
+    def __hash__(self):
+        """Return the flags hash.
+
+        This ignores the hops_left and max_hops fields to match __eq__.
+        """
+        return hash((self.type, self.is_ext))
+
     #-----------------------------------------------------------------------
     def __str__(self):
         return "%s%s mh:%s hl:%s" % (self.type,
@@ -24,6 +24,9 @@ class InpStandard(Base):
     msg_code = 0x50
     fixed_msg_size = 11
 
+    __slots__ = ["from_addr", "to_addr", "flags", "cmd1", "cmd2", "group",
+                 "expire_time"]
+
     # NAK types
     class NakType(enum.IntEnum):
         SENDER_NOT_IN_DB = 0xFF
@@ -160,6 +163,16 @@ class InpStandard(Base):
                 self.cmd2 == rhs.cmd2)
 
     #-----------------------------------------------------------------------
+    def __hash__(self):
+        """Return the message hash.
+
+        This uses the same fields as __eq__ so the messages can be used in
+        sets and dicts to find duplicates.
+        """
+        return hash((self.from_addr.id, self.flags.type, self.flags.is_ext,
+                     self.group, self.cmd1, self.cmd2))
+
+    #-----------------------------------------------------------------------
 
 #===========================================================================
 
@@ -175,6 +188,9 @@ class InpExtended(Base):
     msg_code = 0x51
     fixed_msg_size = 25
 
+    __slots__ = ["from_addr", "to_addr", "flags", "cmd1", "cmd2", "data",
+                 "group", "expire_time"]
+
     #-----------------------------------------------------------------------
     @classmethod
     def from_bytes(cls, raw):
@@ -275,5 +291,15 @@ class InpExtended(Base):
                 self.data == rhs.data)
 
     #-----------------------------------------------------------------------
+    def __hash__(self):
+        """Return the message hash.
+
+        This uses the same fields as __eq__ so the messages can be used in
+        sets and dicts to find duplicates.
+        """
+        return hash((self.from_addr.id, self.flags.type, self.flags.is_ext,
+                     self.group, self.cmd1, self.cmd2, bytes(self.data)))
+
+    #-----------------------------------------------------------------------
 
 #===========================================================================
@@ -137,7 +137,8 @@ class Dimmer(topic.StateTopic, topic.SceneTopic, topic.ManualTopic,
             reason = data.get("reason", "")
 
             # Tell the device to change its level.
-            self.device.set(is_on=is_on, level=level, mode=mode, reason=reason)
+            self.mqtt.scene_batch.set(self.device, is_on=is_on, level=level,
+                                      mode=mode, reason=reason)
         except:
             LOG.exception("Invalid dimmer command: %s", data)
 
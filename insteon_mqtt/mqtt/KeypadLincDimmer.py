@@ -142,7 +142,8 @@ class KeypadLincDimmer(KeypadLinc):
             if level is not None:
                 level = int(level)
             reason = data.get("reason", "")
-            self.device.set(is_on=is_on, level=level, mode=mode,
-                            reason=reason, transition=transition)
+            self.mqtt.scene_batch.set(self.device, is_on=is_on, level=level,
+                                      mode=mode, reason=reason,
+                                      transition=transition)
         except:
             LOG.error("Invalid KeypadLinc level command: %s", data)
@@ -9,7 +9,8 @@ import logging
 from .. import log
 from . import config
 from .MsgTemplate import MsgTemplate
-from .Reply import Reply
+from ..Reply import Reply
+from .SceneBatch import SceneBatch
 
 LOG = log.get_logger()
 
@@ -87,6 +88,10 @@ class Mqtt:
         self.qos = 1
         self.retain = True
 
+        # Device set commands are passed through this so they can be sent
+        # as modem scenes.
+        self.scene_batch = SceneBatch(modem)
+
         # Loaded config object.
         self._config = None
 
@@ -107,6 +112,9 @@ class Mqtt:
         - retain:      (bool) Retain sent messages (Default True)
         - cmd_topic:   (str) The MQTT topic prefix to subscribe to for
                        system commands.
+        - scene_batch_time:  (float) Time in seconds to collect device set
+                       commands for to see if they match a modem scene
+                       (Default 0 which turns this off).
 
         Args:
           data (dict):  Configuration data to load.
@@ -144,6 +152,8 @@ class Mqtt:
         # MQTT message parameters.
         self.qos = data.get('qos', self.qos)
         self.retain = data.get('retain', self.retain)
+        self.scene_batch.window = data.get('scene_batch_time',
+                                           self.scene_batch.window)
 
         # Save the config for later passing to devices when they are created.
         self._config = data
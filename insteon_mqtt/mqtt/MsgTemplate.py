@@ -15,7 +15,14 @@ class MsgTemplate:
 
     This class stores a topic and payload jinja2 template for use in
     formatting and parsing MQTT messages.
+
+    Compiled templates are cached by their source text and shared by all
+    the instances since most devices use the same templates.
     """
+    # Shared jinja environment and map of template source -> compiled
+    # jinja2.Template.
+    _env = jinja2.Environment()
+    _cache = {}
 
     @staticmethod
     def clean_topic(topic):
@@ -36,6 +43,31 @@ class MsgTemplate:
 
         return topic.strip()
 
+    #-----------------------------------------------------------------------
+    @staticmethod
+    def compile_template(source):
+        """Return the compiled template for a source string.
+
+        Templates are only compiled the first time a source string is seen.
+        Compiled templates can be shared since rendering doesn't change
+        them.
+
+        Arg:
+          source (str):  The jinja2 template source.
+
+        Returns:
+          jinja2.Template:  Returns the compiled template.
+
+        Raises:
+          jinja2.exceptions.TemplateSyntaxError if the template is invalid.
+        """
+        template = MsgTemplate._cache.get(source, None)
+        if template is None:
+            template = MsgTemplate._env.from_string(source)
+            MsgTemplate._cache[source] = template
+
+        return template
+
     #-----------------------------------------------------------------------
     def __init__(self, topic, payload, qos=0, retain=None):
         """Constructor
@@ -52,10 +84,12 @@ class MsgTemplate:
 
         # Keep the original string around for better log and error messages.
         self.topic_str = topic
-        self.topic = None if topic is None else jinja2.Template(topic)
+        self.topic = None if topic is None else self.compile_template(topic)
 
         self.payload_str = payload
-        self.payload = None if payload is None else jinja2.Template(payload)
+        self.payload = None
+        if payload is not None:
+            self.payload = self.compile_template(payload)
 
     #-----------------------------------------------------------------------
     def load_config(self, config, topic, payload, qos=None):
@@ -79,12 +113,12 @@ class MsgTemplate:
         template = config.get(topic, None)
         if template is not None:
             self.topic_str = template
-            self.topic = jinja2.Template(template)
+            self.topic = self.compile_template(template)
 
         template = config.get(payload, None)
         if template is not None:
             self.payload_str = template
-            self.payload = jinja2.Template(template)
+            self.payload = self.compile_template(template)
 
     #-----------------------------------------------------------------------
     def render_topic(self, data, silent=False):
@@ -0,0 +1,221 @@
+#===========================================================================
+#
+# MQTT set command batching using modem scenes.
+#
+#===========================================================================
+import collections
+import time
+from .. import log
+from .. import on_off
+
+LOG = log.get_logger()
+
+# Set command for one device.
+SetCmd = collections.namedtuple('SetCmd', ['device', 'is_on', 'level',
+                                           'group', 'mode', 'transition',
+                                           'reason'])
+
+
+class SceneBatch:
+    """Batches MQTT set commands into modem scenes.
+
+    Home automation systems often change many devices at the same time
+    (turning on all the lights in a room, all off at night, etc).  Each set
+    command is a separate direct message to the device so the devices
+    change one after another.
+
+    When batching is on (window > 0), set commands are held for window
+    seconds.  If the commands that arrive in that time exactly match a
+    virtual modem scene (the modem is the controller of every device in
+    the scene and no others and the device responder entries give each
+    device the commanded state), the scene is sent instead which changes
+    all of the devices with one broadcast.  Otherwise the commands are sent
+    to the devices as usual.
+
+    Only normal on/off commands without a transition or reason can be
+    batched since scenes don't support them.  Other commands are sent right
+    away.
+    """
+    #-----------------------------------------------------------------------
+    def __init__(self, modem):
+        """Constructor
+
+        Args:
+          modem (Modem):  The Insteon modem.  This is used to find the
+                scenes, send scene commands, and schedule the batch.
+        """
+        self.modem = modem
+
+        # Time in seconds to collect commands for.  0 to turn batching off.
+        self.window = 0
+
+        # (Address.id, group) -> SetCmd of the commands being collected
+        # and the TimedCall handle of the flush() call.
+        self._cmds = {}
+        self._timer = None
+
+    #-----------------------------------------------------------------------
+    def set(self, device, is_on=None, level=None, group=None,
+            mode=on_off.Mode.NORMAL, transition=None, reason=""):
+        """Set the state of a device.
+
+        The arguments are the same as the device set() method.  If the
+        command can't be batched, device.set() is called right away.
+
+        Args:
+          device:  The Insteon device to command.
+          is_on (bool): True to turn on, False for off
+          level (int): If non zero, turn the device on.
+          group (int): The group to send the command to.  None to use the
+                device default.
+          mode (on_off.Mode): The type of command to send (normal, fast, etc).
+          transition (int): The transition ramp_rate if supported.
+          reason (str):  The reason the command was sent.
+        """
+        cmd = SetCmd(device, is_on, level, group, mode, transition, reason)
+        if (self.window <= 0 or mode != on_off.Mode.NORMAL or
+                transition is not None or reason):
+            self._send(cmd)
+            return
+
+        # A later command to the same device replaces the earlier one.
+        key = (device.addr.id, self._local_group(device, group))
+        self._cmds.pop(key, None)
+        self._cmds[key] = cmd
+
+        if self._timer is None:
+            self._timer = self.modem.timed_call.add(time.time() + self.window,
+                                                    self.flush)
+
+    #-----------------------------------------------------------------------
+    def flush(self):
+        """Send the collected commands.
+
+        This is called when the batch window ends.
+        """
+        cmds, self._cmds = self._cmds, {}
+        self._timer = None
+        if not cmds:
+            return
+
+        scene = self.find_scene(cmds) if len(cmds) > 1 else None
+        if scene is not None:
+            group, is_on = scene
+            LOG.info("Sending %d set commands as modem scene %s %s",
+                     len(cmds), group, "on" if is_on else "off")
+            self.modem.scene(is_on, group=group)
+            return
+
+        for cmd in cmds.values():
+            self._send(cmd)
+
+    #-----------------------------------------------------------------------
+    def find_scene(self, cmds):
+        """Find the modem scene that matches a set of commands.
+
+        Args:
+          cmds (dict):  (Address.id, group) -> SetCmd of the commands.
+
+        Returns:
+          (int, bool):  The modem group and on/off scene command that gives
+          every device the commanded state or None if there isn't one.
+        """
+        db = self.modem.db
+
+        # Only the groups that have exactly these devices can match.
+        groups = None
+        for cmd in cmds.values():
+            found = set(e.group for e in db.find_all(cmd.device.addr,
+                                                     is_controller=True))
+            groups = found if groups is None else groups & found
+            if not groups:
+                return None
+
+        for group in sorted(groups):
+            responders = db.find_group(group)
+            if len(responders) != len(cmds):
+                continue
+
+            for is_on in (True, False):
+                if self._is_match(cmds, group, responders, is_on):
+                    return group, is_on
+
+        return None
+
+    #-----------------------------------------------------------------------
+    def _is_match(self, cmds, group, responders, is_on):
+        """Check if a modem scene gives the commanded states.
+
+        Args:
+          cmds (dict):  (Address.id, group) -> SetCmd of the commands.
+          group (int):  The modem group.
+          responders ([ModemEntry]):  The modem db entries for the group.
+          is_on (bool):  True for a scene on command, False for off.
+
+        Returns:
+          bool:  True if the scene command gives every device the state it
+          was commanded to.
+        """
+        seen = set()
+        for responder in responders:
+            device = self.modem.find(responder.addr)
+            # Only devices that respond to scenes have a local group.
+            if device is None or \
+               not hasattr(device, "group_cmd_local_group"):
+                return False
+
+            entry = device.db.find(self.modem.addr, group,
+                                   is_controller=False)
+            if entry is None:
+                return False
+
+            key = (device.addr.id, device.group_cmd_local_group(entry))
+            cmd = cmds.get(key)
+            if cmd is None or key in seen:
+                return False
+            seen.add(key)
+
+            # Same test as device.set() for on vs off.
+            cmd_on = bool(cmd.is_on or cmd.level)
+            if device.group_cmd_on_off(entry, is_on) != cmd_on:
+                return False
+
+            # Dimmers go to the level in the responder entry so the command
+            # must have the same level.
+            level = device.group_cmd_on_level(entry, is_on)
+            if cmd_on and level is not None and cmd.level != level:
+                return False
+
+        return True
+
+    #-----------------------------------------------------------------------
+    def _local_group(self, device, group):
+        """Return the device group a command changes.
+
+        Args:
+          device:  The Insteon device.
+          group (int):  The command group or None for the default.
+
+        Returns:
+          int:  The group.  Group 0 and None are the load group.
+        """
+        if not group:
+            return getattr(device, "_load_group", 0x01)
+        return group
+
+    #-----------------------------------------------------------------------
+    def _send(self, cmd):
+        """Send a command to the device.
+
+        Args:
+          cmd (SetCmd):  The command to send.
+        """
+        kwargs = {}
+        if cmd.group is not None:
+            kwargs["group"] = cmd.group
+
+        cmd.device.set(is_on=cmd.is_on, level=cmd.level, mode=cmd.mode,
+                       transition=cmd.transition, reason=cmd.reason,
+                       **kwargs)
+
+    #-----------------------------------------------------------------------
@@ -33,7 +33,7 @@ from .Mqtt import Mqtt
 from .MsgTemplate import MsgTemplate
 from .Outlet import Outlet
 from .Remote import Remote
-from .Reply import Reply
+from ..Reply import Reply
 from .SmokeBridge import SmokeBridge
 from .Switch import Switch
 from .Thermostat import Thermostat
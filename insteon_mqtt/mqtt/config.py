@@ -12,7 +12,7 @@ with it.
 
 #===========================================================================
 from .. import device
-from ..Modem import Modem
+from ..ModemImpl import Modem
 from .BatterySensor import BatterySensor
 from .Dimmer import Dimmer
 from .EZIO4O import EZIO4O
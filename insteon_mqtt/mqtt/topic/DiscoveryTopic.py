@@ -246,7 +246,7 @@ class DiscoveryTopic(BaseTopic):
 
         # Finally, render the device_info_template
         try:
-            device_info_template = jinja2.Template(
+            device_info_template = MsgTemplate.compile_template(
                 json.dumps(self.device_info_template, indent=2)
             )
             data['device_info'] = device_info_template.render(data)
@@ -302,7 +302,7 @@ class DiscoveryTopic(BaseTopic):
         ret = None
         # First render template
         try:
-            config_template = jinja2.Template(config)
+            config_template = MsgTemplate.compile_template(config)
             config_rendered = config_template.render(data)
         except jinja2.exceptions.TemplateError as exc:
             LOG.error("Error rendering config template: %s", exc)
@@ -147,8 +147,9 @@ class SetTopic(BaseTopic):
             is_on, mode, transition = util.parse_on_off(data)
             level = data.get("level", None)
             reason = data.get("reason", "")
-            self.device.set(is_on=is_on, level=level, group=group, mode=mode,
-                            transition=transition, reason=reason)
+            self.mqtt.scene_batch.set(self.device, is_on=is_on, level=level,
+                                      group=group, mode=mode,
+                                      transition=transition, reason=reason)
         except:
             LOG.exception("Invalid SetTopic command: %s", data)
 
@@ -3,7 +3,6 @@
 # Insteon Hub class definition.
 #
 #===========================================================================
-import xml.etree.ElementTree as ET
 import time
 import threading
 import queue
@@ -12,6 +11,7 @@ import requests
 
 from ..Signal import Signal
 from .. import log
+from .HubBuffer import HubBuffer
 #from .Link import Link
 
 LOG = log.get_logger(__name__)
@@ -31,6 +31,11 @@ class Hub():
     read_buf_size = 4096
     max_write_queue = 500
 
+    # Time in seconds between polls to check for data read by the HubClient
+    # before it's started.  After that, the HubClient read rate is used
+    # (see HubClient.poll_dt()).
+    read_dt = 0.5
+
     def __init__(self, ip=None, port='25105', user=None, password=None):
         """Constructor.  Mostly just defines some attributes that are expected
         but un-needed.  The HubClient is started in poll().
@@ -56,6 +61,9 @@ class Hub():
 
         self.client = None
 
+        # Time of the last poll() call.
+        self._last_poll = 0
+
         # List of packets to write.  Each is a tuple of (bytes, time) where
         # the time is the time after which to do the write.
         self._write_buf = []
@@ -119,6 +127,7 @@ class Hub():
         Args:
            t (float):  Current Unix clock time tag.
         """
+        self._last_poll = t
         if self.client is None:
             # To allow config to load, this is run on the first loop
             self.client = HubClient(self._ip, self._port, self._user,
@@ -126,6 +135,32 @@ class Hub():
         self._read_from_hub()
         self._write_to_hub(t)
 
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the next time the link needs poll() to be called.
+
+        Returns:
+           float:  The earlier of the next read check and the time the next
+           queued message can be written.
+        """
+        dt = self.read_dt if self.client is None else self.client.poll_dt()
+        t = self._last_poll + dt
+        if self._write_buf:
+            t = min(t, self._write_buf[0][1]())
+        return t
+
+    #-----------------------------------------------------------------------
+    def transport_latency(self):
+        """Return the extra time the link adds to replies.
+
+        The Hub has to be polled over HTTP to see replies so they take
+        longer to arrive than with a serial PLM.
+
+        Returns:
+           float:  The time in seconds to add to message time outs.
+        """
+        return 0 if self.client is None else self.client.latency()
+
     #-----------------------------------------------------------------------
     def _read_from_hub(self):
         """Read data from the hub
@@ -181,6 +216,27 @@ class Hub():
 
 
 class HubClient:
+    """HTTP client for the Hub which runs in its own thread.
+
+    The Hub buffer is read using a persistent (keep-alive) HTTP session so
+    each read doesn't open a new connection.  Messages to write are sent as
+    soon as they are queued instead of waiting for the next buffer read.
+
+    After a write or after new data is read (replies usually follow), the
+    buffer is read in a burst: the first read is burst_dt seconds later and
+    the interval doubles after each read with no new data up to fast_dt.
+    This continues for fast_time seconds after the last activity and then
+    the buffer is read every idle_dt seconds.
+    """
+    # Buffer read intervals in seconds.  The idle rate must be fast enough
+    # that the Hub buffer doesn't overflow between reads.
+    burst_dt = 0.05
+    fast_dt = 0.2
+    idle_dt = 0.5
+
+    # Time in seconds to use the fast read rate after activity.
+    fast_time = 3.0
+
     def __init__(self, ip, port, user, password):
         """Constructor.
 
@@ -199,28 +255,48 @@ class HubClient:
         self._read_queue = queue.Queue()
         self._write_queue = queue.Queue()
         self.read_timeout_count = 0
-        self._prev_bytestring = ''
-        self._prev_byte_end = -1
-        # My current hub uses a 200 character buffer, not sure if any other
-        # lengths could or do exists, this would have to adjusted if they
-        # do.
-        self.buff_length = 200
-
-        # This is the length of chracters that must be matched for this to be
-        # deemed a valid message.  10 characters which results in 5 bytes, is
-        # only 5% of the buffer.  Too small a number, and we could pass
-        # incorrect messages if the buffer "overflows" before we read it.
-        # To large a number and more "overflows" will occur as we have less
-        # usable buffer length
-        self.verify_length = 10
+        # Hub ring buffer reader.
+        self._buffer = HubBuffer(ip)
+
+        # Persistent HTTP session so the connection to the Hub is reused.
+        self._session = requests.Session()
+        self._session.auth = requests.auth.HTTPBasicAuth(user, password)
+
+        # Use the burst read rate until this time and the current burst
+        # read interval.
+        self._fast_until = 0
+        self._read_dt = self.burst_dt
+
+        # Average time in seconds for a HTTP request to the Hub.
+        self._request_dt = None
+
+        # Set to wake the thread when there is a message to write.
+        self._wake = threading.Event()
 
         # Fire up the Client Thread
-        threading.Thread(target=self._thread).start()
+        self.thread = threading.Thread(target=self._thread)
+        self.thread.start()
 
     def close(self):
         '''Terminates the HubClient thread on the next loop.
         '''
         self._close = True
+        self._wake.set()
+
+    def poll_dt(self):
+        '''Returns the current time in seconds between buffer reads.
+        '''
+        if time.time() < self._fast_until:
+            return self._read_dt
+        return self.idle_dt
+
+    def latency(self):
+        '''Returns the extra time in seconds the Hub adds to a reply.
+
+        This is the time to send the message to the Hub plus the time to
+        read the reply back from the buffer.
+        '''
+        return 2 * (self._request_dt or 0) + self.fast_dt
 
     def has_read_data(self):
         '''Returns True if there is incoming data to be read.
@@ -245,59 +321,86 @@ class HubClient:
           bytes (bytearray): This should represent a complete message.
         '''
         self._write_queue.put(bytes)
+        self._wake.set()
 
     def _thread(self):
         '''This runs in its own thread.  It constantly loops until the main
         thread is terminated or self.close() is called.
         '''
+        next_read = 0
         while threading.main_thread().is_alive() and not self._close:
+            # Write every message that is waiting and start a burst of reads
+            # to get the replies.
+            if not self._write_queue.empty():
+                while not self._write_queue.empty():
+                    self._perform_write()
+                next_read = min(next_read, time.time() + self.burst_dt)
+
             start_time = time.time()
+            if start_time >= next_read:
+                self._read_buffer()
+
+                next_read = start_time + self.poll_dt()
+                elapsed = time.time() - start_time
+                if elapsed > 2:
+                    LOG.warning('Hub %s loop took %s to complete', self.ip,
+                                round(elapsed, 2))
+
+            # Wait for the next read or for a message to write.  Writes wake
+            # the loop right away.
+            timeout = next_read - time.time()
+            if timeout > 0:
+                self._wake.wait(timeout)
+                self._wake.clear()
+
+    def _read_buffer(self):
+        '''Reads the Hub buffer and queues any new data.
+        '''
+        response = self._get_hub_buffer()
+        if not response:
+            # Error reading the buffer pause slightly before looping
+            time.sleep(.1)
+            return
+
+        # reset on successful read
+        self.read_timeout_count = 0
+
+        data = self._buffer.update(response.content)
+        if data:
+            self._read_queue.put(data)
+
+            # Replies often come in several parts so read quickly for a
+            # while.
+            self._start_burst()
+        else:
+            self._read_dt = min(2 * self._read_dt, self.fast_dt)
 
-            # Read First, get Buffer Contents
-            response = self._get_hub_buffer()
-            if not response:
-                # Error reading the buffer pause slightly before looping
-                time.sleep(.1)
-                continue
-
-            # reset on successful read
-            self.read_timeout_count = 0
-
-            (bytestring, byte_end) = self._parse_buffer(response)
-
-            new_string = self._parse_bytes(bytestring, byte_end)
-            if new_string is not None:
-                self._read_queue.put((bytes.fromhex(new_string)))
-
-            # Now write
-            self._perform_write()
-
-            # Only hammering at hub server twice per second.  Seems to result
-            # in the PLM ACK and device message arriving together, but no more
-            # than that. Could consider slowing down, but waiting too long
-            # could cause the buffer to overflow and would slow down our
-            # responses.  Would also need to increase the hub ack_time
-            # accordingly too.  I have done up to 3 requests per second with
-            # good results.
-            sleep_time = (start_time + .5) - time.time()
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            elif sleep_time < -2:
-                seconds = str(round(abs(sleep_time), 2))
-                LOG.warning('Hub %s loop took %s to complete', self.ip,
-                            seconds)
+    def _start_burst(self):
+        '''Starts a burst of fast buffer reads.
+        '''
+        self._fast_until = time.time() + self.fast_time
+        self._read_dt = self.burst_dt
+
+    def _update_request_dt(self, start_time):
+        '''Updates the average HTTP request time.
+
+        Args:
+          start_time (float): The time the request started.
+        '''
+        dt = time.time() - start_time
+        if self._request_dt is None:
+            self._request_dt = dt
+        else:
+            self._request_dt += 0.2 * (dt - self._request_dt)
 
     def _get_hub_buffer(self):
         '''
         Performs the HTTP call to get the read buffer.
         '''
+        start_time = time.time()
         try:
-            response = requests.get('http://%s:%s/buffstatus.xml' %
-                                    (self.ip, self.port),
-                                    auth=requests.auth.HTTPBasicAuth(
-                                        self.user,
-                                        self.password),
-                                    timeout=5)
+            response = self._session.get('http://%s:%s/buffstatus.xml' %
+                                         (self.ip, self.port), timeout=5)
         except requests.exceptions.Timeout:
             # Warn for a bit, this can happen if the hub is overloaded
             LOG.warning('Timeout reading from Hub %s', self.ip)
@@ -308,59 +411,14 @@ class HubClient:
                           self.ip)
                 self.read_timeout_count = 0
             return False
-        return response
+        except requests.exceptions.RequestException as e:
+            # Connection errors - the session will reconnect on the next
+            # read.
+            LOG.warning('Error reading from Hub %s: %s', self.ip, e)
+            return False
 
-    def _parse_buffer(self, response):
-        '''
-        The hub uses a ring buffer passed as a hexadecimal string with the
-        final byte describing the position of the end of the buffer.  This
-        function slices the buffer at the end point and stiches it back
-        together in the proper order.
-        '''
-        # This could be done without ElementTree, I wonder if it is overkill
-        root = ET.fromstring(response.text)
-        # This seems overly complex, can this be directly referenced?
-        # for response in root:
-        #     if response.tag == 'BS':
-        #         bytestring = response.text
-        #         break
-        bytestring = root.find('BS').text
-
-        # Place buffer in sequential order
-        # The last byte of the bytestring tells us where the buffer ends
-        byte_end = int(bytestring[-2:], 16)
-        # Get bytes after buffer end and put them first, then add bytes
-        # that come before the buffer end
-        bytestring = bytestring[byte_end:-2] + bytestring[:byte_end]
-
-        return (bytestring, byte_end)
-
-    def _parse_bytes(self, bytestring, byte_end):
-        '''
-        This parses out the new bytes out of the buffer.  It also verifies that
-        the buffer has not overflowed
-        '''
-        ret = None
-        if self._prev_bytestring != '' and self._prev_byte_end >= 0:
-            new_length = byte_end - self._prev_byte_end
-            # fix length if we have looped around on the ring
-            if new_length < 0:
-                new_length = (self.buff_length + new_length)
-
-            verify_start = self.buff_length - self.verify_length - new_length
-            verify_end = self.buff_length - new_length
-            verify_bytestring = bytestring[verify_start : verify_end]
-            if new_length > 0:
-                if self._prev_bytestring == verify_bytestring:
-                    ret = bytestring[-new_length:]
-                else:
-                    LOG.error('Read buff overflow Hub %s, prev %s, verify %s',
-                              self.ip, self._prev_bytestring,
-                              verify_bytestring)
-
-        self._prev_bytestring = bytestring[-self.verify_length:]
-        self._prev_byte_end = byte_end
-        return ret
+        self._update_request_dt(start_time)
+        return response
 
     def _perform_write(self):
         ''' Writes to the hub if there are messages Waiting
@@ -369,19 +427,18 @@ class HubClient:
             command = self._write_queue.get()
             cmd_str = command.hex()
             url = 'http://%s:%s/3?%s=I=3' % (self.ip, self.port, cmd_str)
+            start_time = time.time()
             try:
-                requests.get(url,
-                             auth=requests.auth.HTTPBasicAuth(self.user,
-                                                              self.password),
-                             timeout=3)
-            except requests.exceptions.Timeout:
+                self._session.get(url, timeout=3)
+            except requests.exceptions.RequestException:
                 # Since there are retries built in above this, we don't resend
                 # here on the chance that the message did get through
                 LOG.error('Unable to write to Hub %s', self.ip)
-            # When we write to the Hub, it empties and resets the read buffer
-            if self.verify_length > 0:
-                empty = '0'
-                self._prev_bytestring = empty * self.verify_length
             else:
-                self._prev_bytestring = ''
-            self._prev_byte_end = 0
+                self._update_request_dt(start_time)
+
+            # The reply will show up in the buffer soon.
+            self._start_burst()
+
+            # When we write to the Hub, it empties and resets the read buffer
+            self._buffer.reset()
@@ -0,0 +1,178 @@
+#===========================================================================
+#
+# Insteon Hub read buffer
+#
+#===========================================================================
+from .. import log
+
+LOG = log.get_logger(__name__)
+
+
+class HubBuffer:
+    """Insteon Hub ring buffer reader.
+
+    The Hub stores the messages it receives from the PLM in a ring buffer
+    which is read by requesting buffstatus.xml.  The response looks like
+    this:
+
+       <response><BS>...hex buffer...EE</BS></response>
+
+    where the last two characters (EE) are the position of the end of the
+    new data in the hex buffer (in characters).  Writing a message to the
+    Hub clears the buffer and moves the end back to zero.
+
+    The Hub is read a few times a second forever so this avoids the XML
+    parser and string reordering.  The hex buffer is found with a byte
+    search, responses that haven't changed since the last read are skipped
+    without decoding them, and new data is sliced out of the decoded ring
+    buffer directly.
+
+    The buffer can overflow if more data arrives between reads than it can
+    hold.  To detect that, the last verify_size bytes of each read are
+    saved and must match the bytes just before the new data in the next
+    read.  If they don't, the new data is dropped and an overflow error is
+    logged.
+    """
+    # My current hub uses a 200 character (100 byte) buffer, not sure if
+    # any other lengths could or do exists, this would have to adjusted if
+    # they do.
+    size = 100
+
+    # Number of bytes that must be matched for this to be deemed a valid
+    # message.  5 bytes is only 5% of the buffer.  Too small a number, and
+    # we could pass incorrect messages if the buffer "overflows" before we
+    # read it.  To large a number and more "overflows" will occur as we have
+    # less usable buffer length
+    verify_size = 5
+
+    #-----------------------------------------------------------------------
+    def __init__(self, name=""):
+        """Constructor
+
+        Args:
+          name (str):  Name of the Hub to use in log messages.
+        """
+        self.name = name
+
+        # The last hex buffer that was read.  This is used to skip decoding
+        # responses which haven't changed.
+        self._raw = None
+
+        # Byte position of the end of the data in the last read and the
+        # verify_size bytes that came before it.  None if nothing has been
+        # read yet.
+        self._end = None
+        self._verify = None
+
+    #-----------------------------------------------------------------------
+    def reset(self):
+        """Reset the buffer after a message is written to the Hub.
+
+        Writing a message clears the Hub buffer to zeros and moves the end
+        to the start of the buffer.
+        """
+        self._raw = None
+        self._end = 0
+        self._verify = bytes(self.verify_size)
+
+    #-----------------------------------------------------------------------
+    def update(self, content):
+        """Process a buffstatus.xml response.
+
+        The first read only records the buffer state since there is no way
+        to tell which of the data in it is new.
+
+        Args:
+          content (bytes):  The buffstatus.xml response body.
+
+        Returns:
+          bytes:  The new data in the buffer since the last read or None if
+          there is no new data or the buffer overflowed.
+        """
+        raw = self.find_buffer(content)
+        if raw is None:
+            LOG.warning("Hub %s invalid buffer response: %s", self.name,
+                        content[:300])
+            return None
+
+        # The usual case - nothing has changed since the last read.
+        if raw == self._raw:
+            return None
+
+        try:
+            buf = bytes.fromhex(raw[:-2].decode())
+            end = int(raw[-2:], 16) // 2
+        except ValueError:
+            LOG.warning("Hub %s invalid buffer data: %s", self.name, raw)
+            return None
+
+        if len(buf) != self.size or end >= self.size:
+            LOG.warning("Hub %s unexpected buffer size %d end %d", self.name,
+                        len(buf), end)
+            return None
+
+        self._raw = raw
+        prev_end, prev_verify = self._end, self._verify
+        self._end = end
+        self._verify = self._slice(buf, end - self.verify_size, end)
+
+        if prev_end is None:
+            return None
+
+        num = (end - prev_end) % self.size
+        if not num:
+            return None
+
+        verify = self._slice(buf, prev_end - self.verify_size, prev_end)
+        if verify != prev_verify:
+            LOG.error("Read buff overflow Hub %s, prev %s, verify %s",
+                      self.name, prev_verify.hex(), verify.hex())
+            return None
+
+        return self._slice(buf, prev_end, prev_end + num)
+
+    #-----------------------------------------------------------------------
+    @staticmethod
+    def find_buffer(content):
+        """Find the hex buffer in a buffstatus.xml response.
+
+        Args:
+          content (bytes):  The buffstatus.xml response body.
+
+        Returns:
+          bytes:  The hex buffer (including the end position) or None if it
+          can't be found.
+        """
+        start = content.find(b"<BS>")
+        if start == -1:
+            return None
+
+        start += 4
+        end = content.find(b"</BS>", start)
+        if end - start < 2:
+            return None
+
+        return content[start:end].strip()
+
+    #-----------------------------------------------------------------------
+    def _slice(self, buf, start, end):
+        """Return a slice of the ring buffer.
+
+        Args:
+          buf (bytes):  The ring buffer.
+          start (int):  The start position.  This may be negative.
+          end (int):  The end position.  This may be larger than the buffer
+              size.  end - start must be between 0 and the buffer size.
+
+        Returns:
+          bytes:  The data from start to end wrapping around the buffer.
+        """
+        length = end - start
+        start %= self.size
+        end = start + length
+        if end <= self.size:
+            return buf[start:end]
+
+        return buf[start:] + buf[:end - self.size]
+
+    #-----------------------------------------------------------------------
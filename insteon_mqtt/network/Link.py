@@ -80,6 +80,33 @@ class Link:
         """
         pass  # pragma: no cover
 
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the next time the link needs poll() to be called.
+
+        The manager uses this to decide how long it can sleep waiting for
+        events.  Links that have scheduled work should return the time the
+        work is due so the manager wakes up for it.
+
+        Returns:
+           float:  The Unix clock time tag when the link needs to be polled
+           or None if the link doesn't need to be polled at a specific time.
+        """
+        return None
+
+    #-----------------------------------------------------------------------
+    def transport_latency(self):
+        """Return the extra time the link adds to replies.
+
+        Links which add delays between the modem and the messages being
+        read (like polling a Hub over HTTP) return that time here so the
+        Protocol can extend the message time outs.
+
+        Returns:
+           float:  The time in seconds to add to message time outs.
+        """
+        return 0
+
     #-----------------------------------------------------------------------
     def read_from_link(self):
         """Read data from the link.
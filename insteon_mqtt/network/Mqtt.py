@@ -95,6 +95,10 @@ class Mqtt(Link):
         # time.
         self.keep_alive = 30
 
+        # Time of the last poll() call.  Used to schedule the next poll so
+        # the keep alive is handled.
+        self._last_poll = 0
+
         self._reconnect_dt = reconnect_dt
         self._fd = None
 
@@ -280,12 +284,24 @@ class Mqtt(Link):
             passed in so that all clients receive the same "current" time
             instead of each calling time.time() and getting a different value.
         """
+        self._last_poll = t
+
         # This is required to handle keepalive messages and detect
         # disconnections.
         rc = self.client.loop_misc()
         if rc == paho.MQTT_ERR_NO_CONN:
             self._on_disconnect(self.client, None, rc)
 
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the next time the link needs poll() to be called.
+
+        Returns:
+           float:  The time by which poll() must be called to keep the
+           connection alive.
+        """
+        return self._last_poll + self.keep_alive / 2
+
     #-----------------------------------------------------------------------
     def retry_connect_dt(self):
         """Return a positive integer (seconds) if the link should reconnect.
@@ -65,6 +65,12 @@ class Serial(Link):
         # the time is the time after which to do the write.
         self._write_buf = []
 
+        # True if there is data to write but the next write time hasn't been
+        # reached yet.  A serial port is always writable so while we're
+        # waiting, we drop the write notification from the manager (so it
+        # doesn't spin) and ask to be polled at the write time instead.
+        self._write_gated = False
+
         # Create the serial client but don't open it yet.  We'll wait for a
         # connection call to do that.
         self.client = None
@@ -117,9 +123,11 @@ class Serial(Link):
           next_write_time (function):  A function that returns the timestamp
                of the next permitted write time
         """
-        # Save the input data to the write queue.
+        # Save the input data to the write queue.  If we're waiting for the
+        # next write time, poll() will request the write when it's time.
         self._write_buf.append((data, next_write_time))
-        self.signal_needs_write.emit(self, True)
+        if not self._write_gated:
+            self.signal_needs_write.emit(self, True)
 
         # if we have exceed the max queue size, pop the oldest packet off.
         # This way if the link goes down for a long time, we don't just build
@@ -128,6 +136,35 @@ class Serial(Link):
                 len(self._write_buf) > Serial.max_write_queue):
             self._write_buf.pop(0)
 
+    #-----------------------------------------------------------------------
+    def poll(self, t):
+        """Periodic poll callback.
+
+        If the write notification was dropped while waiting for the next
+        write time, it's requested again once that time has passed.
+
+        Args:
+           t (float):  Current Unix clock time tag.
+        """
+        if self._write_gated and self._write_buf:
+            _data, next_write_time = self._write_buf[0]
+            if t >= next_write_time():
+                self._write_gated = False
+                self.signal_needs_write.emit(self, True)
+
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the next time the link needs poll() to be called.
+
+        Returns:
+           float:  The next write time if we're waiting for it or None
+           otherwise.
+        """
+        if self._write_gated and self._write_buf:
+            return self._write_buf[0][1]()
+
+        return None
+
     #-----------------------------------------------------------------------
     def retry_connect_dt(self):
         """Return a positive integer (seconds) if the link should reconnect.
@@ -201,10 +238,13 @@ class Serial(Link):
             return
 
         # Get the next data packet to write from the write queue and see if
-        # enough time has elapsed to write the message.
+        # enough time has elapsed to write the message.  If not, stop
+        # watching for writes until poll() sees that the time has passed.
         data, next_write_time = self._write_buf[0]
         if t < next_write_time():
             #LOG.debug("Waiting to write %f < %f", t, next_write_time())
+            self._write_gated = True
+            self.signal_needs_write.emit(self, False)
             return
 
         try:
@@ -248,6 +288,7 @@ class Serial(Link):
         self.client.close()
         self._fd = None
         self._write_buf = []
+        self._write_gated = False
         self.signal_closing.emit(self)
 
     #-----------------------------------------------------------------------
@@ -84,6 +84,16 @@ class Stack:
                         LOG.exception("Error in executing stack function, "
                                       "continuing on to next function.")
 
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the next time the link needs poll() to be called.
+
+        Returns:
+           float:  0 (ie. right away) if there are functions waiting to be
+           called or None otherwise.
+        """
+        return 0 if self.groups else None
+
     #-----------------------------------------------------------------------
     def new(self, error_stop=True):
         """Initialize and create a new group of functional calls`
@@ -3,6 +3,7 @@
 # TimedCall class definition.
 #
 #===========================================================================
+from ..Scheduler import Scheduler
 from ..Signal import Signal
 from .. import log
 
@@ -24,7 +25,8 @@ class TimedCall:
 
     This isn't true asynchronous functionality, there is no gaurantee that the
     call will run at the time specified, only that it will run at some point
-    after the specified time.  In general, this lag is minimal, likely tens of
+    after the specified time.  The network manager sleeps until the next call
+    is due (see next_poll_time()) so this lag is minimal, likely a few
     milliseconds.  However, as a result, this class should not be used for
     time critical functions.
 
@@ -45,9 +47,8 @@ class TimedCall:
         # this directly.  signature: (Link link, bool connected)
         self.signal_connected = Signal()
 
-        # The list of functions to call.  Each item should be a
-        # CallObject
-        self.calls = []
+        # The scheduled functions to call.
+        self.calls = Scheduler()
 
     #-----------------------------------------------------------------------
     def poll(self, t):
@@ -57,53 +58,46 @@ class TimedCall:
         needs to do some periodic manual processing.
 
         This is where we inject the function calls.  The main loop calls this
-        once per loop.  This checks to see if the time associated with any of
-        the CallObjects has elapsed.  If it has, call the function.
-
-        Only a single call is performed each loop.  Currently, there is no
-        reason to think that multiple calls would be necessary.
+        once per loop and every call whose time has elapsed is run.
 
         Args:
            t (float):  Current Unix clock time tag.
         """
-        if len(self.calls) > 0:
-            if self.calls[0].time < t:
-                entry = self.calls.pop(0)
-                try:
-                    entry.func(*entry.args, **entry.kwargs)
-                except:
-                    LOG.error("Error in executing TimedCall function")
+        self.calls.run_due()
+
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the next time the link needs poll() to be called.
+
+        Returns:
+           float:  The time of the earliest call or None if there are no
+           calls waiting.
+        """
+        return self.calls.next_time()
 
     #-----------------------------------------------------------------------
     def add(self, time, func, *args, **kwargs):
-        """Adds a call to the calls list and sorts the list
+        """Schedules a function call.
 
         Args:
           time (float):  The Unix clock time tag at which the call should run
           func (function): The function to run
           ars & kwargs: Passed to the function when run
         Returns:
-          The created (CallObject)
+          The created (ScheduledCall) handle.
          """
-        new_call = CallObject(time, func, *args, **kwargs)
-        self.calls.append(new_call)
-        self.calls.sort(key=lambda call: call.time)
-        return new_call
+        return self.calls.add(time, func, *args, **kwargs)
 
     #-----------------------------------------------------------------------
     def remove(self, call):
         """Removes a call from the calls list
 
         Args:
-          call (CallObject):  The CallObject to delete, from add()
+          call (ScheduledCall):  The call to delete, from add()
         Returns:
           True if a call was removed, False otherwise
         """
-        ret = False
-        if call in self.calls:
-            self.calls.remove(call)
-            ret = True
-        return ret
+        return self.calls.cancel(call)
 
     #-----------------------------------------------------------------------
     def close(self):
@@ -114,21 +108,3 @@ class TimedCall:
         self.signal_closing.emit()
 
     #-----------------------------------------------------------------------
-
-
-#===========================================================================
-class CallObject:
-    """A Simple Class for Associating a Time with a Call
-    """
-
-    def __init__(self, time, func, *args, **kwargs):
-        """Constructor
-
-        Args:
-          error_stop (bool): If True, will skip the remaining funciton calls
-                             if any function call raises an exception.
-        """
-        self.time = time
-        self.func = func
-        self.args = args
-        self.kwargs = kwargs
@@ -29,6 +29,10 @@ class Manager:
     connection later), the manager will poll the link at Manager.min_time_out
     to try and reconnect it if Link.retry_connect_dt() is active.
 
+    Links report when they next have scheduled work via
+    Link.next_poll_time().  The manager only sleeps until the earliest of
+    those times so timed work runs when it's due.
+
     Create the manager, then the links, then call poll() to start the loop.
 
         mgr = Manager()
@@ -176,13 +180,19 @@ class Manager:
         Arg:
           time_out (int):  Time out to use in seconds.  The actual time out
                    value is is the minimum of this, the manager reconnect
-                   time out and the unconnected retry time out.
+                   time out, the unconnected retry time out and the time until
+                   the earliest link deadline (see Link.next_poll_time).
         """
         # Get the actual time out to use.
         time_out = Manager.min_time_out if time_out is None else time_out
         if self.unconnected:
             time_out = min(time_out, self.unconnected_time_out)
 
+        # Sleep only until the earliest time that a link has work scheduled.
+        deadline = self.next_poll_time()
+        if deadline is not None:
+            time_out = min(time_out, max(0.0, deadline - time.time()))
+
         # If nothing is reading for checking, skip the select call.
         run = self.read or self.write or self.error
         if not run:
@@ -246,6 +256,25 @@ class Manager:
                                     self.poll_links):
             link.poll(t)
 
+    #-----------------------------------------------------------------------
+    def next_poll_time(self):
+        """Return the earliest time that any link needs to be polled.
+
+        Each link (including polling only links) reports the next time it
+        has scheduled work via next_poll_time().
+
+        Returns:
+           float:  The earliest Unix clock time tag or None if no link has
+           any scheduled work.
+        """
+        deadline = None
+        for link in itertools.chain(self.links.values(), self.poll_links):
+            t = link.next_poll_time()
+            if t is not None and (deadline is None or t < deadline):
+                deadline = t
+
+        return deadline
+
     #-----------------------------------------------------------------------
     def link_closing(self, link):
         """Callback when a link is closing.
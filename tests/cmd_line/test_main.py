@@ -0,0 +1,58 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/cmd_line/main.py
+#
+#===========================================================================
+import os
+import subprocess
+import sys
+
+# Command line commands which send a message to the server: parse the
+# arguments and read the config file.
+CMD_CODE = """
+from insteon_mqtt import config
+from insteon_mqtt.cmd_line.main import parse_args
+args = parse_args([{path!r}, "on", "aa.bb.cc"])
+config.read(args.config)
+"""
+
+# Top level packages that only the server needs.
+SERVER_ONLY = ["jinja2", "requests", "serial", "ruamel.yaml",
+               "insteon_mqtt.device", "insteon_mqtt.mqtt",
+               "insteon_mqtt.network", "insteon_mqtt.ModemImpl"]
+
+
+class Test_main:
+    #-----------------------------------------------------------------------
+    def test_command_imports(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "configs",
+                            "basic.yaml")
+        modules = imported_modules(CMD_CODE.format(path=path))
+
+        for name in SERVER_ONLY:
+            assert not [i for i in modules
+                        if i == name or i.startswith(name + ".")]
+
+        # The commands need these to send the message.
+        assert "paho.mqtt.client" in modules
+        assert "insteon_mqtt.config" in modules
+
+    #-----------------------------------------------------------------------
+
+
+#===========================================================================
+def imported_modules(code):
+    """Run code in a new process and return the imported modules.
+
+    Modules imported with importlib (like the lazy insteon_mqtt attributes)
+    are included since the names are read from sys.modules.
+
+    Returns:
+      set:  The names of the imported modules.
+    """
+    code += "\nimport sys\nprint('\\n'.join(sys.modules))\n"
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    proc = subprocess.run([sys.executable, "-c", code], cwd=root,
+                          stdout=subprocess.PIPE, check=True,
+                          universal_newlines=True)
+    return set(proc.stdout.split())
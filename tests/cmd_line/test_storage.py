@@ -0,0 +1,36 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/cmd_line/storage.py
+#
+#===========================================================================
+import json
+import insteon_mqtt as IM
+
+
+class Test_storage:
+    #-----------------------------------------------------------------------
+    def test_migrate_db(self, tmpdir, capsys):
+        db = IM.db.Modem(str(tmpdir.join("aabbcc.json")))
+        db.add_entry(IM.db.ModemEntry(IM.Address(0x10, 0x20, 0x30), 0x01,
+                                      True, bytes([0x00, 0x00, 0x00])),
+                     save=False)
+        db.write()
+
+        config = {"insteon" : {"storage" : str(tmpdir)}}
+        assert IM.cmd_line.storage.migrate_db(None, config) == 0
+        out, _err = capsys.readouterr()
+        assert out.startswith("Copied 1 databases")
+
+        store = IM.db.SqliteStore(str(tmpdir.join("insteon_mqtt.sqlite")))
+        try:
+            data = store.read(db.save_path)
+        finally:
+            store.close()
+        assert json.dumps(data) == json.dumps(db.to_json())
+
+    #-----------------------------------------------------------------------
+    def test_migrate_db_missing(self, tmpdir):
+        config = {"insteon" : {"storage" : str(tmpdir.join("missing"))}}
+        assert IM.cmd_line.storage.migrate_db(None, config) == 1
+
+    #-----------------------------------------------------------------------
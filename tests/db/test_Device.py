@@ -4,6 +4,7 @@
 #
 # pylint: disable=too-many-statements
 #===========================================================================
+import json
 import insteon_mqtt as IM
 import insteon_mqtt.message as Msg
 import helpers as H
@@ -272,6 +273,79 @@ class Test_Device:
         assert len(db.unused) == 1
         assert db.find_mem_loc(0x0fff) == new_entry
 
+    #-----------------------------------------------------------------------
+    def test_find_index(self):
+        db = IM.db.Device(IM.Address(0x01, 0x02, 0x03))
+        addr1 = IM.Address(0x12, 0x34, 0x56)
+        addr2 = IM.Address(0x50, 0x51, 0x52)
+
+        def make(addr, group, mem_loc, is_controller, in_use=True,
+                 data=bytes([0xff, 0x00, 0x01])):
+            flags = Msg.DbFlags(in_use=in_use, is_controller=is_controller,
+                                is_last_rec=False)
+            entry = IM.db.DeviceEntry(addr, group, mem_loc, flags, data,
+                                      db=db)
+            db.add_entry(entry, save=False)
+            return entry
+
+        e1 = make(addr1, 0x01, 0x0fff, True)
+        e2 = make(addr1, 0x01, 0x0ff7, False, data=bytes([0xff, 0x00, 0x02]))
+        e3 = make(addr2, 0x01, 0x0fef, False)
+
+        assert db.find(addr1, 0x01, True) is e1
+        assert db.find('12.34.56', 1, False) is e2
+        assert db.find(addr1, 0x01, False, local_group=0x02) is e2
+        assert db.find(addr1, 0x01, False, local_group=0x03) is None
+        assert db.find(addr1, 0x02, True) is None
+        assert db.find_all(addr=addr1) == [e1, e2]
+        assert db.find_all(addr=addr1, is_controller=False) == [e2]
+        assert db.find_all(group=0x01, is_controller=False) == [e2, e3]
+
+        # Replacing an entry at the same memory location updates the index.
+        e4 = make(addr2, 0x05, 0x0fff, False)
+        assert db.find(addr1, 0x01, True) is None
+        assert db.find(addr2, 0x05, False) is e4
+        assert db.find_all(addr=addr2) == [e3, e4]
+
+        # Marking an entry unused removes it.
+        make(addr1, 0x01, 0x0ff7, False, in_use=False)
+        assert db.find(addr1, 0x01, False) is None
+        assert db.find_all(addr=addr1) == []
+
+        db.clear()
+        assert db.find(addr2, 0x01, False) is None
+        assert db.find_all(addr=addr2) == []
+
+    #-----------------------------------------------------------------------
+    def test_load_json(self, tmpdir):
+        # Load the json files for a few devices w/ 400 records each.  The
+        # entries use slots instead of a __dict__ to save memory.
+        num_dev = 5
+        num_entry = 400
+        used = []
+        for j in range(num_entry):
+            flags = Msg.DbFlags(in_use=True, is_controller=j % 2 == 0,
+                                is_last_rec=False)
+            entry = IM.db.DeviceEntry(IM.Address(0x20, 0x00, j % 150), j % 8,
+                                      0x0fff - 8 * j, flags,
+                                      bytes([0xff, 0x00, j % 8]))
+            used.append(entry.to_json())
+
+        for i in range(num_dev):
+            data = {'address' : "10.00.%02x" % i, 'delta' : 1,
+                    'used' : used, 'unused' : [], 'meta' : {}}
+            with open(str(tmpdir.join("10.00.%02x.json" % i)), "w") as f:
+                json.dump(data, f)
+
+        dbs = []
+        for path in sorted(tmpdir.listdir()):
+            with open(str(path)) as f:
+                dbs.append(IM.db.Device.from_json(json.load(f), None, None))
+
+        assert sum(len(i) for i in dbs) == num_dev * num_entry
+        assert not hasattr(dbs[0].entries[0x0fff], "__dict__")
+        assert len(dbs[0].find_all(IM.Address(0x20, 0x00, 0x01))) == 3
+
 #===========================================================================
 class MockDevice:
     """Mock insteon_mqtt/Device class
@@ -108,6 +108,48 @@ class Test_Modem:
         assert len(obj._meta) == 1
         assert obj.get_meta('test') == 2
 
+    #-----------------------------------------------------------------------
+    def test_find(self):
+        obj = IM.db.Modem()
+        data = bytes([0xff, 0x00, 0x00])
+        addr1 = IM.Address('12.34.ab')
+        addr2 = IM.Address('12.34.ac')
+        e1 = IM.db.ModemEntry(addr1, 0x20, True, data, db=obj)
+        e2 = IM.db.ModemEntry(addr1, 0x20, False, data, db=obj)
+        e3 = IM.db.ModemEntry(addr2, 0x21, True, data, db=obj)
+        for e in (e1, e2, e3):
+            obj.add_entry(e, save=False)
+
+        assert obj.find(addr1, 0x20, True) is e1
+        assert obj.find(addr1, 0x20, False) is e2
+        assert obj.find(addr2, 0x20, True) is None
+        assert obj.find('12.34.ab', 0x20, True) is None
+        assert obj.find_all(addr1, 0x20, True) == [e1]
+        assert obj.find_all(addr2, 0x20, True) == []
+        assert obj.find_all(addr=addr1) == [e1, e2]
+        assert obj.find_all(is_controller=True) == [e1, e3]
+
+        # Replacing an entry keeps its position.
+        e4 = IM.db.ModemEntry(addr1, 0x20, True, bytes([0x01, 0x02, 0x03]),
+                              db=obj)
+        obj.add_entry(e4, save=False)
+        assert len(obj) == 3
+        assert obj.entries[0] is e4
+        assert obj.find(addr1, 0x20, True) is e4
+
+        # Groups are only free once all the controllers are removed.
+        empty = obj.empty_groups()
+        assert 0x20 not in empty
+        assert 0x21 not in empty
+        assert 0x22 in empty
+
+        obj.delete_entry(e3)
+        assert 0x21 in obj.empty_groups()
+        assert 0x21 not in obj.groups
+        obj.delete_entry(e2)
+        assert 0x20 not in obj.empty_groups()
+        assert obj.entries == [e4]
+
     #-----------------------------------------------------------------------
     def test_add_on_device_empty_ctrl(self, test_device, test_entry_dev1_ctrl):
         # add_on_device(self, entry, on_done=None)
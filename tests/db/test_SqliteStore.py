@@ -0,0 +1,196 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/db/SqliteStore.py
+#
+# pylint: disable=W0621,W0212
+#===========================================================================
+import json
+import os
+import pytest
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+import helpers as H
+
+
+@pytest.fixture
+def store(tmpdir):
+    obj = IM.db.SqliteStore(str(tmpdir.join("test.sqlite")))
+    obj.install()
+    yield obj
+    obj.close()
+
+
+def make_device_db(tmpdir, addr=IM.Address(0x01, 0x02, 0x03)):
+    path = str(tmpdir.join(addr.hex + ".json"))
+    db = IM.db.Device(addr, path)
+    db.delta = 5
+    db.engine = 2
+    db.set_meta("key", [1, 2])
+    for i in range(5):
+        flags = Msg.DbFlags(in_use=i != 3, is_controller=i % 2 == 0,
+                            is_last_rec=False)
+        db.add_entry(IM.db.DeviceEntry(IM.Address(0x10, 0x20, i), i + 1,
+                                       0x0fff - i * 8, flags,
+                                       bytes([0xff, 0x00, i])), save=False)
+    return db
+
+
+def make_modem_db(tmpdir):
+    db = IM.db.Modem(str(tmpdir.join("aabbcc.json")))
+    for i in range(3):
+        db.add_entry(IM.db.ModemEntry(IM.Address(0x10, 0x20, i), 0x01,
+                                      True, bytes([i, 0x00, 0x00])),
+                     save=False)
+    db.add_entry(IM.db.ModemEntry(IM.Address(0x10, 0x20, 0), 0x05, False,
+                                  bytes([0x00, 0x00, 0x00])), save=False)
+    return db
+
+
+class Test_SqliteStore:
+    #-----------------------------------------------------------------------
+    def test_device(self, tmpdir, store):
+        db = make_device_db(tmpdir)
+        db.write()
+
+        # Nothing is written to the JSON file.
+        assert not os.path.exists(db.save_path)
+        assert store.names() == [db.addr.hex]
+
+        data = IM.db.read_db(db.save_path)
+        assert data == db.to_json()
+
+        db2 = IM.db.Device.from_json(data, db.save_path, None)
+        assert db2.to_json() == db.to_json()
+
+        # Writing again replaces the entries.
+        db.clear()
+        data = IM.db.read_db(db.save_path)
+        assert data == db.to_json()
+        assert store.find_entries() == []
+
+    #-----------------------------------------------------------------------
+    def test_modem(self, tmpdir, store):
+        db = make_modem_db(tmpdir)
+        db.write()
+
+        data = IM.db.read_db(db.save_path)
+        assert data == db.to_json()
+        assert IM.db.Modem.from_json(data).to_json() == db.to_json()
+
+    #-----------------------------------------------------------------------
+    def test_missing(self, tmpdir, store):
+        assert IM.db.read_db(str(tmpdir.join("aabbcc.json"))) is None
+
+    #-----------------------------------------------------------------------
+    def test_no_store(self, tmpdir):
+        db = make_device_db(tmpdir)
+        db.write()
+
+        with open(db.save_path) as f:
+            assert json.load(f) == db.to_json()
+        assert IM.db.read_db(db.save_path) == db.to_json()
+
+    #-----------------------------------------------------------------------
+    def test_find_entries(self, tmpdir, store):
+        make_device_db(tmpdir).write()
+        make_modem_db(tmpdir).write()
+
+        addr = IM.Address(0x10, 0x20, 0)
+        found = store.find_entries(addr=addr)
+        assert [(i[0], i[1]['group']) for i in found] == \
+            [("01.02.03", 1), ("aabbcc", 1), ("aabbcc", 5)]
+
+        found = store.find_entries(addr=addr, is_controller=False)
+        assert [(i[0], i[1]['group']) for i in found] == [("aabbcc", 5)]
+
+        found = store.find_entries(group=0x01, is_controller=True)
+        assert sorted(i[1]['addr'] for i in found) == \
+            ["10.20.00", "10.20.00", "10.20.01", "10.20.02"]
+
+        # Unused device entries are included.
+        found = store.find_entries(group=0x04)
+        assert len(found) == 1
+        assert found[0][1]['db_flags']['in_use'] is False
+
+    #-----------------------------------------------------------------------
+    def test_batch(self, tmpdir, store):
+        db = make_device_db(tmpdir)
+        db2 = make_modem_db(tmpdir)
+
+        with store.batch():
+            db.write()
+            with store.batch():
+                db2.write()
+
+        assert store.names() == ["01.02.03", "aabbcc"]
+
+        # An error rolls back the whole batch.
+        db.delta = 10
+        with pytest.raises(ValueError):
+            with store.batch():
+                db.write()
+                db2.write()
+                raise ValueError("test")
+
+        assert IM.db.read_db(db.save_path)['delta'] == 5
+
+        # The store is still usable.
+        db.write()
+        assert IM.db.read_db(db.save_path)['delta'] == 10
+
+    #-----------------------------------------------------------------------
+    def test_writer(self, tmpdir, store):
+        writer = IM.db.Writer(delay=2.0, max_delay=10.0)
+        writer.install()
+        try:
+            dbs = [make_device_db(tmpdir, IM.Address(0x01, 0x02, i))
+                   for i in range(5)]
+            for db in dbs:
+                db.save()
+            assert store.names() == []
+
+            writer.flush_all()
+            assert len(store.names()) == 5
+            for db in dbs:
+                assert IM.db.read_db(db.save_path) == db.to_json()
+        finally:
+            writer.uninstall()
+
+    #-----------------------------------------------------------------------
+    def test_migrate(self, tmpdir):
+        db = make_device_db(tmpdir)
+        db.write()
+        db2 = make_modem_db(tmpdir)
+        db2.write()
+        tmpdir.join("other.json").write("[1, 2, 3]")
+        tmpdir.join("bad.json").write("{")
+        tmpdir.join("notes.txt").write("text")
+
+        store = IM.db.SqliteStore(str(tmpdir.join("test.sqlite")))
+        try:
+            assert store.migrate(str(tmpdir)) == 2
+            assert store.names() == ["01.02.03", "aabbcc"]
+
+            # The JSON files are unchanged.
+            assert IM.db.read_db(db.save_path) == db.to_json()
+
+            store.install()
+            assert IM.db.read_db(db.save_path) == db.to_json()
+            assert IM.db.read_db(db2.save_path) == db2.to_json()
+        finally:
+            store.close()
+
+        assert IM.db.active_store() is None
+
+    #-----------------------------------------------------------------------
+    def test_load_device(self, tmpdir, store):
+        modem = H.main.MockModem(tmpdir)
+        addr = IM.Address(0x01, 0x02, 0x03)
+        db = make_device_db(tmpdir, addr)
+        db.write()
+
+        device = IM.device.base.Base(H.main.MockProtocol(), modem, addr)
+        assert device.db.to_json() == db.to_json()
+        assert device.db.save_path == db.save_path
+
+    #-----------------------------------------------------------------------
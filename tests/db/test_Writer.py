@@ -0,0 +1,125 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/db/Writer.py
+#
+# pylint: disable=W0621,W0212
+#===========================================================================
+import json
+from unittest import mock
+import pytest
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+
+
+@pytest.fixture
+def writer():
+    obj = IM.db.Writer(delay=2.0, max_delay=10.0)
+    obj.install()
+    yield obj
+    obj.uninstall()
+
+
+def make_entry(db, mem_loc, group=0x01):
+    flags = Msg.DbFlags(in_use=True, is_controller=True, is_last_rec=False)
+    return IM.db.DeviceEntry(IM.Address('12.34.ab'), group, mem_loc, flags,
+                             bytes([0xff, 0x00, 0x00]), db=db)
+
+
+class Test_Writer:
+    #-----------------------------------------------------------------------
+    def test_no_writer(self, tmpdir):
+        path = str(tmpdir.join("dev.json"))
+        db = IM.db.Device(IM.Address(0x01, 0x02, 0x03), path)
+        with mock.patch.object(db, 'write', wraps=db.write) as write:
+            db.add_entry(make_entry(db, 0x0fff))
+            db.set_meta("key", 1)
+            assert write.call_count == 2
+
+    #-----------------------------------------------------------------------
+    def test_coalesce(self, tmpdir, writer):
+        path = str(tmpdir.join("dev.json"))
+        db = IM.db.Device(IM.Address(0x01, 0x02, 0x03), path)
+        with mock.patch.object(db, 'write', wraps=db.write) as write:
+            with mock.patch('time.time', return_value=100.0):
+                for i in range(200):
+                    db.add_entry(make_entry(db, 0x0fff - i * 8), save=True)
+                db.set_meta("key", 1)
+                db.increment_delta()
+
+            assert write.call_count == 0
+            assert writer.is_dirty(db)
+            assert not tmpdir.join("dev.json").exists()
+
+            # Too soon after the last change.
+            writer.poll(101.0)
+            assert write.call_count == 0
+
+            writer.poll(102.0)
+            assert write.call_count == 1
+            assert not writer.is_dirty(db)
+            assert len(writer) == 0
+
+        data = json.loads(tmpdir.join("dev.json").read())
+        assert len(data['used']) == 200
+        assert data['meta'] == {"key" : 1}
+
+    #-----------------------------------------------------------------------
+    def test_max_delay(self, tmpdir, writer):
+        db = IM.db.Modem(str(tmpdir.join("modem.json")))
+        with mock.patch.object(db, 'write') as write:
+            with mock.patch('time.time', return_value=100.0):
+                db.set_meta("key", 1)
+            with mock.patch('time.time', return_value=109.5):
+                db.set_meta("key", 2)
+
+            writer.poll(110.0)
+            write.assert_called_once_with()
+
+    #-----------------------------------------------------------------------
+    def test_force(self, tmpdir, writer):
+        db = IM.db.Modem(str(tmpdir.join("modem.json")))
+        with mock.patch.object(db, 'write') as write:
+            db.set_meta("key", 1)
+            assert write.call_count == 0
+
+            db.save(force=True)
+            assert write.call_count == 1
+            assert not writer.is_dirty(db)
+
+    #-----------------------------------------------------------------------
+    def test_close(self, tmpdir, writer):
+        db1 = IM.db.Modem(str(tmpdir.join("modem.json")))
+        db2 = IM.db.Device(IM.Address(0x01, 0x02, 0x03),
+                           str(tmpdir.join("dev.json")))
+        db1.set_meta("key", 1)
+        db2.set_meta("key", 1)
+        assert len(writer) == 2
+
+        closing = mock.Mock()
+        writer.signal_closing.connect(closing)
+        writer.close()
+
+        closing.assert_called_once_with(writer)
+        assert tmpdir.join("modem.json").exists()
+        assert tmpdir.join("dev.json").exists()
+        assert len(writer) == 0
+
+        # Writer is no longer active so saves are immediate.
+        with mock.patch.object(db1, 'write') as write:
+            db1.set_meta("key", 2)
+            write.assert_called_once_with()
+
+    #-----------------------------------------------------------------------
+    def test_no_path(self, writer):
+        db = IM.db.Modem()
+        db.set_meta("key", 1)
+        assert len(writer) == 0
+
+    #-----------------------------------------------------------------------
+    def test_write_error(self, tmpdir, writer, caplog):
+        db = IM.db.Modem(str(tmpdir.join("missing", "modem.json")))
+        db.set_meta("key", 1)
+        writer.flush_all()
+        assert "Error writing database" in caplog.text
+
+#===========================================================================
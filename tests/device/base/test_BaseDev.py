@@ -560,3 +560,23 @@ class Test_Base_Config():
         Path(test_device.db_path()).touch()
         test_device.load_db()
         assert 'Error reading file' in caplog.text
+
+    def test_load_db_lazy(self, test_device, tmpdir):
+        db = IM.db.Device(test_device.addr, test_device.db_path())
+        db.delta = 5
+        db.set_meta('key', 1)
+
+        # The database isn't read until it's used.
+        device = Base(test_device.protocol, test_device.modem,
+                      test_device.addr)
+        assert not device.db_loaded
+        assert device.db.delta == 5
+        assert device.db.get_meta('key') == 1
+        assert device.db_loaded
+        assert device.db.save_path == test_device.db_path()
+
+        # A missing database is an empty one with the save path set.
+        device = Base(test_device.protocol, test_device.modem,
+                      IM.Address(0x01, 0x02, 0x04))
+        assert len(device.db) == 0
+        assert device.db.save_path == device.db_path()
@@ -124,6 +124,7 @@ class Test_Broadcast:
 class MockProto:
     def __init__(self):
         self.signal_received = IM.Signal()
+        self.signal_addr_received = IM.AddrSignal()
         self.wait_time = 0
 
     def add_handler(self, *args):
@@ -41,7 +41,6 @@ class Test_DeviceDbGet:
         flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
         bad_addr = IM.Address('0a.12.35')
         nomatch = Msg.InpStandard(bad_addr, addr, flags, 0x2f, 0x00)
-        nomatch.is_ack = True
         r = handler.msg_received(proto, nomatch)
         assert r == Msg.UNKNOWN
 
@@ -206,6 +205,9 @@ class Mockdb:
     def is_complete(self):
         return True
 
+    def save(self, force=False):
+        pass
+
 class MockDevice:
     """Mock insteon_mqtt/Device class
     """
@@ -29,7 +29,6 @@ class Test_DeviceRefresh:
         # Early device ACK, before PLM sent
         flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
         early = Msg.InpStandard(dev_addr, modem_addr, flags, db_delta, 0x00)
-        early.is_ack = True
         r = handler.msg_received(proto, early)
         assert r == Msg.UNKNOWN
 
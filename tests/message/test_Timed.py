@@ -23,7 +23,7 @@ class Test_Timed:
         t0 = 1000
         addr = IM.Address(0x48, 0x3d, 0x46)
         msg = Msg.OutStandard.direct(addr, 0x11, 0x25)
-        handler = mock.Mock()
+        handler = mock.Mock(priority=IM.Priority.INTERACTIVE)
         obj = IM.message.Timed(msg, handler, False, t0)
 
         link = mock.Mock()
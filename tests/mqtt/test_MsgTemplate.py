@@ -93,6 +93,23 @@ class Test_MsgTemplate:
         assert call.qos == qos
         assert call.retain is True
 
+    #-----------------------------------------------------------------------
+    def test_cache(self):
+        topic = 'insteon/{{address}}/state'
+        msg1 = MsgTemplate(topic, '{{on_str}}')
+        msg2 = MsgTemplate(topic, '{{on_str}}')
+        assert msg1.topic is msg2.topic
+        assert msg1.payload is msg2.payload
+
+        msg3 = MsgTemplate(None, None)
+        msg3.load_config({'topic' : topic}, 'topic', 'payload')
+        assert msg3.topic is msg1.topic
+        assert msg3.payload is None
+
+        assert MsgTemplate.compile_template(topic) is msg1.topic
+        assert (msg1.render_topic({'address' : 'aa.bb.cc'}) ==
+                'insteon/aa.bb.cc/state')
+
     #-----------------------------------------------------------------------
     def test_to_json(self):
         topic_templ = '{ "foo" : {{foo}}, "bar" : {{bar}} }'
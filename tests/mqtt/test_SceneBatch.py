@@ -0,0 +1,128 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/mqtt/SceneBatch.py
+#
+# pylint: disable=redefined-outer-name
+#===========================================================================
+from unittest import mock
+import pytest
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+from insteon_mqtt.mqtt.SceneBatch import SceneBatch
+import helpers as H
+
+
+@pytest.fixture
+def setup(tmpdir):
+    proto = H.main.MockProtocol()
+    dev_modem = H.main.MockModem(tmpdir)
+    dimmer = IM.device.Dimmer(proto, dev_modem, IM.Address('01.02.03'), "d")
+    switch = IM.device.Switch(proto, dev_modem, IM.Address('01.02.04'), "s")
+    other = IM.device.Switch(proto, dev_modem, IM.Address('01.02.05'), "o")
+    devices = {i.addr.id : i for i in (dimmer, switch, other)}
+
+    modem = mock.Mock()
+    modem.addr = dev_modem.addr
+    modem.db = IM.db.Modem()
+    modem.find.side_effect = lambda addr: devices.get(addr.id)
+
+    # Modem group 0x30 is the dimmer at level 0x80 and the switch.
+    db_flags = Msg.DbFlags(in_use=True, is_controller=False,
+                           is_last_rec=False)
+    for dev, data in ((dimmer, [0x80, 0x1f, 0x01]),
+                      (switch, [0xff, 0x00, 0x01])):
+        modem.db.add_entry(IM.db.ModemEntry(dev.addr, 0x30, True),
+                           save=False)
+        dev.db.add_entry(IM.db.DeviceEntry(modem.addr, 0x30, 0xfff, db_flags,
+                                           bytes(data)))
+
+    # Group 0x31 has all three devices.
+    for dev in (dimmer, switch, other):
+        modem.db.add_entry(IM.db.ModemEntry(dev.addr, 0x31, True),
+                           save=False)
+        dev.db.add_entry(IM.db.DeviceEntry(modem.addr, 0x31, 0xffe, db_flags,
+                                           bytes([0xff, 0x1f, 0x01])))
+
+    batch = SceneBatch(modem)
+    batch.window = 0.2
+    return H.Data(batch=batch, modem=modem, proto=proto, dimmer=dimmer,
+                  switch=switch, other=other)
+
+
+#===========================================================================
+class Test_SceneBatch:
+    #-----------------------------------------------------------------------
+    def test_off(self, setup):
+        batch, proto = setup.getAll(['batch', 'proto'])
+        batch.window = 0
+        batch.set(setup.dimmer, is_on=True, level=0x80)
+        assert len(proto.sent) == 1
+        setup.modem.timed_call.add.assert_not_called()
+
+    #-----------------------------------------------------------------------
+    def test_scene_on(self, setup):
+        batch, modem, proto = setup.getAll(['batch', 'modem', 'proto'])
+        batch.set(setup.dimmer, is_on=True, level=0x80)
+        batch.set(setup.switch, is_on=True)
+        assert len(proto.sent) == 0
+        modem.timed_call.add.assert_called_once_with(mock.ANY, batch.flush)
+
+        batch.flush()
+        modem.scene.assert_called_once_with(True, group=0x30)
+        assert len(proto.sent) == 0
+
+    #-----------------------------------------------------------------------
+    def test_scene_off(self, setup):
+        batch, modem, proto = setup.getAll(['batch', 'modem', 'proto'])
+        for dev in (setup.dimmer, setup.switch, setup.other):
+            batch.set(dev, is_on=False, group=1)
+
+        batch.flush()
+        modem.scene.assert_called_once_with(False, group=0x31)
+        assert len(proto.sent) == 0
+
+    #-----------------------------------------------------------------------
+    def test_no_match(self, setup):
+        batch, modem, proto = setup.getAll(['batch', 'modem', 'proto'])
+
+        # Wrong dimmer level.
+        batch.set(setup.dimmer, is_on=True, level=0x40)
+        batch.set(setup.switch, is_on=True)
+        batch.flush()
+        assert len(proto.sent) == 2
+
+        # Mixed on and off.
+        proto.clear()
+        batch.set(setup.dimmer, is_on=True, level=0x80)
+        batch.set(setup.switch, is_on=False)
+        batch.flush()
+        assert len(proto.sent) == 2
+
+        # Only part of the scene.
+        proto.clear()
+        batch.set(setup.switch, is_on=False)
+        batch.set(setup.other, is_on=False)
+        batch.flush()
+        assert len(proto.sent) == 2
+        modem.scene.assert_not_called()
+
+    #-----------------------------------------------------------------------
+    def test_replace(self, setup):
+        batch, modem = setup.getAll(['batch', 'modem'])
+        batch.set(setup.dimmer, is_on=False)
+        batch.set(setup.switch, is_on=True)
+        batch.set(setup.dimmer, is_on=True, level=0x80)
+        assert modem.timed_call.add.call_count == 1
+
+        batch.flush()
+        modem.scene.assert_called_once_with(True, group=0x30)
+
+    #-----------------------------------------------------------------------
+    def test_not_batched(self, setup):
+        batch, modem, proto = setup.getAll(['batch', 'modem', 'proto'])
+        batch.set(setup.dimmer, is_on=True, mode=IM.on_off.Mode.FAST)
+        batch.set(setup.switch, is_on=True, reason="test")
+        assert len(proto.sent) == 2
+        modem.timed_call.add.assert_not_called()
+
+#===========================================================================
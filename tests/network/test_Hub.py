@@ -3,6 +3,7 @@
 # Tests for: insteont_mqtt/network/Hub.py
 #
 #===========================================================================
+import http.server
 import time
 import threading
 import requests
@@ -72,9 +73,9 @@ class Test_Hub:
         (None, None, 0),
         (bytes([0x01]), bytes([0x01]), 1)
     ])
-    def test_read(self, test_hub, read, expected, calls):
+    def test_read(self, test_hub, monkeypatch, read, expected, calls):
         # necessary to stop client from running
-        threading.Thread = mock.Mock()
+        monkeypatch.setattr(threading, 'Thread', mock.Mock())
         with patch.object(test_hub.signal_read, 'emit'):
             test_hub.poll(time.time())
             if read is not None:
@@ -91,9 +92,9 @@ class Test_Hub:
         (bytes([0x00]), time.time(), bytes([0x00]), 0, 1),
         (bytes([0x00]), time.time() + 1000000, None, 1, 0),
     ])
-    def test_write(self, test_hub, write, t, expected, buffer, calls):
+    def test_write(self, test_hub, monkeypatch, write, t, expected, buffer, calls):
         # necessary to stop client from running
-        threading.Thread = mock.Mock()
+        monkeypatch.setattr(threading, 'Thread', mock.Mock())
         with mock.patch.object(test_hub.signal_wrote, 'emit'):
             test_hub.poll(time.time())
             mock.patch.object(test_hub.client, 'write')
@@ -109,9 +110,9 @@ class Test_Hub:
                 assert args_list[0][0][1] == expected
 
     #-----------------------------------------------------------------------
-    def test_close(self, test_hub):
+    def test_close(self, test_hub, monkeypatch):
         # necessary to stop client from running
-        threading.Thread = mock.Mock()
+        monkeypatch.setattr(threading, 'Thread', mock.Mock())
         with mock.patch.object(test_hub.signal_closing, 'emit'):
             # Starts the HubClient
             test_hub.poll(time.time())
@@ -121,6 +122,13 @@ class Test_Hub:
             assert test_hub.client._close == True
             assert test_hub.signal_closing.emit.call_count == 1
 
+    #-----------------------------------------------------------------------
+    def test_transport_latency(self, test_hub):
+        assert test_hub.transport_latency() == 0
+        test_hub.client = mock.Mock()
+        test_hub.client.latency.return_value = 0.3
+        assert test_hub.transport_latency() == 0.3
+
     #-----------------------------------------------------------------------
     def test_str(self, test_hub):
         assert "%s" % test_hub == "Hub 192.168.1.1"
@@ -132,7 +140,7 @@ class Test_HubClient:
         test_response = Response()
         test_response.status_code = 200
         test_response._content = BUFFSTATUS
-        with patch.object(requests, 'get', return_value=test_response):
+        with patch.object(test_hubclient._session, 'get', return_value=test_response):
             response = test_hubclient._get_hub_buffer()
             assert response
 
@@ -140,7 +148,7 @@ class Test_HubClient:
         test_response = Response()
         test_response.status_code = 200
         test_response._content = BUFFSTATUS
-        with patch.object(requests, 'get', side_effect=requests.exceptions.Timeout):
+        with patch.object(test_hubclient._session, 'get', side_effect=requests.exceptions.Timeout):
             response = test_hubclient._get_hub_buffer()
             assert test_hubclient.read_timeout_count == 1
             assert not response
@@ -150,39 +158,182 @@ class Test_HubClient:
         test_response.status_code = 200
         test_response._content = BUFFSTATUS
         test_hubclient.read_timeout_count = 6
-        with patch.object(requests, 'get', side_effect=requests.exceptions.Timeout):
+        with patch.object(test_hubclient._session, 'get', side_effect=requests.exceptions.Timeout):
             response = test_hubclient._get_hub_buffer()
             assert test_hubclient.read_timeout_count == 0
 
-    def test_parse_buffer(self, test_hubclient):
+    def test_read_buffer(self, test_hubclient):
         test_response = Response()
         test_response.status_code = 200
         test_response._content = BUFFSTATUS
-        (bytestring, byte_end) = test_hubclient._parse_buffer(test_response)
-        assert bytestring == ORDEREDSTRING
-        assert byte_end == 168
-
-    @pytest.mark.parametrize("bytestring,byte_end,expected,prev_str,prev_end", [
-        (ORDEREDSTRING, 168, None, '', 0),
-        (ORDEREDSTRING, 168, '0206027F0006', '7F0006027F', 156),
-    ])
-    def test_parse_bytes(self, test_hubclient, bytestring, byte_end, expected,
-                         prev_str, prev_end):
-        test_hubclient._prev_bytestring = prev_str
-        test_hubclient._prev_byte_end = prev_end
-        ret = test_hubclient._parse_bytes(bytestring, byte_end)
-        assert ret == expected
+        test_hubclient._buffer._end = 78
+        test_hubclient._buffer._verify = bytes.fromhex('7F0006027F')
+        with patch.object(test_hubclient._session, 'get',
+                          return_value=test_response):
+            test_hubclient._read_buffer()
+        assert test_hubclient.read() == bytes.fromhex(ORDEREDSTRING[-12:])
 
     def test_perform_write(self, test_hubclient):
-        with patch.object(requests, 'get'):
+        with patch.object(test_hubclient._session, 'get'):
             test_hubclient.write(bytes([0x02,0x06]))
             test_hubclient._perform_write()
-            args = requests.get.call_args
+            args = test_hubclient._session.get.call_args
             assert args[0][0] == 'http://192.168.1.1:25105/3?0206=I=3'
+            assert test_hubclient._buffer._end == 0
+
+    def test_read_burst(self, test_hubclient):
+        test_response = Response()
+        test_response.status_code = 200
+        test_response._content = BUFFSTATUS
+        assert test_hubclient.poll_dt() == HubClient.idle_dt
+
+        # Writes start a burst of reads which slows down when there is no
+        # new data.
+        with patch.object(test_hubclient._session, 'get',
+                          return_value=test_response):
+            test_hubclient.write(bytes([0x02, 0x06]))
+            test_hubclient._perform_write()
+            assert test_hubclient.poll_dt() == HubClient.burst_dt
+
+            test_hubclient._read_buffer()
+            assert test_hubclient.poll_dt() == 2 * HubClient.burst_dt
+
+            for i in range(5):
+                test_hubclient._read_buffer()
+            assert test_hubclient.poll_dt() == HubClient.fast_dt
+
+            # The burst ends after fast_time.
+            test_hubclient._fast_until = time.time() - 1
+            assert test_hubclient.poll_dt() == HubClient.idle_dt
+
+    def test_latency(self, test_hubclient):
+        assert test_hubclient.latency() == HubClient.fast_dt
+        test_hubclient._update_request_dt(time.time() - 0.1)
+        assert test_hubclient.latency() == pytest.approx(
+            0.2 + HubClient.fast_dt, abs=0.01)
 
     def test_perform_write_timeout(self, test_hubclient):
-        with patch.object(requests, 'get', side_effect=requests.exceptions.Timeout):
+        with patch.object(test_hubclient._session, 'get', side_effect=requests.exceptions.Timeout):
             test_hubclient.write(bytes([0x02,0x06]))
             test_hubclient._perform_write()
-            args = requests.get.call_args
+            args = test_hubclient._session.get.call_args
             assert args[0][0] == 'http://192.168.1.1:25105/3?0206=I=3'
+
+    def test_fake_hub(self):
+        # Run the real client thread against a local HTTP server which acts
+        # like a Hub.
+        hub = FakeHub()
+        try:
+            client = HubClient("127.0.0.1", hub.port, "user", "password")
+            try:
+                # Let the first (idle) read happen.
+                time.sleep(0.1)
+
+                # Write a message.  The Hub echoes it with an ACK.  The
+                # write starts a burst of reads so the reply is seen well
+                # before the next idle read.
+                t0 = time.time()
+                client.write(bytes([0x02, 0x62, 0x01, 0x02, 0x03, 0x0f,
+                                    0x11, 0xff]))
+                data = read_client(client, 9)
+                dt = time.time() - t0
+                assert data == bytes([0x02, 0x62, 0x01, 0x02, 0x03, 0x0f,
+                                      0x11, 0xff, 0x06])
+                assert dt < client.idle_dt
+                assert client.poll_dt() < client.idle_dt
+                assert 0 < client.latency() < 1
+
+                # Device reply arrives later.
+                hub.add("0250010203445566" + "2b11ff")
+                data = read_client(client, 11)
+                assert data[:2] == bytes([0x02, 0x50])
+            finally:
+                client.close()
+                client.thread.join(5)
+        finally:
+            hub.close()
+
+        assert hub.writes == ["0262010203" + "0f11ff"]
+        assert hub.reads > 2
+        # Every request used the same keep-alive connection.
+        assert len(hub.clients) == 1
+
+
+def read_client(client, size, timeout=5):
+    data = bytearray()
+    t_end = time.time() + timeout
+    while len(data) < size and time.time() < t_end:
+        data.extend(client.read())
+        time.sleep(0.01)
+    return data
+
+
+class FakeHub:
+    """Local HTTP server which acts like an Insteon Hub.
+
+    The Hub keeps a 200 character hex ring buffer of received data which is
+    read from buffstatus.xml and is cleared when a message is written.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buf = "0" * 200
+        self.end = 0
+        self.reads = 0
+        self.writes = []
+        self.clients = set()
+
+        hub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                assert self.headers["Authorization"].startswith("Basic ")
+                hub.clients.add(self.client_address)
+                if self.path == "/buffstatus.xml":
+                    body = hub.buffstatus()
+                else:
+                    # /3?<hex message>=I=3
+                    msg = self.path[3:-4]
+                    hub.write(msg)
+                    body = b""
+
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0),
+                                                      Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def add(self, hex_str):
+        with self.lock:
+            for c in hex_str.upper():
+                self.buf = self.buf[:self.end] + c + self.buf[self.end + 1:]
+                self.end = (self.end + 1) % 200
+
+    def write(self, hex_str):
+        with self.lock:
+            self.writes.append(hex_str)
+            self.buf = "0" * 200
+            self.end = 0
+        # PLM echo w/ ACK.
+        self.add(hex_str + "06")
+
+    def buffstatus(self):
+        with self.lock:
+            self.reads += 1
+            return ("<response><BS>%s%02X</BS></response>" %
+                    (self.buf, self.end)).encode()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
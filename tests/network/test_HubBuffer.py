@@ -0,0 +1,140 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/network/HubBuffer.py
+#
+#===========================================================================
+from insteon_mqtt.network.HubBuffer import HubBuffer
+
+BUFFSTATUS = b"""
+<response>
+<BS>190006025C3B98C14B759823190002625058200519000602505058204B75982618000262221A9A1F2E02000000000000000000000000929606025C221A9A4B7598232E02027F0206027F0006027F0206027F00060006027F0206027F000602623B98C105A8</BS>
+</response>"""
+
+ORDEREDSTRING = "0006027F0206027F000602623B98C105190006025C3B98C14B759823190002625058200519000602505058204B75982618000262221A9A1F2E02000000000000000000000000929606025C221A9A4B7598232E02027F0206027F0006027F0206027F0006"
+
+
+def buffstatus(buf, end):
+    return ("<response><BS>%s%02X</BS></response>" %
+            (buf.hex().upper(), 2 * end)).encode()
+
+
+class Hub:
+    """Simple Hub ring buffer used to generate responses.
+    """
+    def __init__(self):
+        self.buf = bytearray(HubBuffer.size)
+        self.end = 0
+
+    def add(self, data):
+        for b in data:
+            self.buf[self.end] = b
+            self.end = (self.end + 1) % len(self.buf)
+
+    def clear(self):
+        self.buf = bytearray(HubBuffer.size)
+        self.end = 0
+
+    def response(self):
+        return buffstatus(self.buf, self.end)
+
+
+#===========================================================================
+class Test_HubBuffer:
+    #-----------------------------------------------------------------------
+    def test_find_buffer(self):
+        raw = HubBuffer.find_buffer(BUFFSTATUS)
+        assert raw[-2:] == b"A8"
+        assert len(raw) == 202
+
+        assert HubBuffer.find_buffer(b"<response></response>") is None
+        assert HubBuffer.find_buffer(b"<BS>") is None
+        assert HubBuffer.find_buffer(b"<BS>1</BS>") is None
+
+    #-----------------------------------------------------------------------
+    def test_first_read(self):
+        # The first read has no new data.
+        obj = HubBuffer()
+        assert obj.update(BUFFSTATUS) is None
+        assert obj._end == 84
+        assert obj._verify == bytes.fromhex(ORDEREDSTRING[-10:])
+
+    #-----------------------------------------------------------------------
+    def test_new_data(self):
+        obj = HubBuffer()
+        obj._end = 78
+        obj._verify = bytes.fromhex('7F0006027F')
+        assert obj.update(BUFFSTATUS) == bytes.fromhex('0206027F0006')
+
+        # Same response again has nothing new.
+        assert obj.update(BUFFSTATUS) is None
+
+    #-----------------------------------------------------------------------
+    def test_wrap(self):
+        hub = Hub()
+        obj = HubBuffer()
+        obj.update(hub.response())
+
+        hub.add(bytes(range(1, 91)))
+        assert obj.update(hub.response()) == bytes(range(1, 91))
+
+        # This wraps around the end of the ring.
+        hub.add(bytes(range(91, 131)))
+        assert hub.end == 30
+        assert obj.update(hub.response()) == bytes(range(91, 131))
+
+    #-----------------------------------------------------------------------
+    def test_reset(self):
+        hub = Hub()
+        obj = HubBuffer()
+        hub.add(b"\x02\x50\x01\x02\x03")
+        obj.update(hub.response())
+
+        # Write clears the Hub buffer.  The same data after the write is
+        # new data even though the response is the same as before.
+        hub.clear()
+        obj.reset()
+        hub.add(b"\x02\x50\x01\x02\x03")
+        assert obj.update(hub.response()) == b"\x02\x50\x01\x02\x03"
+
+    #-----------------------------------------------------------------------
+    def test_overflow(self):
+        hub = Hub()
+        obj = HubBuffer()
+        hub.add(b"\x02\x50\x01\x02\x03")
+        obj.update(hub.response())
+
+        # More than the buffer size arrives before the next read.
+        hub.add(bytes(range(1, 120)))
+        assert obj.update(hub.response()) is None
+
+        # Reads after that work again.
+        hub.add(b"\x02\x62")
+        assert obj.update(hub.response()) == b"\x02\x62"
+
+    #-----------------------------------------------------------------------
+    def test_bad_response(self):
+        obj = HubBuffer()
+        assert obj.update(b"<html>error</html>") is None
+        assert obj.update(b"<BS>XYZ</BS>") is None
+        assert obj.update(b"<BS>0000A8</BS>") is None
+        assert obj._end is None
+
+    #-----------------------------------------------------------------------
+    def test_many_responses(self):
+        # Recorded responses where most reads are idle (no change).
+        hub = Hub()
+        responses = []
+        for i in range(500):
+            if i % 10 == 0:
+                hub.add(bytes([0x02, 0x50, i % 256, 0x02, 0x03]))
+            responses.append(hub.response())
+
+        obj = HubBuffer()
+        data = bytearray()
+        for content in responses:
+            data.extend(obj.update(content) or b"")
+
+        assert len(data) == 49 * 5
+        assert data[:5] == bytes([0x02, 0x50, 10, 0x02, 0x03])
+
+#===========================================================================
@@ -3,6 +3,7 @@
 # Tests for: insteont_mqtt/network/Serial.py
 #
 #===========================================================================
+import socket
 import time
 import serial
 import pytest
@@ -12,6 +13,7 @@ from unittest.mock import call, patch
 
 import insteon_mqtt as IM
 import insteon_mqtt.network.Serial as IM_Serial
+import insteon_mqtt.network.poll as IM_poll
 import insteon_mqtt.message as Msg
 
 @pytest.fixture
@@ -51,9 +53,25 @@ class Test_Serial():
             return time.time() + 5
         test_device._write_buf.append((bytes(8), call_time))
         with patch.object(test_device.signal_needs_write, 'emit') as mock_emit:
+            # Too soon - stop watching for writes until the write time.
             test_device.write_to_link(t)
+            mock_emit.assert_called_once_with(test_device, False)
+            assert test_device.next_poll_time() > t + 4
+
+            # New messages don't re-arm the write while waiting.
+            mock_emit.reset_mock()
+            test_device.write(bytes(8), call_time)
             mock_emit.assert_not_called()
 
+            # Polling before the write time does nothing.
+            test_device.poll(t + 1)
+            mock_emit.assert_not_called()
+
+            # Polling after the write time re-arms the write.
+            test_device.poll(t + 10)
+            mock_emit.assert_called_once_with(test_device, True)
+            assert test_device.next_poll_time() is None
+
     def test_write_to_link_partial(self, test_device):
         test_device.client.write_max = 4
         msg_time = time.time()
@@ -88,3 +106,39 @@ class Test_Serial():
         t = time.time()
         test_device.write_to_link(t)
         assert "Serial write error" in caplog.text
+
+    def test_gated_write_cpu(self, test_device):
+        # Drive the link through a real poll manager using a socket as the
+        # "serial port" (always writable, like a real one) while the
+        # protocol waits out a long broadcast cleanup.  The loop must sleep
+        # instead of spinning on the write notification.
+        sock, peer = socket.socketpair()
+        test_device.client.fileno = sock.fileno
+        test_device.client.open = lambda: None
+        try:
+            assert test_device.connect()
+            loop = IM_poll.Manager()
+            loop.add(test_device)
+            proto = IM.Protocol(test_device)
+
+            wait = 1.0
+            start = time.time()
+            proto.set_wait_time(start + wait)
+            msg = Msg.OutStandard.direct(IM.Address('0a.12.33'), 0x11, 0xff)
+            proto.send(msg, IM.handler.StandardCmd(msg, None))
+
+            cpu_start = time.process_time()
+            num_loops = 0
+            while not test_device.client.written:
+                loop.select()
+                num_loops += 1
+                assert time.time() - start < 5
+
+            assert time.time() - start >= wait - 0.05
+            assert num_loops < 10
+            assert time.process_time() - cpu_start < 0.25 * wait
+            assert test_device.client.written == [msg.to_bytes()]
+        finally:
+            sock.close()
+            peer.close()
+
@@ -0,0 +1,63 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/network/poll.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import time
+from unittest import mock
+import pytest
+import insteon_mqtt as IM
+import insteon_mqtt.network.poll as IM_poll
+
+
+class Test_Manager:
+    #-----------------------------------------------------------------------
+    def test_next_poll_time(self):
+        mgr = IM_poll.Manager()
+        assert mgr.next_poll_time() is None
+
+        timed = IM.network.TimedCall()
+        stack = IM.network.Stack()
+        mgr.add_poll(timed)
+        mgr.add_poll(stack)
+        assert mgr.next_poll_time() is None
+
+        timed.add(200.0, print)
+        timed.add(100.0, print)
+        assert mgr.next_poll_time() == pytest.approx(100.0, abs=0.01)
+
+        # Stack functions should run right away.
+        stack.new().add(print)
+        assert mgr.next_poll_time() == 0
+
+    #-----------------------------------------------------------------------
+    def test_select_deadline(self):
+        mgr = IM_poll.Manager()
+        timed = IM.network.TimedCall()
+        mgr.add_poll(timed)
+        mgr.poll = mock.Mock()
+        mgr.poll.poll.return_value = []
+
+        # Idle - sleep the full time out.
+        mgr.select()
+        mgr.poll.poll.assert_called_once_with(IM_poll.Manager.min_time_out *
+                                              1000)
+
+        # Sleep until the timed call is due.
+        func = mock.Mock()
+        call = timed.add(time.time() + 0.5, func)
+        mgr.poll.poll.reset_mock()
+        mgr.select()
+        time_out = mgr.poll.poll.call_args[0][0]
+        assert 0 < time_out <= 500
+
+        # Past due calls don't block at all.
+        assert timed.remove(call)
+        timed.add(time.time() - 1, func)
+        mgr.poll.poll.reset_mock()
+        mgr.select()
+        mgr.poll.poll.assert_called_once_with(0)
+        func.assert_called_once_with()
+
+#===========================================================================
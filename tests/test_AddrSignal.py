@@ -0,0 +1,65 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/AddrSignal.py
+#
+#===========================================================================
+from unittest import mock
+import insteon_mqtt as IM
+
+
+class Slot:
+    def __init__(self):
+        self.data = []
+
+    def method_slot(self, msg):
+        self.data.append(msg)
+
+#===========================================================================
+
+
+def test_emit():
+    sig = IM.AddrSignal()
+    addr1 = IM.Address('01.02.03')
+    addr2 = IM.Address('0a.0b.0c')
+    obj1 = Slot()
+    obj2 = Slot()
+    sig.connect(addr1, obj1.method_slot)
+    sig.connect(addr2, obj2.method_slot)
+
+    sig.emit(IM.Address('01.02.03'), 1)
+    sig.emit(addr2, 2)
+    sig.emit(IM.Address('11.22.33'), 3)
+    assert obj1.data == [1]
+    assert obj2.data == [2]
+
+    sig.disconnect(addr1, obj1.method_slot)
+    assert addr1.id not in sig._signals
+    sig.emit(addr1, 4)
+    assert obj1.data == [1]
+
+    # Unknown address or slot is ignored.
+    sig.disconnect(IM.Address('11.22.33'), obj1.method_slot)
+    sig.disconnect(addr2, obj1.method_slot)
+    sig.emit(addr2, 5)
+    assert obj2.data == [2, 5]
+
+    sig.clear()
+    sig.emit(addr2, 6)
+    assert obj2.data == [2, 5]
+
+#===========================================================================
+
+
+def test_weakref():
+    sig = IM.AddrSignal()
+    addr = IM.Address('01.02.03')
+    obj = Slot()
+    func = mock.Mock()
+    sig.connect(addr, obj.method_slot)
+    sig.connect(addr, func)
+
+    del obj
+    sig.emit(addr, 1)
+    func.assert_called_once_with(1)
+
+#===========================================================================
@@ -3,6 +3,8 @@
 # Tests for: insteont_mqtt/Address.py
 #
 #===========================================================================
+import copy
+import pickle
 import pytest
 import insteon_mqtt as IM
 
@@ -114,4 +116,33 @@ class Test_Address:
         with pytest.raises(Exception):
             IM.Address({1 : 2})
 
+    #-----------------------------------------------------------------------
+    def test_intern(self):
+        a = IM.Address('01.e2.40')
+        assert IM.Address(a) is a
+        assert IM.Address(123456) is a
+        assert IM.Address.from_bytes(bytes([0x01, 0xe2, 0x40])) is a
+        assert copy.copy(a) is a
+        assert copy.deepcopy([a])[0] is a
+        assert pickle.loads(pickle.dumps(a)) is a
+
+        with pytest.raises(AttributeError):
+            a.id = 5
+        with pytest.raises(AttributeError):
+            a.name = "foo"
+
+    #-----------------------------------------------------------------------
+    def test_cache_max(self, monkeypatch):
+        monkeypatch.setattr(IM.Address, "_cache", {})
+        monkeypatch.setattr(IM.Address, "cache_max", 2)
+        a = IM.Address(1)
+        b = IM.Address(2)
+        c = IM.Address(3)
+        assert IM.Address(1) is a
+        assert IM.Address(2) is b
+
+        # Addresses past the limit still work but aren't shared.
+        assert IM.Address(3) == c
+        assert IM.Address(3) is not c
+
 #===========================================================================
@@ -0,0 +1,155 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/BulkSeq.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+from unittest import mock
+import pytest
+import insteon_mqtt as IM
+
+
+@pytest.fixture
+def modem():
+    modem = mock.Mock()
+    modem.protocol.num_waiting.return_value = 0
+    modem.protocol.get_ack_latency.return_value = None
+    return modem
+
+
+def sync_cmd(results, value, on_done):
+    results.append(value)
+    on_done(True, "done", value)
+
+
+def async_cmd(pending, value, on_done):
+    pending.append((value, on_done))
+
+
+class Test_BulkSeq:
+    #-----------------------------------------------------------------------
+    def test_long_sync(self, modem):
+        # Jobs which finish right away don't grow the stack.
+        results = []
+        on_done = mock.Mock()
+        seq = IM.BulkSeq(modem, "All done", on_done)
+        for i in range(5000):
+            seq.add(i, sync_cmd, results, i)
+
+        seq.run()
+        assert results == list(range(5000))
+        on_done.assert_called_once_with(True, "All done", seq.status)
+        assert set(seq.status.values()) == {"done"}
+        assert seq.is_done
+
+    #-----------------------------------------------------------------------
+    def test_max_active(self, modem):
+        pending = []
+        on_done = mock.Mock()
+        seq = IM.BulkSeq(modem, "All done", on_done, max_active=3)
+        seq.add_exclusive("modem", async_cmd, pending, "modem")
+        for i in range(10):
+            seq.add(i, async_cmd, pending, i)
+
+        # The exclusive job runs by itself.
+        seq.run()
+        assert [i[0] for i in pending] == ["modem"]
+        pending.pop(0)[1](True, "done", None)
+
+        # Then 3 jobs at a time.
+        assert [i[0] for i in pending] == [0, 1, 2]
+        assert seq.status[0] == "running"
+        assert seq.status[5] == "pending"
+
+        pending.pop(1)[1](False, "No reply", None)
+        assert [i[0] for i in pending] == [0, 2, 3]
+
+        while pending:
+            pending.pop(0)[1](True, "done", None)
+            assert len(pending) <= 3
+
+        on_done.assert_called_once_with(False, "All done, 1 of 11 failed",
+                                        seq.status)
+        assert seq.status[1] == "failed: No reply"
+        assert seq.status[9] == "done"
+
+    #-----------------------------------------------------------------------
+    def test_pacing(self, modem):
+        pending = []
+        modem.protocol.get_ack_latency.return_value = 0.5
+        seq = IM.BulkSeq(modem, "All done", None)
+        for i in range(3):
+            seq.add(i, async_cmd, pending, i)
+
+        # The next job waits for the ack latency.
+        with mock.patch('time.time', return_value=100.0):
+            seq.run()
+        assert len(pending) == 1
+        modem.timed_call.add.assert_called_once_with(100.5, seq._start_jobs)
+
+        # Jobs which finish before the time don't start new ones.
+        with mock.patch('time.time', return_value=100.2):
+            pending.pop(0)[1](True, "done", None)
+        assert not pending
+
+        with mock.patch('time.time', return_value=100.5):
+            seq._start_jobs()
+        assert len(pending) == 1
+
+    #-----------------------------------------------------------------------
+    def test_interactive(self, modem):
+        # New jobs wait while user commands are queued.
+        pending = []
+        modem.protocol.num_waiting.return_value = 1
+        seq = IM.BulkSeq(modem, "All done", None)
+        seq.add(0, async_cmd, pending, 0)
+
+        with mock.patch('time.time', return_value=100.0):
+            seq.run()
+        assert not pending
+        modem.protocol.num_waiting.assert_called_with(
+            IM.Priority.INTERACTIVE)
+        modem.timed_call.add.assert_called_once_with(100.5, seq._start_jobs)
+
+        modem.protocol.num_waiting.return_value = 0
+        seq._start_jobs()
+        assert len(pending) == 1
+
+    #-----------------------------------------------------------------------
+    def test_cancel(self, modem):
+        pending = []
+        on_done = mock.Mock()
+        seq = IM.BulkSeq(modem, "All done", on_done, name="Bulk",
+                         max_active=2)
+        for i in range(5):
+            seq.add(i, async_cmd, pending, i)
+
+        seq.run()
+        seq.pause()
+        assert seq.is_paused
+        pending.pop(0)[1](True, "done", None)
+        assert len(pending) == 1
+
+        seq.resume()
+        assert len(pending) == 2
+
+        # Running jobs finish before on_done is called.
+        seq.cancel()
+        assert not seq.is_done
+        pending.pop(0)[1](True, "done", None)
+        assert not seq.is_done
+        pending.pop(0)[1](True, "done", None)
+
+        assert seq.is_done
+        on_done.assert_called_once_with(False, "Bulk cancelled", seq.status)
+        assert seq.status == {0: "done", 1: "done", 2: "done",
+                              3: "cancelled", 4: "cancelled"}
+
+    #-----------------------------------------------------------------------
+    def test_empty(self, modem):
+        on_done = mock.Mock()
+        seq = IM.BulkSeq(modem, "All done", on_done)
+        seq.run()
+        on_done.assert_called_once_with(True, "All done", {})
+
+#===========================================================================
@@ -0,0 +1,139 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/CommandSeq.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import logging
+from unittest import mock
+import insteon_mqtt as IM
+
+
+def sync_cmd(results, value, on_done):
+    results.append(value)
+    on_done(True, "done", value)
+
+
+def async_cmd(pending, value, on_done):
+    pending.append((value, on_done))
+
+
+class Test_CommandSeq:
+    #-----------------------------------------------------------------------
+    def test_long_sync(self):
+        # Commands which finish right away don't grow the stack.
+        results = []
+        on_done = mock.Mock()
+        seq = IM.CommandSeq(None, "All done", on_done)
+        for i in range(5000):
+            seq.add(sync_cmd, results, i)
+
+        seq.run()
+        assert results == list(range(5000))
+        on_done.assert_called_once_with(True, "All done", 4999)
+        assert seq.is_done
+
+    #-----------------------------------------------------------------------
+    def test_error_stop(self):
+        results = []
+        on_done = mock.Mock()
+        seq = IM.CommandSeq(None, "All done", on_done)
+        seq.add(sync_cmd, results, 1)
+        seq.add(lambda on_done: on_done(False, "Failed", None))
+        seq.add(sync_cmd, results, 2)
+
+        seq.run()
+        assert results == [1]
+        on_done.assert_called_once_with(False, "Failed", None)
+
+        # Continue on errors.
+        results = []
+        on_done = mock.Mock()
+        seq = IM.CommandSeq(None, "All done", on_done, error_stop=False)
+        seq.add(sync_cmd, results, 1)
+        seq.add(lambda on_done: on_done(False, "Failed", None))
+        seq.add(sync_cmd, results, 2)
+
+        seq.run()
+        assert results == [1, 2]
+        on_done.assert_called_once_with(True, "All done", 2)
+
+    #-----------------------------------------------------------------------
+    def test_pause(self):
+        pending = []
+        on_done = mock.Mock()
+        seq = IM.CommandSeq(None, "All done", on_done, name="Test")
+        for i in range(3):
+            seq.add(async_cmd, pending, i)
+
+        seq.run()
+        assert len(pending) == 1
+
+        # Current command finishes but the next doesn't start.
+        seq.pause()
+        assert seq.is_paused
+        pending.pop(0)[1](True, "done", 0)
+        assert not pending
+
+        seq.resume()
+        assert not seq.is_paused
+        assert pending[0][0] == 1
+        pending.pop(0)[1](True, "done", 1)
+        pending.pop(0)[1](True, "done", 2)
+        on_done.assert_called_once_with(True, "All done", 2)
+
+    #-----------------------------------------------------------------------
+    def test_cancel(self):
+        pending = []
+        on_done = mock.Mock()
+        seq = IM.CommandSeq(None, "All done", on_done, name="Test")
+        for i in range(3):
+            seq.add(async_cmd, pending, i)
+
+        seq.run()
+        seq.cancel()
+        assert on_done.call_count == 0
+
+        # Sequence finishes once the current command is done.
+        pending.pop(0)[1](True, "done", 0)
+        assert not pending
+        on_done.assert_called_once_with(False, "Test cancelled", None)
+        assert seq.is_done
+
+        # Cancelling a paused sequence finishes right away.
+        on_done = mock.Mock()
+        seq = IM.CommandSeq(None, "All done", on_done, name="Test")
+        seq.add(async_cmd, pending, 0)
+        seq.add(async_cmd, pending, 1)
+        seq.run()
+        seq.pause()
+        pending.pop(0)[1](True, "done", 0)
+        seq.cancel()
+        on_done.assert_called_once_with(False, "Test cancelled", None)
+        assert not pending
+
+    #-----------------------------------------------------------------------
+    def test_progress(self, caplog):
+        pending = []
+        seq = IM.CommandSeq(None, "All done", None, name="Test",
+                            progress=True)
+        for i in range(4):
+            seq.add(async_cmd, pending, i)
+
+        with mock.patch('time.time', return_value=100.0):
+            seq.run()
+
+        with caplog.at_level(logging.DEBUG):
+            with mock.patch('time.time', return_value=120.0):
+                pending.pop(0)[1](True, "done", 0)
+
+            assert "Test: 1 of 4 done (25%), about 0:01:00 remaining" in \
+                caplog.text
+
+            # Reports are limited to one per progress_dt.
+            caplog.clear()
+            with mock.patch('time.time', return_value=125.0):
+                pending.pop(0)[1](True, "done", 1)
+            assert "remaining" not in caplog.text
+
+#===========================================================================
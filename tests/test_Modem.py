@@ -20,6 +20,8 @@ def test_device():
     Returns a generically configured modem for testing
     '''
     protocol = mock.MagicMock()
+    protocol.num_waiting.return_value = 0
+    protocol.get_ack_latency.return_value = None
     stack = H.main.MockStack()
     timed_call = H.main.MockTimedCall()
     device = IM.Modem(protocol, stack, timed_call)
@@ -126,6 +128,109 @@ class Test_Base_Config():
             assert record.levelname != "ERROR"
         assert test_device.addr == IM.Address('44.85.12')
 
+    def test_load_config_step2_lazy_dbs(self, test_device, tmpdir):
+        timed_call = mock.Mock()
+        test_device.timed_call = timed_call
+        test_device.db_preload_batch = 2
+        cfg = IM.config.load('config-example.yaml')
+        cfg['storage'] = str(tmpdir)
+        cfg['devices'] = make_devices(str(tmpdir), 5)
+        msg = Msg.OutModemInfo(addr=IM.Address('44.85.12'), dev_cat=None,
+                               sub_cat=None, firmware=None, is_ack=True)
+        test_device.load_config_step2(True, 'message', msg, cfg)
+
+        # The first batch is loaded and the rest are scheduled.
+        devices = list(test_device.devices.values())
+        assert len(devices) == 5
+        assert len([i for i in devices if i.db_loaded]) == 2
+        timed_call.add.assert_called_once()
+
+        # Devices loaded by being used are skipped.
+        unloaded = [i for i in devices if not i.db_loaded]
+        for dev in unloaded[1:]:
+            dev.db.get_meta('junk')
+        args = timed_call.add.call_args.args
+        timed_call.reset_mock()
+        args[1](*args[2:])
+        assert all(i.db_loaded for i in devices)
+        timed_call.add.assert_not_called()
+        for dev in devices:
+            assert len(dev.db) == 4
+
+    def test_startup_refresh_battery(self, test_device, tmpdir):
+        # Battery devices don't finish their refresh until they wake up so
+        # they must not hold up the other devices.
+        test_device.bulk_max_active = 2
+        cfg = IM.config.load('config-example.yaml')
+        cfg['storage'] = str(tmpdir)
+        cfg['startup_refresh'] = True
+        cfg['scenes'] = None
+        cfg['devices'] = {
+            'motion' : [{"30.00.%02x" % i: "motion%d" % i} for i in range(4)],
+            'switch' : [{"40.00.%02x" % i: "switch%d" % i} for i in range(3)],
+            }
+        msg = Msg.OutModemInfo(addr=IM.Address('44.85.12'), dev_cat=None,
+                               sub_cat=None, firmware=None, is_ack=True)
+
+        def refresh(force=False, on_done=None):
+            on_done(True, "Refreshed", None)
+
+        with mock.patch.object(IM.device.BatterySensor, 'refresh') as \
+                battery_refresh:
+            with mock.patch.object(IM.device.Switch, 'refresh',
+                                   side_effect=refresh) as switch_refresh:
+                test_device.load_config_step2(True, 'message', msg, cfg)
+
+        assert battery_refresh.call_count == 4
+        assert switch_refresh.call_count == 3
+        seq = test_device._all_seqs[-1]
+        assert seq.is_done
+        assert len(seq.status) == 3
+        assert all("switch" in i for i in seq.status)
+        assert set(seq.status.values()) == {"done"}
+
+    def test_startup_dbs_not_loaded(self, test_device, tmpdir):
+        # Startup creates the devices without loading their databases.
+        cfg = IM.config.load('config-example.yaml')
+        cfg['storage'] = str(tmpdir)
+        cfg['devices'] = make_devices(str(tmpdir), 7, num_entries=40)
+        cfg['scenes'] = None
+        test_device.protocol = H.main.MockProtocol()
+        msg = Msg.OutModemInfo(addr=IM.Address('44.85.12'), dev_cat=None,
+                               sub_cat=None, firmware=None, is_ack=True)
+        with mock.patch.object(test_device, '_preload_dbs') as preload:
+            test_device.load_config_step2(True, 'message', msg, cfg)
+
+        devices = list(test_device.devices.values())
+        assert len(devices) == 7
+        assert not [i for i in devices if i.db_loaded]
+        preload.assert_called_once_with(devices)
+
+    def test_preload_dbs(self, test_device, tmpdir):
+        timed_call = mock.Mock()
+        test_device.timed_call = timed_call
+        test_device.db_preload_batch = 3
+        test_device.save_path = str(tmpdir)
+        test_device._load_devices(make_devices(str(tmpdir), 7,
+                                               num_entries=40))
+        devices = list(test_device.devices.values())
+
+        # Each pass loads a batch and schedules the next pass.
+        todo = list(devices)
+        for num_loaded in (3, 6):
+            test_device._preload_dbs(todo)
+            assert len([i for i in devices if i.db_loaded]) == num_loaded
+            args = timed_call.add.call_args.args
+            assert args[1] == test_device._preload_dbs
+            assert args[2] is todo
+            timed_call.reset_mock()
+
+        # The last pass loads the rest and doesn't reschedule.
+        test_device._preload_dbs(todo)
+        assert all(i.db_loaded for i in devices)
+        assert len(devices[0].db) == 40
+        timed_call.add.assert_not_called()
+
     def test_db_update(self, test_device, test_entry_2,
                        test_device_2, caplog):
         test_device.add(test_device_2)
@@ -225,3 +330,124 @@ class Test_Base_Config():
             assert call_args[0].args[1].group == test_entry_multigroup.group
             assert call_args[0].args[1].is_controller == False
             assert call_args[0].args[1].data == bytes([0x00, 0x00, 0x00])
+
+    def test_sync_dry_run_large(self, test_device, caplog):
+        # Sync against a 2000 entry modem database.
+        test_device.clear_db_config()
+        data = bytes([0x00, 0x00, 0x00])
+        for i in range(2000):
+            addr = IM.Address(0x20, i >> 8, i & 0xff)
+            group = 0x10 + i % 200
+            entry = IM.db.ModemEntry(addr, group, i % 2 == 0, data)
+            test_device.db.add_entry(entry, save=False)
+            if i % 100 != 0:
+                entry = IM.db.ModemEntry(addr, group, i % 2 == 0, data)
+                test_device.db_config.add_entry(entry, save=False)
+
+        # Entries which need to be added to the modem.
+        for i in range(20):
+            addr = IM.Address(0x30, 0x00, i)
+            entry = IM.db.ModemEntry(addr, 0x20, True, data)
+            test_device.db_config.add_entry(entry, save=False)
+
+        with caplog.at_level(logging.INFO):
+            test_device.sync(dry_run=True, refresh=False)
+
+        assert caplog.text.count("Would Delete") == 20
+        assert caplog.text.count("Would Add") == 20
+
+    def test_find_fast(self, test_device):
+        # Device lookups for received messages.
+        test_device.addr = IM.Address('44.85.11')
+        addrs = []
+        for i in range(200):
+            device = mock.Mock(addr=IM.Address(0x20, 0x00, i), name=None)
+            test_device.add(device)
+            addrs.append(device.addr)
+
+        for i, addr in enumerate(addrs):
+            raw = bytes([0x20, 0x00, i])
+            assert test_device.find(IM.Address.from_bytes(raw)).addr is addr
+
+        assert test_device.find(addrs[5]).addr is addrs[5]
+        assert test_device.find(addrs[5].id).addr is addrs[5]
+        assert test_device.find(IM.Address(0x20, 0x00, 0xfe)) is None
+        assert test_device.find(IM.Address('44.85.11')) is test_device
+        assert test_device.find(0x1000000) is None
+
+    def test_add_remove(self, test_device, test_device_2):
+        signal = test_device.protocol.signal_addr_received
+        test_device.add(test_device_2)
+        assert test_device.find(test_device_2.addr) is test_device_2
+        signal.connect.assert_called_once_with(
+            test_device_2.addr, test_device_2.handle_received)
+
+        test_device.remove(test_device_2)
+        assert test_device.find(test_device_2.addr) is None
+        signal.disconnect.assert_called_once_with(
+            test_device_2.addr, test_device_2.handle_received)
+
+    def test_cancel_all(self, test_device, test_device_2):
+        test_device.add(test_device_2)
+        on_done = mock.Mock()
+        with mock.patch.object(test_device, 'refresh') as refresh:
+            test_device.refresh_all(on_done=on_done)
+            assert refresh.call_count == 1
+
+            # Pause and resume.
+            reply = mock.Mock()
+            test_device.pause_all(on_done=reply)
+            reply.assert_called_once_with(True, "Paused RefreshAll", None)
+
+            reply = mock.Mock()
+            test_device.resume_all(on_done=reply)
+            reply.assert_called_once_with(True, "Resumed RefreshAll", None)
+            assert refresh.call_count == 1
+
+            # Cancel stops the sequence once the modem refresh finishes.
+            reply = mock.Mock()
+            test_device.cancel_all(on_done=reply)
+            reply.assert_called_once_with(True, "Cancelled RefreshAll", None)
+            refresh.call_args.kwargs['on_done'](True, "Refresh done", None)
+            on_done.assert_called_once_with(False, "RefreshAll cancelled",
+                                            mock.ANY)
+            status = on_done.call_args.args[2]
+            assert status[test_device.label] == "done"
+            assert status[test_device_2.label] == "cancelled"
+
+        reply = mock.Mock()
+        test_device.cancel_all(on_done=reply)
+        reply.assert_called_once_with(False,
+                                      "No commands running on all devices",
+                                      None)
+
+
+#===========================================================================
+def make_devices(save_path, num, num_entries=4):
+    """Write device databases for test devices.
+
+    Args:
+      save_path (str):  The storage directory.
+      num (int):  The number of devices.
+      num_entries (int):  The number of entries in each database.
+
+    Returns:
+      dict:  Returns the insteon devices config with the devices.
+    """
+    types = ['switch', 'dimmer', 'keypad_linc', 'outlet', 'mini_remote8']
+    devices = {i: [] for i in types}
+    for i in range(num):
+        addr = IM.Address(0x30, i // 256, i % 256)
+        db = IM.db.Device(addr, "%s/%s.json" % (save_path, addr.hex))
+        db.delta = 1
+        for j in range(num_entries):
+            flags = Msg.DbFlags(in_use=True, is_controller=j % 2 == 0,
+                                is_last_rec=False)
+            db.add_entry(IM.db.DeviceEntry(IM.Address(0x40, j, i % 256),
+                                           j % 8 + 1, 0x0fff - j * 8, flags,
+                                           bytes([0xff, 0x1f, 0x01])),
+                         save=False)
+        db.write()
+        devices[types[i % len(types)]].append({addr.hex: "dev%d" % i})
+
+    return devices
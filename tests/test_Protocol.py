@@ -5,6 +5,7 @@
 # pylint: disable=protected-access
 #===========================================================================
 import time
+from unittest import mock
 import pytest
 import insteon_mqtt as IM
 import insteon_mqtt.message as Msg
@@ -53,12 +54,82 @@ class Test_Protocol:
         flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
         addr = IM.Address('0a.12.44')
         msg = Msg.InpStandard(addr, addr, flags, 0x11, 0x01)
-        proto._read_history.append(msg)
         msg.expire_time = 1
+        proto._add_read(msg)
         assert len(proto._read_history) == 2
         proto._remove_expired_read(time.time())
         assert len(proto._read_history) == 1
-        assert proto._read_history[0] == msg_keep
+        assert msg_keep in proto._read_history
+        assert len(proto._read_expire) == 1
+
+    #-----------------------------------------------------------------------
+    def test_duplicate_storm(self, test_proto, monkeypatch):
+        # Cleanup ACK's from a scene with many responders where every
+        # message is heard once per hop.
+        modem = IM.Address('44.85.11')
+        data = bytearray()
+        for i in range(200):
+            addr = IM.Address(0x10, 0x00, i)
+            for hops in (3, 2, 1, 0):
+                flags = Msg.Flags(Msg.Flags.Type.CLEANUP_ACK, False,
+                                  hops_left=hops, max_hops=3)
+                data.extend(bytes([0x02, 0x50]) + addr.to_bytes() +
+                            modem.to_bytes() + flags.to_bytes() +
+                            bytes([0x11, 0x01]))
+
+        processed = []
+        monkeypatch.setattr(test_proto, "_process_msg", processed.append)
+
+        # Split the data into serial port sized reads.
+        for i in range(0, len(data), 64):
+            test_proto._data_read(test_proto.link, data[i:i + 64])
+
+        assert len(processed) == 200
+        assert len(test_proto._read_history) <= 200
+        assert len(test_proto._read_expire) == len(test_proto._read_history)
+
+        # Everything is removed once the hops have expired.
+        test_proto._remove_expired_read(time.time() + 5)
+        assert not test_proto._read_history
+        assert not test_proto._read_expire
+
+    #-----------------------------------------------------------------------
+    def test_parse_stream(self, test_proto, monkeypatch):
+        # A ~1MB stream like a Hub buffer dump or modem db download.  Each
+        # block has 5 messages plus a PLM busy byte and some junk between
+        # messages.
+        block = bytes.fromhex(
+            "0257e2013a2984010e43"                    # InpAllLinkRec
+            "02623a29840f11ff06"                      # OutStandard ack
+            "02503a29844485112b11ff"                  # InpStandard
+            "02513a2984448511102f00" + "00" * 14 +    # InpExtended
+            "02623a29841f2f00" + "00" * 14 + "06"     # OutExtended ack
+            "15"                                      # PLM busy
+            "0007")                                   # junk
+        num = 1024 * 1024 // len(block)
+        data = block * num
+
+        processed = []
+        monkeypatch.setattr(test_proto, "_is_duplicate", lambda msg: False)
+        monkeypatch.setattr(test_proto, "_process_msg", processed.append)
+
+        # Everything in one read.
+        test_proto._data_read(test_proto.link, data)
+
+        assert len(processed) == 5 * num
+        assert not test_proto._buf
+        assert isinstance(processed[0], Msg.InpAllLinkRec)
+        assert isinstance(processed[3], Msg.InpExtended)
+        assert isinstance(processed[4], Msg.OutExtended)
+
+        # Serial port sized reads which split messages.
+        processed.clear()
+        data = block * (num // 8)
+        for i in range(0, len(data), 1000):
+            test_proto._data_read(test_proto.link, data[i:i + 1000])
+
+        assert len(processed) == 5 * (num // 8)
+        assert len(test_proto._buf) < 2
 
     #-----------------------------------------------------------------------
     def test_set_wait_time(self, test_proto):
@@ -70,6 +141,227 @@ class Test_Protocol:
         test_proto.set_wait_time(0)
         assert test_proto._next_write_time > 5
 
+    #-----------------------------------------------------------------------
+    def test_next_poll_time(self, test_proto):
+        link = test_proto.link
+        assert link.next_poll_time() is None
+
+        # Timed messages report their send time.
+        msg = Msg.OutStandard.direct(IM.Address('0a.12.33'), 0x11, 0xff)
+        handler = IM.handler.StandardCmd(msg, None)
+        test_proto.send(msg, handler, after=100.0)
+        assert link.next_poll_time() == pytest.approx(100.0, abs=0.01)
+
+        # The write handler time out is reported while waiting for a reply.
+        test_proto.send(msg, handler)
+        test_proto._msg_written(link, msg.to_bytes())
+        handler._expire_time = 50.0
+        assert link.next_poll_time() == 50.0
+
+    #-----------------------------------------------------------------------
+    def test_transport_latency(self, test_proto):
+        # Slow links extend the handler time out.
+        link = test_proto.link
+        msg = Msg.OutStandard.direct(IM.Address('0a.12.33'), 0x11, 0xff)
+        handler = IM.handler.StandardCmd(msg, None)
+        test_proto.send(msg, handler)
+        with mock.patch.object(link, 'transport_latency', return_value=1.5):
+            t0 = time.time()
+            test_proto._msg_written(link, msg.to_bytes())
+
+        assert handler.get_expire_time() == pytest.approx(
+            t0 + handler._time_out + 1.5, abs=0.1)
+
+        # Continued replies keep the extra time.
+        handler.update_expire_time()
+        assert handler.get_expire_time() == pytest.approx(
+            t0 + handler._time_out + 1.5, abs=0.1)
+
+    #-----------------------------------------------------------------------
+    def test_priority(self, test_proto):
+        link = test_proto.link
+        addr1 = IM.Address('0a.12.33')
+        addr2 = IM.Address('0a.12.34')
+
+        # First message is written right away.
+        msg1 = Msg.OutStandard.direct(addr1, 0x2f, 0x00)
+        db_get = IM.handler.StandardCmd(msg1, None)
+        db_get.priority = IM.Priority.BULK
+        test_proto.send(msg1, db_get)
+        test_proto._msg_written(link, msg1.to_bytes())
+
+        # Queue more bulk traffic and then a user command.
+        msg2 = Msg.OutStandard.direct(addr1, 0x2f, 0x01)
+        test_proto.send(msg2, db_get)
+        msg3 = Msg.OutStandard.direct(addr2, 0x11, 0xff)
+        cmd = IM.handler.StandardCmd(msg3, None)
+        test_proto.send(msg3, cmd)
+
+        assert test_proto.is_addr_in_write_queue(addr1)
+        assert test_proto.is_addr_in_write_queue(addr2)
+        assert not test_proto.is_addr_in_write_queue(IM.Address('01.02.03'))
+
+        # User command jumps in front of the bulk message.
+        test_proto._write_finished()
+        assert test_proto._write_queue.current.msg is msg3
+        test_proto._msg_written(link, msg3.to_bytes())
+
+        test_proto._write_finished()
+        assert test_proto._write_queue.current.msg is msg2
+        assert not test_proto.is_addr_in_write_queue(addr2)
+
+        test_proto._write_finished()
+        assert not test_proto._write_queue
+        assert not test_proto.is_addr_in_write_queue(addr1)
+
+    #-----------------------------------------------------------------------
+    def test_ack_latency(self, test_proto):
+        link = test_proto.link
+        addr = IM.Address('0a.12.33')
+        assert test_proto.get_ack_latency() is None
+
+        for t0, t1 in [(100.0, 100.2), (200.0, 200.7)]:
+            msg = Msg.OutStandard.direct(addr, 0x11, 0xff)
+            test_proto.send(msg, IM.handler.StandardCmd(msg, None))
+            assert test_proto.num_waiting(IM.Priority.INTERACTIVE) == 0
+
+            with mock.patch('time.time', return_value=t0):
+                test_proto._msg_written(link, msg.to_bytes())
+
+            ack = Msg.OutStandard.from_bytes(msg.to_bytes() + bytes([0x06]))
+            with mock.patch('time.time', return_value=t1):
+                test_proto._process_msg(ack)
+                # Only the first reply is used.
+                test_proto._process_msg(ack)
+
+            test_proto._write_finished()
+
+        assert test_proto.get_ack_latency() == pytest.approx(0.3)
+
+    #-----------------------------------------------------------------------
+    def test_addr_signals(self, test_proto):
+        addr1 = IM.Address('0a.12.33')
+        addr2 = IM.Address('0a.12.34')
+        received = mock.Mock()
+        finished = mock.Mock()
+        test_proto.signal_addr_received.connect(addr1, received)
+        test_proto.signal_addr_finished.connect(addr1, finished)
+
+        flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
+        msg1 = Msg.InpStandard(addr1, IM.Address('44.85.11'), flags, 0x11,
+                               0xff)
+        msg2 = Msg.InpStandard(addr2, IM.Address('44.85.11'), flags, 0x11,
+                               0xff)
+        test_proto._process_msg(msg2)
+        test_proto._process_msg(msg1)
+        received.assert_called_once_with(msg1)
+        finished.assert_not_called()
+
+        # Finished messages are only sent to the device they are from.
+        for msg in (msg2, msg1):
+            out = Msg.OutStandard.direct(msg.from_addr, 0x11, 0xff)
+            msg_handler = mock.Mock(priority=IM.Priority.INTERACTIVE)
+            msg_handler.msg_received.return_value = Msg.FINISHED
+            test_proto.send(out, msg_handler)
+            test_proto._msg_written(test_proto.link, out.to_bytes())
+            test_proto._process_msg(msg)
+
+        finished.assert_called_once_with(msg1)
+
+    #-----------------------------------------------------------------------
+    def test_load_config(self, test_proto):
+        assert test_proto.max_pipeline == 0
+        test_proto.load_config({'max_pipeline' : 3})
+        assert test_proto.max_pipeline == 3
+        assert test_proto.link.config == {'max_pipeline' : 3}
+
+    #-----------------------------------------------------------------------
+    def test_pipeline(self, test_proto):
+        link = test_proto.link
+        test_proto.max_pipeline = 2
+        addr1 = IM.Address('0a.12.33')
+        addr2 = IM.Address('0a.12.34')
+        modem = IM.Address('44.85.11')
+        flags = Msg.Flags(Msg.Flags.Type.DIRECT_ACK, False)
+
+        callback = mock.Mock()
+        finished = mock.Mock()
+        test_proto.signal_addr_finished.connect(addr1, finished)
+        msgs = [Msg.OutStandard.direct(addr1, 0x11, 0xff),
+                Msg.OutStandard.direct(addr2, 0x11, 0xff),
+                Msg.OutStandard.direct(addr1, 0x13, 0x00)]
+        for msg in msgs:
+            test_proto.send(msg, IM.handler.StandardCmd(msg, callback))
+
+        # PLM ACK of the first message parks it and sends the next one
+        # after the hop time.
+        test_proto._msg_written(link, msgs[0].to_bytes())
+        t0 = time.time()
+        test_proto._process_msg(Msg.OutStandard.from_bytes(
+            msgs[0].to_bytes() + bytes([0x06])))
+        assert test_proto._write_queue.current.msg is msgs[1]
+        assert list(test_proto._write_queue.parked) == [addr1.id]
+        assert test_proto.get_next_write_time() == pytest.approx(
+            t0 + 2 * 4 * 0.087, abs=0.1)
+
+        # PLM ACK of the second message.  The third message is to the
+        # parked address so it has to wait.
+        test_proto._msg_written(link, msgs[1].to_bytes())
+        test_proto._process_msg(Msg.OutStandard.from_bytes(
+            msgs[1].to_bytes() + bytes([0x06])))
+        assert test_proto._write_queue.current is None
+        assert len(test_proto._write_queue.parked) == 2
+
+        # Device replies go to the parked handlers.
+        reply2 = Msg.InpStandard(addr2, modem, flags, 0x11, 0xff)
+        test_proto._process_msg(reply2)
+        callback.assert_called_once_with(reply2, on_done=mock.ANY)
+        assert test_proto._write_queue.current is None
+
+        reply1 = Msg.InpStandard(addr1, modem, flags, 0x11, 0xff)
+        test_proto._process_msg(reply1)
+        finished.assert_called_once_with(reply1)
+        assert test_proto._write_queue.current.msg is msgs[2]
+        assert not test_proto._write_queue.parked
+
+    #-----------------------------------------------------------------------
+    def test_pipeline_off(self, test_proto):
+        link = test_proto.link
+        msgs = [Msg.OutStandard.direct(IM.Address('0a.12.33'), 0x11, 0xff),
+                Msg.OutStandard.direct(IM.Address('0a.12.34'), 0x11, 0xff)]
+        for msg in msgs:
+            test_proto.send(msg, IM.handler.StandardCmd(msg, None))
+
+        test_proto._msg_written(link, msgs[0].to_bytes())
+        test_proto._process_msg(Msg.OutStandard.from_bytes(
+            msgs[0].to_bytes() + bytes([0x06])))
+        assert test_proto._write_queue.current.msg is msgs[0]
+        assert not test_proto._write_queue.parked
+
+    #-----------------------------------------------------------------------
+    def test_pipeline_timeout(self, test_proto):
+        link = test_proto.link
+        test_proto.max_pipeline = 1
+        addr = IM.Address('0a.12.33')
+        msgs = [Msg.OutStandard.direct(addr, 0x11, 0xff),
+                Msg.OutStandard.direct(IM.Address('0a.12.34'), 0x11, 0xff)]
+        on_done = mock.Mock()
+        handler = IM.handler.StandardCmd(msgs[0], None, on_done, num_retry=0)
+        test_proto.send(msgs[0], handler)
+        test_proto.send(msgs[1], IM.handler.StandardCmd(msgs[1], None))
+
+        test_proto._msg_written(link, msgs[0].to_bytes())
+        test_proto._process_msg(Msg.OutStandard.from_bytes(
+            msgs[0].to_bytes() + bytes([0x06])))
+        assert addr.id in test_proto._write_queue.parked
+        assert link.next_poll_time() == handler.get_expire_time()
+
+        # Parked handler times out.
+        test_proto._poll(handler.get_expire_time() + 1)
+        on_done.assert_called_once_with(False, mock.ANY, None)
+        assert not test_proto._write_queue.parked
+        assert test_proto._write_queue.current.msg is msgs[1]
+
 #===========================================================================
 
 
@@ -79,7 +371,16 @@ class MockSerial:
         self.signal_wrote = IM.Signal()
         self.config = None
 
-    def poll(self):
+    def poll(self, t=None):
+        pass
+
+    def next_poll_time(self):
+        return None
+
+    def transport_latency(self):
+        return 0
+
+    def write(self, data, next_write_time):
         pass
 
     def load_config(self, config):
@@ -4,6 +4,9 @@
 #
 # pylint:
 #===========================================================================
+import copy
+import random
+from collections import Counter
 import pytest
 import insteon_mqtt as IM
 import insteon_mqtt.Scenes as Scenes
@@ -133,6 +136,90 @@ class Test_Scenes:
         scenes.compress_responders()
         assert len(scenes.entries) == 1
 
+    def test_compress_n_way(self):
+        modem = MockModem()
+        scenes = Scenes.SceneManager(modem, None)
+        scenes.data = [{'controllers': ['aa.bb.01'],
+                        'responders': ['aa.bb.02'],
+                        'name': 'test'},
+                       {'controllers': ['aa.bb.03'],
+                        'responders': ['aa.bb.04']},
+                       {'controllers': ['aa.bb.02'],
+                        'responders': ['aa.bb.01']}]
+        scenes._init_scene_entries()
+        assert scenes.compress_n_way() == 1
+        assert len(scenes.entries) == 2
+        assert len(scenes.data) == 2
+        assert scenes.entries[1].name == 'test'
+        assert [str(i.addr) for i in scenes.entries[1].controllers] == \
+            ['aa.bb.02', 'aa.bb.01']
+        assert [str(i.addr) for i in scenes.entries[1].responders] == \
+            ['aa.bb.01', 'aa.bb.02']
+
+        # Nothing left to merge.
+        assert scenes.compress_n_way() == 0
+
+    def test_compress_fixed_point(self):
+        modem = MockModem()
+        scenes = Scenes.SceneManager(modem, None)
+        # Merging the first two by controllers makes them match the
+        # controllers of the third which needs a second pass.
+        scenes.data = [{'controllers': ['aa.bb.01'],
+                        'responders': ['aa.bb.10']},
+                       {'controllers': ['aa.bb.02'],
+                        'responders': ['aa.bb.10']},
+                       {'controllers': ['aa.bb.01', 'aa.bb.02'],
+                        'responders': ['aa.bb.11']}]
+        scenes._init_scene_entries()
+        assert scenes.compress() == 2
+        assert len(scenes.entries) == 1
+        assert scenes.data == [
+            {'controllers': ['dev - aa.bb.01', 'dev - aa.bb.02'],
+             'responders': ['dev - aa.bb.11', 'dev - aa.bb.10']}]
+
+    def test_compress_house(self):
+        # Synthetic house with one scene per link.  Every merge removes one
+        # scene and all the links end up in keypad, 3-way, and n-way scenes
+        # (9 links in 3 scenes).
+        num = 4500
+        modem = MockModem()
+        scenes = Scenes.SceneManager(modem, None)
+        scenes.data = make_house(num)
+        scenes._init_scene_entries()
+        assert len(scenes.entries) == num
+
+        assert scenes.compress() == num - num // 3
+        assert len(scenes.entries) == num // 3
+        assert len(scenes.data) == num // 3
+
+    @pytest.mark.parametrize("func,same,controllers,responders", [
+        ("compress_controllers",
+         lambda a, b: Counter(a.responders) == Counter(b.responders),
+         True, False),
+        ("compress_responders",
+         lambda a, b: Counter(a.controllers) == Counter(b.controllers),
+         False, True),
+        ("compress_n_way", lambda a, b: n_way_devices(a) == n_way_devices(b),
+         True, True),
+        ])
+    def test_compress_pairwise(self, func, same, controllers, responders):
+        # Grouping by key gives the same scenes as merging each scene into
+        # the next matching scene.
+        data = make_house(150)
+        random.Random(1).shuffle(data)
+        modem = MockModem()
+        scenes = Scenes.SceneManager(modem, None)
+        scenes.data = copy.deepcopy(data)
+        scenes._init_scene_entries()
+        expected = Scenes.SceneManager(modem, None)
+        expected.data = copy.deepcopy(data)
+        expected._init_scene_entries()
+
+        num = getattr(scenes, func)()
+        assert num == pairwise_merge(expected, same, controllers, responders)
+        assert num > 0
+        assert scenes.data == expected.data
+
     def test_populate_scenes(self):
         modem = MockModem()
         device = modem.find(Address("aa.bb.cc"))
@@ -699,6 +786,68 @@ class Test_Scenes:
         # No changes to DB should be needed
         assert len(seq.calls) == 0
 
+def pairwise_merge(scenes, same, controllers, responders):
+    """Merges each scene into the next scene where same() is True.
+
+    Returns the number of merged scenes.
+    """
+    num = 0
+    i = 0
+    while i < len(scenes.entries):
+        test_scene = scenes.entries[i]
+        for scene in scenes.entries[i + 1:]:
+            if same(test_scene, scene):
+                if controllers:
+                    for new_controller in test_scene.controllers:
+                        scene.append_controller(new_controller)
+                if responders:
+                    for new_responder in test_scene.responders:
+                        scene.append_responder(new_responder)
+                if test_scene.name is not None:
+                    scene.name = test_scene.name
+                scenes.del_scene(test_scene)
+                num += 1
+                break
+        else:
+            i += 1
+    return num
+
+def n_way_devices(scene):
+    """Returns the addresses and groups of the devices in a scene.
+    """
+    return {(i.addr, i.group) for i in scene.controllers + scene.responders}
+
+def make_house(num_links):
+    """Returns scenes data for a house with one scene per link.
+
+    This is what import_scenes_all creates before the scenes are
+    compressed.  The links are keypad buttons that control 5 devices, 3-way
+    switches, and n-way pairs of devices that control each other.
+    """
+    def addr(i):
+        return "20.%02x.%02x" % (i // 256, i % 256)
+
+    data = []
+    num = 0
+    while len(data) < num_links:
+        # Each scene uses its own 6 devices.
+        i = 6 * num
+        if num % 3 == 0:
+            for resp in range(5):
+                data.append({'controllers': [{addr(i): {'group': 3}}],
+                             'responders': [addr(i + 1 + resp)]})
+        elif num % 3 == 1:
+            for ctrl in range(2):
+                data.append({'controllers': [addr(i + ctrl)],
+                             'responders': [addr(i + 2)]})
+        else:
+            data.append({'controllers': [addr(i)],
+                         'responders': [addr(i + 1)]})
+            data.append({'controllers': [addr(i + 1)],
+                         'responders': [addr(i)]})
+        num += 1
+    return data
+
 class MockModem():
     def __init__(self):
         self.save_path = ''
@@ -738,6 +887,7 @@ class MockProto:
     def __init__(self):
         self.msgs = []
         self.signal_msg_finished = MockSignal()
+        self.signal_addr_finished = MockSignal()
 
     def send(self, msg, handler, high_priority=False, after=None):
         self.msgs.append(msg)
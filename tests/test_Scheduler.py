@@ -0,0 +1,89 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/Scheduler.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import time
+from unittest import mock
+import pytest
+import insteon_mqtt as IM
+
+
+class Test_Scheduler:
+    #-----------------------------------------------------------------------
+    def test_order(self):
+        sched = IM.Scheduler()
+        assert len(sched) == 0
+        assert sched.next_time() is None
+
+        now = time.time()
+        calls = []
+        sched.add(now - 1, calls.append, 2)
+        sched.add(now - 3, calls.append, 1)
+        sched.add(now - 1, calls.append, 3)
+        sched.add(now + 100, calls.append, 4)
+        assert len(sched) == 4
+        assert sched.next_time() == pytest.approx(now - 3, abs=0.01)
+
+        # All due calls run in one pass, in time then insertion order.
+        assert sched.run_due() == 3
+        assert calls == [1, 2, 3]
+        assert len(sched) == 1
+        assert sched.next_time() == pytest.approx(now + 100, abs=0.01)
+
+    #-----------------------------------------------------------------------
+    def test_cancel(self):
+        sched = IM.Scheduler()
+        func = mock.Mock()
+        now = time.time()
+        c1 = sched.add(now - 2, func, 1)
+        c2 = sched.add(now - 1, func, 2)
+
+        assert sched.cancel(c1) is True
+        assert sched.cancel(c1) is False
+        assert len(sched) == 1
+        assert sched.next_time() == pytest.approx(now - 1, abs=0.01)
+
+        sched.run_due()
+        func.assert_called_once_with(2)
+
+        # Calls that already ran can't be cancelled.
+        assert sched.cancel(c2) is False
+        assert len(sched) == 0
+
+    #-----------------------------------------------------------------------
+    def test_cancel_compact(self):
+        sched = IM.Scheduler()
+        now = time.time()
+        calls = [sched.add(now + 10 + i, print) for i in range(100)]
+        for call in calls[1:]:
+            sched.cancel(call)
+
+        assert len(sched) == 1
+        assert len(sched._heap) < 50
+
+    #-----------------------------------------------------------------------
+    def test_wall_clock_jump(self):
+        sched = IM.Scheduler()
+        func = mock.Mock()
+        sched.add(time.time() + 60, func)
+
+        # Jumping the wall clock forward doesn't make the call due.
+        real_time = time.time
+        with mock.patch('time.time', lambda: real_time() + 3600):
+            assert sched.run_due() == 0
+        func.assert_not_called()
+
+    #-----------------------------------------------------------------------
+    def test_error(self, caplog):
+        sched = IM.Scheduler()
+        func = mock.Mock()
+        sched.add(time.time() - 1, mock.Mock(side_effect=Exception("boom")))
+        sched.add(time.time() - 1, func)
+
+        assert sched.run_due() == 2
+        func.assert_called_once_with()
+        assert "Error running scheduled function" in caplog.text
+
+#===========================================================================
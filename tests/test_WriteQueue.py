@@ -0,0 +1,109 @@
+#===========================================================================
+#
+# Tests for: insteont_mqtt/WriteQueue.py
+#
+# pylint: disable=protected-access
+#===========================================================================
+import insteon_mqtt as IM
+import insteon_mqtt.message as Msg
+from insteon_mqtt.WriteQueue import OutputMsg
+
+
+def make_output(addr, cmd1=0x11):
+    msg = Msg.OutStandard.direct(IM.Address(addr), cmd1, 0x00)
+    return OutputMsg(msg, None)
+
+
+class Test_WriteQueue:
+    #-----------------------------------------------------------------------
+    def test_lanes(self):
+        queue = IM.WriteQueue()
+        assert not queue
+        assert queue.pop_next() is None
+
+        bulk1 = make_output('01.02.03', 0x2f)
+        bulk2 = make_output('01.02.03', 0x2f)
+        refresh = make_output('01.02.04', 0x19)
+        cmd = make_output('01.02.05')
+        urgent = make_output('01.02.06')
+
+        queue.push(bulk1, IM.Priority.BULK)
+        queue.push(bulk2, IM.Priority.BULK)
+        queue.push(refresh, IM.Priority.REFRESH)
+        queue.push(cmd)
+        queue.push(urgent, IM.Priority.INTERACTIVE, front=True)
+        assert len(queue) == 5
+
+        order = []
+        while queue.pop_next():
+            order.append(queue.current)
+            assert len(queue) == 5 - len(order) + 1
+            queue.finish()
+
+        assert order == [urgent, cmd, refresh, bulk1, bulk2]
+        assert not queue
+        assert len(queue) == 0
+
+    #-----------------------------------------------------------------------
+    def test_addr(self):
+        queue = IM.WriteQueue()
+        addr = IM.Address('01.02.03')
+
+        queue.push(make_output('01.02.03'), IM.Priority.BULK)
+        queue.push(make_output('01.02.03'))
+        queue.push(OutputMsg(Msg.OutResetModem(), None))
+        assert queue.has_addr(addr)
+        assert not queue.has_addr(IM.Address('01.02.04'))
+
+        # Interactive message to the address.
+        queue.pop_next()
+        queue.finish()
+        assert queue.has_addr(addr)
+
+        # Modem message.
+        queue.pop_next()
+        queue.finish()
+        assert queue.has_addr(addr)
+
+        # The current message is still in the queue until it's finished.
+        queue.pop_next()
+        assert queue.has_addr(addr)
+        queue.finish()
+        assert not queue.has_addr(addr)
+        assert not queue
+
+    #-----------------------------------------------------------------------
+    def test_park(self):
+        queue = IM.WriteQueue()
+        addr = IM.Address('01.02.03')
+        out1 = make_output('01.02.03')
+        out2 = make_output('01.02.04')
+        out3 = make_output('01.02.03')
+        queue.push(out1)
+        queue.push(out2)
+        queue.push(out3)
+
+        # Parking the current message frees the current slot.
+        queue.pop_next()
+        queue.park(addr)
+        assert queue.current is None
+        assert queue.parked == {addr.id: out1}
+        assert len(queue) == 3
+        assert queue.has_next()
+
+        assert queue.pop_next() is out2
+        queue.finish()
+
+        # Next message is to the parked address so it has to wait.
+        assert queue.pop_next() is None
+        assert queue.has_addr(addr)
+
+        assert queue.finish_parked(addr) is out1
+        assert queue.has_addr(addr)
+        assert queue.pop_next() is out3
+        queue.finish()
+        assert not queue.has_addr(addr)
+        assert not queue
+        assert not queue.has_next()
+
+#===========================================================================
@@ -5,6 +5,7 @@
 # pylint: disable=attribute-defined-outside-init
 #===========================================================================
 import os
+import shutil
 import yaml
 import pytest
 from unittest import mock
@@ -129,6 +130,77 @@ class Test_config:
             val = IM.config.validate(file)
             assert config[1] in val
 
+    #-----------------------------------------------------------------------
+    def test_read(self):
+        file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                            'configs', 'basic.yaml')
+        cfg, val = IM.config.read(file)
+        assert val == ""
+        assert cfg == IM.config.load(file)
+
+        file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                            'configs', 'bad_plm.yaml')
+        cfg, val = IM.config.read(file)
+        assert val != ""
+
+    #-----------------------------------------------------------------------
+    def test_read_cache(self, tmp_path):
+        src = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                           'configs')
+        shutil.copy(os.path.join(src, 'multi_insteon.yaml'), str(tmp_path))
+
+        file = str(tmp_path / 'config.yaml')
+        with open(file, 'w') as f:
+            f.write("insteon: !include multi_insteon.yaml\n"
+                    "mqtt:\n  broker: 127.0.0.1\n")
+
+        cache_dir = str(tmp_path / 'cache')
+        cfg, val = IM.config.read(file, cache_dir)
+        assert val == ""
+        assert len(os.listdir(cache_dir)) == 1
+
+        # Files haven't changed - nothing is parsed.
+        with mock.patch.object(IM.config, 'load') as load:
+            cfg2, val = IM.config.read(file, cache_dir)
+            load.assert_not_called()
+        assert val == ""
+        assert cfg2 == cfg
+
+        # Changing an include file reloads the config.
+        path = str(tmp_path / 'multi_insteon.yaml')
+        with open(path) as f:
+            data = f.read()
+        with open(path, 'w') as f:
+            f.write(data.replace("storage: 'data'", "storage: 'cache_test'"))
+
+        cfg3, val = IM.config.read(file, cache_dir)
+        assert val == ""
+        assert cfg3['insteon']['storage'] == 'cache_test'
+
+        cfg4, val = IM.config.read(file, cache_dir)
+        assert cfg4 == cfg3
+
+    #-----------------------------------------------------------------------
+    def test_read_cache_invalid(self, tmp_path):
+        file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                            'configs', 'bad_plm.yaml')
+        cache_dir = str(tmp_path / 'cache')
+        cfg, val = IM.config.read(file, cache_dir)
+        assert val != ""
+        assert not os.path.exists(cache_dir)
+
+        # Bad cache files are ignored.
+        file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                            'configs', 'basic.yaml')
+        IM.config.read(file, cache_dir)
+        cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        with open(cache_file, 'wb') as f:
+            f.write(b'bad data')
+
+        cfg, val = IM.config.read(file, cache_dir)
+        assert val == ""
+        assert cfg == IM.config.load(file)
+
     #-----------------------------------------------------------------------
     def test_validate_addr(self):
         validator = IM.config.IMValidator()
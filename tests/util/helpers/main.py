@@ -50,6 +50,8 @@ class MockProtocol:
     def __init__(self):
         self.signal_received = IM.Signal()
         self.signal_msg_finished = IM.Signal()
+        self.signal_addr_received = IM.AddrSignal()
+        self.signal_addr_finished = IM.AddrSignal()
         self.sent = []
         self.addr_in_queue = False
 